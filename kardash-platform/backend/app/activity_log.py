@@ -0,0 +1,251 @@
+import atexit
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import insert
+
+from . import activity_rollups
+from .config import settings
+from .models import BotActivity
+
+logger = logging.getLogger(__name__)
+
+# Buffered BotActivity writer.
+#
+# log() appends an event to an in-memory queue and returns; a background
+# thread writes queued events as multi-row INSERTs whenever
+# ACTIVITY_LOG_BATCH_SIZE events are waiting or ACTIVITY_LOG_FLUSH_SECONDS
+# have passed, one short transaction per batch instead of one per event.
+# The same transaction adds the batch to the activity rollups
+# (app/activity_rollups.py).
+# created_at is stamped at log() time, so rows keep the order and time of
+# the events they describe; they become visible up to one flush interval
+# later.
+#
+# When ACTIVITY_LOG_MAX_QUEUE events are waiting (the database is slow or
+# down), producers block for up to ACTIVITY_LOG_BLOCK_SECONDS, then the
+# event is dropped and counted. stop() flushes everything still queued; it
+# runs on API shutdown and at interpreter exit. A write that keeps failing
+# while stopping is retried STOP_WRITE_ATTEMPTS times, then whatever is left
+# is counted as dropped.
+#
+# Without a running writer (a script that didn't start() it, or after
+# stop()) log() inserts the event itself, in its own transaction, unless
+# called with block=False: code on the event loop must not wait on a commit,
+# so its events are dropped and counted instead.
+
+STOP_WRITE_ATTEMPTS = 3
+STOP_RETRY_SECONDS = 0.5
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class ActivityWriter:
+    def __init__(self, batch_size: int, flush_seconds: float, max_queue: int, block_seconds: float):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+        self.block_seconds = block_seconds
+        self.session_factory = None
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._exit_hook = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.flushes = 0
+        self.errors = 0
+        self.flush_seconds_total = 0.0
+        self.last_flush_ms = None
+        self.max_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, session_factory=None):
+        """Start the flusher thread; session_factory defaults to the primary SessionLocal"""
+        with self._condition:
+            if self.running:
+                return
+            if session_factory is None:
+                from .database import SessionLocal
+                session_factory = SessionLocal
+            self.session_factory = session_factory
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="activity-log-writer", daemon=True)
+            self._thread.start()
+            if not self._exit_hook:
+                atexit.register(self.stop)
+                self._exit_hook = True
+
+    def log(self, bot_id: int, activity_type: str, details: Optional[dict] = None,
+            bot_account_id: Optional[int] = None, block: bool = True) -> bool:
+        """Queue one BotActivity (or insert it, without a running writer); False if it was dropped
+
+        Code running on the event loop should pass block=False: it drops at once instead of waiting,
+        on a full queue or without a running writer.
+        """
+        row = {
+            "bot_id": bot_id,
+            "bot_account_id": bot_account_id,
+            "activity_type": activity_type,
+            "details": json.dumps(details) if details is not None else None,
+            "created_at": _utcnow(),
+        }
+        with self._condition:
+            direct = self._stopping or not self.running
+            if direct and not block:
+                self.dropped += 1
+                return False
+            if not direct:
+                if len(self._queue) >= self.max_queue:
+                    self.blocked += 1
+                    deadline = time.monotonic() + (self.block_seconds if block else 0)
+                    while len(self._queue) >= self.max_queue:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._condition.notify_all()
+                        self._condition.wait(remaining)
+                self._queue.append(row)
+                if len(self._queue) >= self.batch_size:
+                    self._condition.notify_all()
+            self.enqueued += 1
+        if direct:
+            return self._write_now(row)
+        return True
+
+    def _write_now(self, row: dict) -> bool:
+        if self.session_factory is None:
+            from .database import SessionLocal
+            self.session_factory = SessionLocal
+        if self._write([row]):
+            return True
+        with self._condition:
+            self.dropped += 1
+        return False
+
+    def _take_batch(self) -> list:
+        with self._condition:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            # Producers waiting for room
+            self._condition.notify_all()
+            return batch
+
+    def _write(self, batch: list) -> bool:
+        started = time.perf_counter()
+        db = self.session_factory()
+        try:
+            db.execute(insert(BotActivity), batch)
+            activity_rollups.record(db, batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._condition:
+                self.errors += 1
+            logger.exception("Writing %d bot activities failed", len(batch))
+            return False
+        finally:
+            db.close()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._condition:
+            self.written += len(batch)
+            self.flushes += 1
+            self.flush_seconds_total += elapsed_ms / 1000
+            self.last_flush_ms = round(elapsed_ms, 3)
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        return True
+
+    def _requeue(self, batch: list):
+        # Put a failed batch back in front, as far as there is room for it
+        with self._condition:
+            room = max(self.max_queue - len(self._queue), 0)
+            self.dropped += max(len(batch) - room, 0)
+            self._queue.extendleft(reversed(batch[:room]))
+
+    def _run(self):
+        failures = 0
+        while True:
+            with self._condition:
+                # After a failed write, wait out the interval even if a full batch is queued
+                if not self._stopping and (failures or len(self._queue) < self.batch_size):
+                    self._condition.wait(self.flush_seconds)
+                stopping = self._stopping
+            while True:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                if not self._write(batch):
+                    self._requeue(batch)
+                    failures += 1
+                    break
+                failures = 0
+                if len(batch) < self.batch_size:
+                    break
+            if stopping:
+                with self._condition:
+                    remaining = len(self._queue)
+                    if remaining and failures >= STOP_WRITE_ATTEMPTS:
+                        self.dropped += remaining
+                        self._queue.clear()
+                if not remaining:
+                    return
+                if failures >= STOP_WRITE_ATTEMPTS:
+                    logger.error("Dropped %d bot activities that could not be written before stopping", remaining)
+                    return
+                if failures:
+                    time.sleep(STOP_RETRY_SECONDS)
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the flusher thread after it has written every queued event"""
+        with self._condition:
+            thread = self._thread
+            self._stopping = True
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "running": self.running,
+                "queue_depth": len(self._queue),
+                "max_queue": self.max_queue,
+                "batch_size": self.batch_size,
+                "flush_seconds": self.flush_seconds,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "blocked": self.blocked,
+                "flushes": self.flushes,
+                "errors": self.errors,
+                "last_flush_ms": self.last_flush_ms,
+                "avg_flush_ms": round(self.flush_seconds_total * 1000 / self.flushes, 3) if self.flushes else None,
+                "max_flush_ms": round(self.max_flush_ms, 3),
+            }
+
+
+writer = ActivityWriter(
+    settings.ACTIVITY_LOG_BATCH_SIZE,
+    settings.ACTIVITY_LOG_FLUSH_SECONDS,
+    settings.ACTIVITY_LOG_MAX_QUEUE,
+    settings.ACTIVITY_LOG_BLOCK_SECONDS,
+)
+
+
+def log_activity(bot_id: int, activity_type: str, details: Optional[dict] = None,
+                 bot_account_id: Optional[int] = None, block: bool = True) -> bool:
+    return writer.log(bot_id, activity_type, details, bot_account_id, block)
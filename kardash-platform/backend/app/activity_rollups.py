@@ -0,0 +1,245 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import Bot, BotAccount, BotActivity, BotActivityRollup
+
+logger = logging.getLogger(__name__)
+
+# Time-bucketed bot activity rollups.
+#
+# Every batch the activity writer (app/activity_log.py) inserts also adds its
+# events to one hourly and one daily BotActivityRollup row per (bot, account,
+# activity type), in the same transaction. Feeds and charts over a bot's
+# history read those rows instead of scanning bot_activities.
+#
+# Bot.success_rate and BotAccount.success_rate are the percentage of outcome
+# activities (scrape/apply vs. error) that succeeded over the daily rollups of
+# the last BOT_SUCCESS_RATE_WINDOW_DAYS. They are refreshed for the bots and
+# accounts in each written batch, and for everyone by the periodic
+# maintenance run, which also deletes raw activities older than
+# BOT_ACTIVITY_RETENTION_DAYS and hourly rollups older than
+# BOT_ACTIVITY_HOURLY_ROLLUP_DAYS. Daily rollups are kept.
+#
+#     python -m app.activity_rollups backfill   # rebuild the rollups the raw rows still cover
+#     python -m app.activity_rollups prune
+
+PERIODS = ("hourly", "daily")
+SUCCESS_TYPES = ("scrape", "apply")
+FAILURE_TYPES = ("error",)
+PRUNE_BATCH_SIZE = 5000
+
+
+def bucket_start(period: str, moment: datetime) -> datetime:
+    # SQLite hands timestamps back naive; they are UTC
+    moment = moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment if period == "hourly" else moment.replace(hour=0)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _totals(rows: Iterable) -> Counter:
+    totals = Counter()
+    for row in rows:
+        if row["bot_id"] is None:
+            continue
+        for period in PERIODS:
+            key = (row["bot_id"], row.get("bot_account_id") or 0, period,
+                   bucket_start(period, row["created_at"]), row["activity_type"])
+            totals[key] += 1
+    return totals
+
+
+def _add(db: Session, totals: Counter):
+    rows = [
+        {"bot_id": bot_id, "bot_account_id": account_id, "period": period,
+         "bucket_start": start, "activity_type": activity_type, "count": count}
+        for (bot_id, account_id, period, start, activity_type), count in totals.items()
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(BotActivityRollup)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=["bot_id", "period", "bucket_start", "activity_type", "bot_account_id"],
+                set_={"count": BotActivityRollup.count + statement.excluded.count},
+            ),
+            rows,
+        )
+        return
+
+    for row in rows:
+        result = db.execute(
+            update(BotActivityRollup)
+            .where(
+                BotActivityRollup.bot_id == row["bot_id"],
+                BotActivityRollup.bot_account_id == row["bot_account_id"],
+                BotActivityRollup.period == row["period"],
+                BotActivityRollup.bucket_start == row["bucket_start"],
+                BotActivityRollup.activity_type == row["activity_type"],
+            )
+            .values(count=BotActivityRollup.count + row["count"])
+        )
+        if result.rowcount == 0:
+            db.execute(insert(BotActivityRollup).values(**row))
+
+
+def _success_rate(owner_column):
+    """Correlated subquery: success percentage of the rollups matching `owner_column`"""
+    window_start = bucket_start("daily", _utcnow()) - timedelta(days=settings.BOT_SUCCESS_RATE_WINDOW_DAYS - 1)
+    successes = func.sum(case((BotActivityRollup.activity_type.in_(SUCCESS_TYPES), BotActivityRollup.count), else_=0))
+    return (
+        select(func.coalesce(100.0 * successes / func.nullif(func.sum(BotActivityRollup.count), 0), 0.0))
+        .where(
+            owner_column,
+            BotActivityRollup.period == "daily",
+            BotActivityRollup.bucket_start >= window_start,
+            BotActivityRollup.activity_type.in_(SUCCESS_TYPES + FAILURE_TYPES),
+        )
+        .scalar_subquery()
+    )
+
+
+def refresh_success_rates(db: Session, bot_ids: Optional[List[int]] = None, account_ids: Optional[List[int]] = None):
+    """Recompute success_rate from the rollups for the given bots/accounts (None: all of them)"""
+    bots = update(Bot).values(success_rate=_success_rate(BotActivityRollup.bot_id == Bot.id))
+    if bot_ids is not None:
+        bots = bots.where(Bot.id.in_(bot_ids))
+    accounts = update(BotAccount).values(success_rate=_success_rate(BotActivityRollup.bot_account_id == BotAccount.id))
+    if account_ids is not None:
+        accounts = accounts.where(BotAccount.id.in_(account_ids))
+    if bot_ids is None or bot_ids:
+        db.execute(bots.execution_options(synchronize_session=False))
+    if account_ids is None or account_ids:
+        db.execute(accounts.execution_options(synchronize_session=False))
+
+
+def record(db: Session, rows: List[dict]):
+    """Add freshly inserted activity rows to their rollups, inside the caller's transaction"""
+    totals = _totals(rows)
+    if not totals:
+        return
+    _add(db, totals)
+    outcomes = [row for row in rows if row["activity_type"] in SUCCESS_TYPES + FAILURE_TYPES and row["bot_id"]]
+    if outcomes:
+        refresh_success_rates(
+            db,
+            sorted({row["bot_id"] for row in outcomes}),
+            sorted({row["bot_account_id"] for row in outcomes if row.get("bot_account_id")}),
+        )
+
+
+def bot_rollups(db: Session, bot_id: int, period: str, since: datetime) -> list:
+    """(bucket_start, activity_type, count) for one bot from `since`, summed over its accounts"""
+    return (
+        db.query(BotActivityRollup.bucket_start, BotActivityRollup.activity_type,
+                 func.sum(BotActivityRollup.count).label("count"))
+        .filter(
+            BotActivityRollup.bot_id == bot_id,
+            BotActivityRollup.period == period,
+            BotActivityRollup.bucket_start >= bucket_start(period, since),
+        )
+        .group_by(BotActivityRollup.bucket_start, BotActivityRollup.activity_type)
+        .order_by(BotActivityRollup.bucket_start, BotActivityRollup.activity_type)
+        .all()
+    )
+
+
+def backfill(db: Session) -> int:
+    """Rebuild the rollups of every day the raw rows still fully cover; returns activities counted
+
+    Older rollups are left alone: their raw rows have been pruned.
+    """
+    first_day = bucket_start("daily", _utcnow() - timedelta(days=settings.BOT_ACTIVITY_RETENTION_DAYS)) + timedelta(days=1)
+    activities = db.query(
+        BotActivity.bot_id, BotActivity.bot_account_id, BotActivity.activity_type, BotActivity.created_at
+    ).filter(BotActivity.created_at >= first_day).yield_per(10_000)
+    totals = Counter()
+    counted = 0
+    for row in activities:
+        totals.update(_totals([row._asdict()]))
+        counted += 1
+
+    db.execute(delete(BotActivityRollup).where(BotActivityRollup.bucket_start >= first_day))
+    if totals:
+        _add(db, totals)
+    refresh_success_rates(db)
+    db.commit()
+    return counted
+
+
+def prune(db: Session) -> int:
+    """Delete expired raw activities (in batches) and hourly rollups; returns raw rows deleted"""
+    cutoff = _utcnow() - timedelta(days=settings.BOT_ACTIVITY_RETENTION_DAYS)
+    deleted = 0
+    while True:
+        ids = select(BotActivity.id).where(BotActivity.created_at < cutoff).order_by(
+            BotActivity.created_at, BotActivity.id
+        ).limit(PRUNE_BATCH_SIZE)
+        batch = [activity_id for (activity_id,) in db.execute(ids)]
+        if not batch:
+            break
+        db.execute(delete(BotActivity).where(BotActivity.id.in_(batch)).execution_options(synchronize_session=False))
+        db.commit()
+        deleted += len(batch)
+        if len(batch) < PRUNE_BATCH_SIZE:
+            break
+
+    hourly_cutoff = bucket_start("hourly", _utcnow() - timedelta(days=settings.BOT_ACTIVITY_HOURLY_ROLLUP_DAYS))
+    db.execute(
+        delete(BotActivityRollup)
+        .where(BotActivityRollup.period == "hourly", BotActivityRollup.bucket_start < hourly_cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    # Days leave the success-rate window whether or not a bot was active
+    refresh_success_rates(db)
+    db.commit()
+    return deleted
+
+
+async def run_periodic_maintenance(session_factory, interval_seconds: int):
+    """Background task: prune bot activity and refresh success rates every `interval_seconds`"""
+    def prune_once():
+        db = session_factory()
+        try:
+            deleted = prune(db)
+            if deleted:
+                logger.info("Pruned %d bot activities", deleted)
+        finally:
+            db.close()
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(prune_once)
+        except Exception:
+            logger.exception("Bot activity maintenance failed")
+
+
+if __name__ == "__main__":
+    import sys
+
+    from .database import SessionLocal, create_db_and_tables
+
+    if sys.argv[1:] not in (["backfill"], ["prune"]):
+        sys.exit("usage: python -m app.activity_rollups backfill|prune")
+    create_db_and_tables()
+    session = SessionLocal()
+    try:
+        if sys.argv[1] == "backfill":
+            print(f"Rebuilt bot activity rollups from {backfill(session)} activities")
+        else:
+            print(f"Pruned {prune(session)} bot activities")
+    finally:
+        session.close()
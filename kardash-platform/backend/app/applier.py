@@ -0,0 +1,184 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import AutoApplierConfig, Bot, JobApplication
+from .search import tokenize
+
+# Per-user auto-applier bookkeeping.
+#
+# Each user's auto-applier is a Bot row named auto_applier_{user_id}. Its
+# jobs_applied / total_bid_amount columns are running totals over the user's
+# JobApplications, bumped in the same transaction as each new application, so
+# /auto-applier/stats reads one row instead of the whole application history.
+#
+# A user's AutoApplyConfig is stored once in auto_applier_configs and compiled
+# into an ApplierFilter (keyword regex, budget range, platform set). Compiled
+# filters are kept in a size-bounded LRU cache, invalidated when the user saves
+# a new config and expired after APPLIER_CONFIG_CACHE_TTL_SECONDS so that
+# saves handled by other worker processes are picked up too.
+
+AUTO_APPLIER_PLATFORM = "auto_applier"  # Bot.platform of every auto-applier bot; they never scrape
+
+DEFAULT_CONFIG = {
+    "keywords": ["React", "Python", "Web Development"],
+    "min_budget": 100.0,
+    "max_budget": 5000.0,
+    "platforms": ["Upwork", "Fiverr", "Freelancer"],
+    "auto_apply": True,
+    "custom_proposal_template": None
+}
+
+
+def auto_applier_bot_name(user_id: int) -> str:
+    return f"auto_applier_{user_id}"
+
+
+def get_auto_applier_bot(db: Session, user_id: int):
+    return db.query(Bot).filter(Bot.name == auto_applier_bot_name(user_id)).first()
+
+
+def application_totals(db: Session, user_id: int) -> tuple:
+    """(count, sum of bid amounts) of a user's applications in one aggregate query"""
+    count, bid_total = db.query(
+        func.count(JobApplication.id),
+        func.coalesce(func.sum(JobApplication.bid_amount), 0.0),
+    ).filter(JobApplication.user_id == user_id).one()
+    return count, float(bid_total)
+
+
+def applier_user_id(bot) -> Optional[int]:
+    """Owner of an auto-applier bot: "user_id" in its config, else the id its name ends in"""
+    try:
+        config = json.loads(bot.config) if bot.config else {}
+    except ValueError:
+        config = {}
+    user_id = config.get("user_id") if isinstance(config, dict) else None
+    if isinstance(user_id, int):
+        return user_id
+    suffix = (bot.name or "").rsplit("_", 1)[-1]
+    return int(suffix) if suffix.isdigit() else None
+
+
+def init_application_counters(db: Session, bot: Bot):
+    """Seed a new auto-applier bot's counters from the user's existing applications"""
+    user_id = applier_user_id(bot)
+    bot.jobs_applied, bot.total_bid_amount = application_totals(db, user_id)
+
+
+def record_applications(db: Session, user_id: int, count: int, bid_total: float):
+    """Add new applications to the user's auto-applier counters (no-op without a bot)"""
+    db.execute(
+        update(Bot)
+        .where(Bot.name == auto_applier_bot_name(user_id))
+        .values(
+            jobs_applied=Bot.jobs_applied + count,
+            total_bid_amount=func.coalesce(Bot.total_bid_amount, 0.0) + bid_total,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+BID_DISCOUNT = 0.9  # Auto-applications bid 10% under budget
+
+
+class ApplierFilter:
+    """A user's auto-applier config, parsed and compiled for repeated job checks"""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.keywords = [keyword.strip() for keyword in config.get("keywords") or [] if keyword.strip()]
+        # One alternation over every keyword phrase; "Web Development" also matches "web  development"
+        phrases = [r"\s+".join(map(re.escape, keyword.split())) for keyword in self.keywords]
+        self.keyword_pattern = re.compile(r"\b(?:" + "|".join(phrases) + r")\b", re.IGNORECASE) if phrases else None
+        self.terms = list(dict.fromkeys(token for keyword in self.keywords for token in tokenize(keyword)))
+        self.min_budget: Optional[float] = config.get("min_budget")
+        self.max_budget: Optional[float] = config.get("max_budget")
+        self.platforms = frozenset(platform.lower() for platform in config.get("platforms") or [])
+        self.auto_apply: bool = config.get("auto_apply", True)
+        self.proposal_template: Optional[str] = config.get("custom_proposal_template")
+
+    def matches(self, title=None, description=None, tags=None, budget=None, platform=None) -> bool:
+        if budget is not None:
+            if self.min_budget is not None and budget < self.min_budget:
+                return False
+            if self.max_budget is not None and budget > self.max_budget:
+                return False
+        if self.platforms and (platform or "").lower() not in self.platforms:
+            return False
+        if self.keyword_pattern is None:
+            return True
+        return any(
+            text and self.keyword_pattern.search(text)
+            for text in (title, tags, description)
+        )
+
+    def draft_application(self, job_title: str, budget: Optional[float]) -> tuple:
+        """(proposal, bid_amount) for an auto-application (mock AI proposal unless templated)"""
+        proposal = self.proposal_template or (
+            f"I'm interested in your project '{job_title}'. I have relevant experience and "
+            "can deliver high-quality results within your budget and timeline."
+        )
+        return proposal, (budget or 0.0) * BID_DISCOUNT
+
+
+class _FilterCache:
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # user_id -> (expires_at, ApplierFilter)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[ApplierFilter]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id: int, applier_filter: ApplierFilter):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, applier_filter)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+filter_cache = _FilterCache(settings.APPLIER_CONFIG_CACHE_SIZE, settings.APPLIER_CONFIG_CACHE_TTL_SECONDS)
+
+
+def get_applier_filter(db: Session, user_id: int) -> ApplierFilter:
+    """The user's compiled auto-applier config (defaults if never configured)"""
+    applier_filter = filter_cache.get(user_id)
+    if applier_filter is None:
+        row = db.query(AutoApplierConfig).filter(AutoApplierConfig.user_id == user_id).first()
+        applier_filter = ApplierFilter(json.loads(row.config) if row else dict(DEFAULT_CONFIG))
+        filter_cache.put(user_id, applier_filter)
+    return applier_filter
+
+
+def save_applier_config(db: Session, user_id: int, config: dict) -> ApplierFilter:
+    row = db.query(AutoApplierConfig).filter(AutoApplierConfig.user_id == user_id).first()
+    if row is None:
+        row = AutoApplierConfig(user_id=user_id)
+        db.add(row)
+    row.config = json.dumps(config)
+    db.commit()
+    filter_cache.invalidate(user_id)
+    return get_applier_filter(db, user_id)
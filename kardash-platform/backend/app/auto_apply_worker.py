@@ -0,0 +1,376 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import Select, case, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import insert_ignore_duplicates
+from .models import AutoApplyTask, Bot, BotStatus, Job, JobApplication, JobStatus
+from .applier import (
+    AUTO_APPLIER_PLATFORM, applier_user_id, auto_applier_bot_name, get_applier_filter, record_applications
+)
+
+logger = logging.getLogger(__name__)
+
+# Background auto-apply engine.
+#
+# Every open job gets one AutoApplyTask row, queued in the transaction that
+# creates the job (enqueue_jobs); a sweep over recently created jobs catches
+# any inserted by other means. Workers claim batches of pending tasks with a
+# single UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) that
+# stamps a random claim token, so any number of workers in any number of
+# processes split the queue without blocking each other (SQLite ignores the
+# row lock; its database-level write lock serializes claims instead). A
+# claimed batch is matched against every active auto-applier's compiled
+# filter, and the JobApplications, bot counters and task completion are
+# committed in one transaction. Completion only counts if the claim token is
+# still ours, so a task reclaimed after AUTO_APPLY_LOCK_TIMEOUT_SECONDS is
+# never applied twice.
+#
+# Workers start with the API (AUTO_APPLY_WORKERS per process, 0 disables) or
+# run on their own:
+#
+#     python -m app.auto_apply_worker
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+ENQUEUE_BATCH = 1000
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(AutoApplyTask)
+    if dialect == "sqlite":
+        return sqlite.insert(AutoApplyTask)
+    return None
+
+
+def _insert_tasks(db: Session, job_ids: Select):
+    statement = _insert(db)
+    if statement is None:
+        statement = insert(AutoApplyTask)
+    else:
+        # Another worker or write path may queue the same job
+        statement = statement.on_conflict_do_nothing(index_elements=["job_id"])
+    return db.execute(statement.from_select(["job_id"], job_ids))
+
+
+def enqueue_jobs(db: Session, job_ids):
+    """Queue the open jobs among `job_ids` (ids, or a SELECT of them), inside the caller's transaction"""
+    if not isinstance(job_ids, Select):
+        job_ids = list(job_ids)
+        if not job_ids:
+            return
+    _insert_tasks(db, select(Job.id).where(Job.id.in_(job_ids), Job.status == JobStatus.OPEN))
+
+
+def enqueue_new_jobs(db: Session, limit: int = ENQUEUE_BATCH) -> int:
+    """Queue recent open jobs that have no task yet; returns the number queued
+
+    Job writes queue their own tasks (enqueue_jobs); this sweep only catches
+    jobs inserted some other way. It looks back AUTO_APPLY_ENQUEUE_WINDOW_SECONDS
+    by created_at rather than above an id watermark, since ids are assigned
+    before commit and a job can become visible after one with a higher id.
+    """
+    window_start = _utcnow() - timedelta(seconds=settings.AUTO_APPLY_ENQUEUE_WINDOW_SECONDS)
+    queued = select(AutoApplyTask.id).where(AutoApplyTask.job_id == Job.id)
+    new_jobs = (
+        select(Job.id)
+        .where(Job.status == JobStatus.OPEN, Job.created_at >= window_start, ~queued.exists())
+        .order_by(Job.id)
+        .limit(limit)
+    )
+    result = _insert_tasks(db, new_jobs)
+    db.commit()
+    return max(result.rowcount, 0)
+
+
+def requeue_job(db: Session, job_id: int):
+    """Put a (re)opened job back on the queue, inside the caller's transaction"""
+    reset = dict(status=PENDING, attempts=0, locked_by=None, locked_at=None, last_error=None)
+    statement = _insert(db)
+    if statement is not None:
+        db.execute(
+            statement.values(job_id=job_id, **reset).on_conflict_do_update(index_elements=["job_id"], set_=reset)
+        )
+        return
+    result = db.execute(update(AutoApplyTask).where(AutoApplyTask.job_id == job_id).values(**reset))
+    if result.rowcount == 0:
+        db.execute(insert(AutoApplyTask).values(job_id=job_id, **reset))
+
+
+def claim_batch(db: Session, batch_size: int) -> tuple:
+    """Claim up to `batch_size` tasks; returns (claim token, job ids)"""
+    token = uuid.uuid4().hex
+    now = _utcnow()
+    stale = now - timedelta(seconds=settings.AUTO_APPLY_LOCK_TIMEOUT_SECONDS)
+    claimable = (
+        select(AutoApplyTask.id)
+        .where(or_(
+            AutoApplyTask.status == PENDING,
+            # Held by a worker that died mid-batch
+            (AutoApplyTask.status == PROCESSING) & (AutoApplyTask.locked_at < stale),
+        ))
+        .order_by(AutoApplyTask.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    db.execute(
+        update(AutoApplyTask)
+        .where(AutoApplyTask.id.in_(claimable.scalar_subquery()))
+        .values(status=PROCESSING, locked_by=token, locked_at=now, attempts=AutoApplyTask.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    job_ids = [row.job_id for row in db.query(AutoApplyTask.job_id).filter(AutoApplyTask.locked_by == token)]
+    return token, job_ids
+
+
+def _active_appliers(db: Session) -> Dict[int, object]:
+    """user_id -> ApplierFilter for every running auto-applier with auto_apply on"""
+    bots = db.query(Bot.name, Bot.config).filter(
+        Bot.platform == AUTO_APPLIER_PLATFORM, Bot.status == BotStatus.ACTIVE
+    )
+    appliers = {}
+    for bot in bots:
+        user_id = applier_user_id(bot)
+        if user_id is None:
+            logger.warning("Auto-applier bot %r has no owner; skipping it", bot.name)
+            continue
+        applier_filter = get_applier_filter(db, user_id)
+        if applier_filter.auto_apply:
+            appliers[user_id] = applier_filter
+    return appliers
+
+
+def process_batch(db: Session, token: str, job_ids: List[int]) -> tuple:
+    """Apply every active auto-applier to the claimed jobs; returns (jobs, applications)"""
+    jobs = db.query(
+        Job.id, Job.title, Job.description, Job.tags, Job.budget, Job.platform, Job.user_id
+    ).filter(Job.id.in_(job_ids), Job.status == JobStatus.OPEN).all()
+    appliers = _active_appliers(db) if jobs else {}
+
+    existing = set()
+    if jobs and appliers:
+        existing = set(db.query(JobApplication.job_id, JobApplication.user_id).filter(
+            JobApplication.job_id.in_([job.id for job in jobs]),
+            JobApplication.user_id.in_(list(appliers)),
+        ))
+
+    applications = []
+    found: Dict[int, int] = {}
+    for user_id, applier_filter in appliers.items():
+        for job in jobs:
+            if job.user_id == user_id:
+                continue
+            if not applier_filter.matches(job.title, job.description, job.tags, job.budget, job.platform):
+                continue
+            found[user_id] = found.get(user_id, 0) + 1
+            if (job.id, user_id) in existing:
+                continue
+            proposal, bid_amount = applier_filter.draft_application(job.title, job.budget)
+            applications.append(
+                {"job_id": job.id, "user_id": user_id, "proposal": proposal, "bid_amount": bid_amount, "status": "pending"}
+            )
+
+    # Manual applications racing with this batch are skipped by the (job_id, user_id) constraint
+    inserted = insert_ignore_duplicates(db, JobApplication, applications, ["job_id", "user_id"])
+    applications = [a for a in applications if (a["job_id"], a["user_id"]) in inserted]
+    now = _utcnow()
+    applied: Dict[int, list] = {}
+    for application in applications:
+        totals = applied.setdefault(application["user_id"], [0, 0.0])
+        totals[0] += 1
+        totals[1] += application["bid_amount"]
+    for user_id, count in found.items():
+        db.execute(
+            update(Bot)
+            .where(Bot.name == auto_applier_bot_name(user_id))
+            .values(jobs_scraped=func.coalesce(Bot.jobs_scraped, 0) + count, last_active=now)
+            .execution_options(synchronize_session=False)
+        )
+    for user_id, (count, bid_total) in applied.items():
+        record_applications(db, user_id, count, bid_total)
+
+    completed = db.execute(
+        update(AutoApplyTask)
+        .where(AutoApplyTask.locked_by == token, AutoApplyTask.status == PROCESSING)
+        .values(status=DONE, processed_at=now, locked_by=None, last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    if completed.rowcount != len(job_ids):
+        # Part of the batch was reclaimed as stale by another worker: let it redo the work
+        db.rollback()
+        logger.warning("Auto-apply batch %s lost its claim; discarding results", token)
+        return 0, 0
+    db.commit()
+    return len(job_ids), len(applications)
+
+
+def release_batch(db: Session, token: str, error: str):
+    """Hand a failed batch back to the queue, giving up on tasks out of attempts"""
+    db.rollback()
+    db.execute(
+        update(AutoApplyTask)
+        .where(AutoApplyTask.locked_by == token)
+        .values(
+            status=case((AutoApplyTask.attempts >= settings.AUTO_APPLY_MAX_ATTEMPTS, FAILED), else_=PENDING),
+            locked_by=None,
+            locked_at=None,
+            last_error=error[:1000],
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def queue_depth(db: Session) -> Dict[str, int]:
+    counts = dict(db.query(AutoApplyTask.status, func.count()).group_by(AutoApplyTask.status).all())
+    return {status: counts.get(status, 0) for status in (PENDING, PROCESSING, DONE, FAILED)}
+
+
+class WorkerMetrics:
+    """Throughput counters for the workers of this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.monotonic()
+            self.batches = 0
+            self.jobs_processed = 0
+            self.applications_created = 0
+            self.errors = 0
+            self.busy_seconds = 0.0
+            self.last_batch_at = None
+
+    def record_batch(self, jobs: int, applications: int, seconds: float):
+        with self._lock:
+            self.batches += 1
+            self.jobs_processed += jobs
+            self.applications_created += applications
+            self.busy_seconds += seconds
+            self.last_batch_at = _utcnow()
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            uptime = time.monotonic() - self.started_at
+            return {
+                "uptime_seconds": round(uptime, 1),
+                "batches": self.batches,
+                "jobs_processed": self.jobs_processed,
+                "applications_created": self.applications_created,
+                "errors": self.errors,
+                "jobs_per_second": round(self.jobs_processed / uptime, 3) if uptime else 0.0,
+                # Rate while actually working, i.e. what the pool sustains under backlog
+                "busy_jobs_per_second": round(self.jobs_processed / self.busy_seconds, 3) if self.busy_seconds else 0.0,
+                "last_batch_at": self.last_batch_at,
+            }
+
+
+metrics = WorkerMetrics()
+
+
+def run_once(session_factory, batch_size: int) -> int:
+    """Queue new jobs, then claim and process one batch; returns the number of jobs handled"""
+    db = session_factory()
+    token = None
+    try:
+        enqueue_new_jobs(db)
+        token, job_ids = claim_batch(db, batch_size)
+        if not job_ids:
+            return 0
+        started = time.perf_counter()
+        jobs, applications = process_batch(db, token, job_ids)
+        metrics.record_batch(jobs, applications, time.perf_counter() - started)
+        return len(job_ids)
+    except Exception as exc:
+        metrics.record_error()
+        logger.exception("Auto-apply batch failed")
+        if token is not None:
+            release_batch(db, token, repr(exc))
+        return 0
+    finally:
+        db.close()
+
+
+class WorkerPool:
+    """`size` asyncio workers, each running blocking batches in a thread"""
+
+    def __init__(self, session_factory, size: int, batch_size: int, poll_seconds: float):
+        self.session_factory = session_factory
+        self.size = size
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def _work(self):
+        while True:
+            handled = await asyncio.to_thread(run_once, self.session_factory, self.batch_size)
+            if handled == 0:
+                await asyncio.sleep(self.poll_seconds)
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.size)]
+
+    async def wait(self):
+        await asyncio.gather(*self._tasks)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+pool = WorkerPool(None, 0, 0, 0)
+
+
+def start_pool(session_factory) -> WorkerPool:
+    global pool
+    pool = WorkerPool(
+        session_factory,
+        settings.AUTO_APPLY_WORKERS,
+        settings.AUTO_APPLY_BATCH_SIZE,
+        settings.AUTO_APPLY_POLL_SECONDS,
+    )
+    pool.start()
+    return pool
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal, create_db_and_tables
+
+    logging.basicConfig(level=logging.INFO)
+
+    async def main():
+        create_db_and_tables()
+        start_pool(SessionLocal)
+        logger.info("Auto-apply worker pool running with %d workers", pool.size)
+        await pool.wait()
+
+    asyncio.run(main())
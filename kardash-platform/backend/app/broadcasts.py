@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import false, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from . import unread_counters
+from .config import settings
+from .models import Notification, User
+from .notification_hub import hub, publish_notifications
+
+logger = logging.getLogger(__name__)
+
+# Set-based notification fan-out.
+#
+# insert_notifications() writes caller-supplied rows (POST /notifications/admin/bulk)
+# as chunked Core executemany batches instead of ORM unit-of-work objects.
+#
+# A broadcast (POST /notifications/admin/broadcast) never lists its
+# recipients in Python. Each chunk of NOTIFICATION_BROADCAST_CHUNK_SIZE users
+# is one INSERT ... SELECT FROM users plus a set-based unread counter update,
+# committed together. Broadcasts run in the background. Their progress is
+# kept in this process (the last MAX_TRACKED of them) and reported by
+# GET /notifications/admin/broadcasts/{id}.
+
+TARGETS = ("all", "role", "user_ids")
+EXECUTEMANY_CHUNK = 1000
+MAX_TRACKED = 100
+_COLUMNS = (Notification.id, Notification.user_id, Notification.type, Notification.message,
+            Notification.time, Notification.is_read)
+
+
+def _returning(db: Session, many: bool = False) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.insert_executemany_returning if many else dialect.insert_returning
+
+
+def insert_notifications(db: Session, rows: List[dict]) -> list:
+    """Insert {user_id, type, message} rows in executemany chunks, inside the caller's transaction
+
+    Returns the inserted rows (id, user_id, type, message, time, is_read) where the
+    database can report them, for publishing after commit.
+    """
+    inserted = []
+    returning = _returning(db, many=True)
+    for start in range(0, len(rows), EXECUTEMANY_CHUNK):
+        chunk = [dict(row, is_read=False) for row in rows[start:start + EXECUTEMANY_CHUNK]]
+        if returning:
+            inserted.extend(db.execute(insert(Notification).returning(*_COLUMNS), chunk).all())
+        else:
+            db.execute(insert(Notification), chunk)
+    unread_counters.adjust(db, Counter(row["user_id"] for row in rows))
+    return inserted
+
+
+def _recipient_chunks(db: Session, target: str, role, user_ids: Optional[List[int]], chunk_size: int):
+    """SELECTs of active user ids, one per transaction-sized chunk"""
+    recipients = select(User.id).where(User.is_active == True)
+    if target == "role":
+        recipients = recipients.where(User.role == role)
+    if target == "user_ids":
+        ids = sorted(set(user_ids or ()))
+        for start in range(0, len(ids), chunk_size):
+            yield recipients.where(User.id.in_(ids[start:start + chunk_size]))
+        return
+    low, high = db.query(func.min(User.id), func.max(User.id)).one()
+    if low is None:
+        return
+    # Ranges over the primary key: cheap to compute and each one is an index range scan
+    for start in range(low, high + 1, chunk_size):
+        yield recipients.where(User.id >= start, User.id < start + chunk_size)
+
+
+def fan_out(db: Session, recipients, notification_type: str, message: str) -> int:
+    """One notification per user id in the `recipients` SELECT; commits, returns rows inserted"""
+    recipient = recipients.subquery()
+    rows = select(recipient.c.id, literal(notification_type), literal(message), false())
+    statement = insert(Notification).from_select(["user_id", "type", "message", "is_read"], rows)
+    # Only fetch the new rows back when someone is listening on a stream
+    publish = hub.has_listeners() and _returning(db)
+    if publish:
+        result = db.execute(statement.returning(*_COLUMNS))
+        inserted = result.all()
+        count = len(inserted)
+    else:
+        count = max(db.execute(statement).rowcount, 0)
+    unread_counters.increment_selected(db, recipients)
+    db.commit()
+    if publish:
+        publish_notifications(row for row in inserted if hub.has_listeners(row.user_id))
+    return count
+
+
+class Broadcast:
+    def __init__(self, target: str):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.target = target
+        self.rows = 0
+        self.seconds = None
+        self.rows_per_second = None
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at = None
+        self.error = None
+
+
+_broadcasts = OrderedDict()  # id -> Broadcast
+_lock = threading.Lock()
+
+
+def create(target: str) -> Broadcast:
+    broadcast = Broadcast(target)
+    with _lock:
+        _broadcasts[broadcast.id] = broadcast
+        while len(_broadcasts) > MAX_TRACKED:
+            _broadcasts.popitem(last=False)
+    return broadcast
+
+
+def get(broadcast_id: str) -> Optional[Broadcast]:
+    with _lock:
+        return _broadcasts.get(broadcast_id)
+
+
+def recent() -> List[Broadcast]:
+    with _lock:
+        return list(reversed(_broadcasts.values()))
+
+
+def run(session_factory, broadcast: Broadcast, notification_type: str, message: str,
+        role=None, user_ids: Optional[List[int]] = None, chunk_size: Optional[int] = None):
+    """Deliver a broadcast chunk by chunk (meant for a background task)"""
+    chunk_size = chunk_size or settings.NOTIFICATION_BROADCAST_CHUNK_SIZE
+    broadcast.status = "running"
+    started = time.perf_counter()
+    db = session_factory()
+    try:
+        for recipients in _recipient_chunks(db, broadcast.target, role, user_ids, chunk_size):
+            broadcast.rows += fan_out(db, recipients, notification_type, message)
+        broadcast.status = "completed"
+    except Exception as exc:
+        # Chunks already committed stay delivered; `rows` says how far it got
+        db.rollback()
+        broadcast.status = "failed"
+        broadcast.error = repr(exc)
+        logger.exception("Notification broadcast %s failed", broadcast.id)
+    finally:
+        db.close()
+        broadcast.seconds = round(time.perf_counter() - started, 3)
+        broadcast.rows_per_second = round(broadcast.rows / broadcast.seconds, 1) if broadcast.seconds else None
+        broadcast.finished_at = datetime.now(timezone.utc)
@@ -0,0 +1,111 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+
+# Conditional GET (ETag / Last-Modified) for polled resources.
+#
+# A single row is versioned by (id, updated_at); a list by the count and the
+# latest updated_at of the rows its filters select (before paging), so any
+# insert, update or delete in the set changes the fingerprint. Routes compute
+# validators with a narrow query and answer If-None-Match / If-Modified-Since
+# with a bodiless 304 before loading ORM objects or running Pydantic.
+#
+# updated_at is only set by the first UPDATE, so rows never touched fall back
+# to created_at. Timestamps come from the database clock: SQLite's has
+# one-second resolution, PostgreSQL's microseconds.
+
+ETAG_HEADER = "ETag"
+LAST_MODIFIED_HEADER = "Last-Modified"
+VALIDATOR_HEADERS = (ETAG_HEADER, LAST_MODIFIED_HEADER, "Cache-Control")
+
+Validators = Tuple[str, Optional[datetime]]
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    # SQLite hands back naive UTC timestamps
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    # Weak: equal tags mean the same data, not byte-identical JSON
+    return f'W/"{digest}"'
+
+
+def row_validators(row) -> Validators:
+    """Validators for one row; `row` is an ORM object or a (id, updated_at, created_at) result"""
+    modified = _as_utc(row.updated_at or row.created_at)
+    return _etag(row.id, modified.isoformat() if modified else ""), modified
+
+
+def list_validators(query: Query, model) -> Validators:
+    """Validators for every row `query` selects: count + max(updated_at)"""
+    count, modified = query.order_by(None).with_entities(
+        func.count(model.id), func.max(func.coalesce(model.updated_at, model.created_at))
+    ).one()
+    if isinstance(modified, str):
+        # max() over SQLite timestamps loses the column type and comes back as text
+        modified = datetime.fromisoformat(modified)
+    modified = _as_utc(modified)
+    return _etag("list", count, modified.isoformat() if modified else ""), modified
+
+
+def has_preconditions(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is present (RFC 9110 13.1.3)
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = _as_utc(parsedate_to_datetime(if_modified_since))
+    except (TypeError, ValueError):
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime] = None):
+    response.headers[ETAG_HEADER] = etag
+    if last_modified is not None:
+        response.headers[LAST_MODIFIED_HEADER] = format_datetime(last_modified, usegmt=True)
+    # Have browsers revalidate every time instead of guessing a freshness lifetime from Last-Modified
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+def not_modified(etag: str, last_modified: Optional[datetime] = None) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
+
+
+def check(request: Request, etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """A 304 response when the client's copy is current, else None"""
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    return None
+
+
+def check_cached(request: Request, cached: Response) -> Response:
+    """A cached 200 response, or a 304 when it carries the client's ETag"""
+    etag = cached.headers.get(ETAG_HEADER)
+    if etag is not None and is_not_modified(request, etag):
+        headers = {name: cached.headers[name] for name in VALIDATOR_HEADERS if name in cached.headers}
+        return Response(status_code=304, headers=headers)
+    return cached
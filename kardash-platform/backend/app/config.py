@@ -5,8 +5,65 @@ load_dotenv()
 
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))  # Per worker process
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 30))  # Seconds to wait for a connection
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))  # Seconds; -1 never recycles
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 0))  # PostgreSQL only; 0 = none
+    # Comma-separated read replica URLs for get_read_db; empty = read from the primary
+    DATABASE_REPLICA_URLS: list = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    REPLICA_RETRY_SECONDS: int = int(os.getenv("REPLICA_RETRY_SECONDS", 30))  # Skip a failed replica this long
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))  # Reads stay on the primary after a write
+    DATABASE_ASYNC: bool = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = os.getenv("ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+    DASHBOARD_STATS_RECONCILE_SECONDS: int = int(os.getenv("DASHBOARD_STATS_RECONCILE_SECONDS", 300))
+    MATCHING_INDEX_REBUILD_SECONDS: int = int(os.getenv("MATCHING_INDEX_REBUILD_SECONDS", 1800))
+    MATCHING_INDEX_SYNC_SECONDS: int = int(os.getenv("MATCHING_INDEX_SYNC_SECONDS", 30))  # 0 disables the background refresh
+    MATCHING_INDEX_SYNC_OVERLAP_SECONDS: int = int(os.getenv("MATCHING_INDEX_SYNC_OVERLAP_SECONDS", 300))  # Longer than any job write transaction
+    APPLIER_CONFIG_CACHE_SIZE: int = int(os.getenv("APPLIER_CONFIG_CACHE_SIZE", 4096))
+    APPLIER_CONFIG_CACHE_TTL_SECONDS: int = int(os.getenv("APPLIER_CONFIG_CACHE_TTL_SECONDS", 60))
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 1))  # API worker processes (uvicorn/gunicorn --workers)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", 0))  # Per API process; 0 = CPUs / WEB_CONCURRENCY
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+    AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+    AUTH_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_CACHE_TTL_SECONDS", 30))
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", 2048))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 30))  # 0 disables
+    RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "")  # "" = per-process only, "memory" = shared stand-in
+    UNREAD_COUNT_CACHE_SIZE: int = int(os.getenv("UNREAD_COUNT_CACHE_SIZE", 10000))
+    UNREAD_COUNT_CACHE_TTL_SECONDS: int = int(os.getenv("UNREAD_COUNT_CACHE_TTL_SECONDS", 10))
+    UNREAD_COUNT_REPAIR_SECONDS: int = int(os.getenv("UNREAD_COUNT_REPAIR_SECONDS", 3600))  # 0 disables
+    NOTIFICATION_BROADCAST_CHUNK_SIZE: int = int(os.getenv("NOTIFICATION_BROADCAST_CHUNK_SIZE", 5000))  # Users per transaction
+    NOTIFICATION_RETENTION_DAYS: int = int(os.getenv("NOTIFICATION_RETENTION_DAYS", 90))  # Read notifications older than this are archived
+    NOTIFICATION_RETENTION_INTERVAL_SECONDS: int = int(os.getenv("NOTIFICATION_RETENTION_INTERVAL_SECONDS", 3600))  # 0 disables
+    NOTIFICATION_RETENTION_BATCH_SIZE: int = int(os.getenv("NOTIFICATION_RETENTION_BATCH_SIZE", 1000))
+    NOTIFICATION_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("NOTIFICATION_STREAM_HEARTBEAT_SECONDS", 15))
+    NOTIFICATION_STREAM_MAX_SECONDS: float = float(os.getenv("NOTIFICATION_STREAM_MAX_SECONDS", 300))  # Clients reconnect after this
+    NOTIFICATION_STREAM_QUEUE_SIZE: int = int(os.getenv("NOTIFICATION_STREAM_QUEUE_SIZE", 100))  # Per connection
+    ACTIVITY_LOG_BATCH_SIZE: int = int(os.getenv("ACTIVITY_LOG_BATCH_SIZE", 500))
+    ACTIVITY_LOG_FLUSH_SECONDS: float = float(os.getenv("ACTIVITY_LOG_FLUSH_SECONDS", 1))
+    ACTIVITY_LOG_MAX_QUEUE: int = int(os.getenv("ACTIVITY_LOG_MAX_QUEUE", 10000))
+    ACTIVITY_LOG_BLOCK_SECONDS: float = float(os.getenv("ACTIVITY_LOG_BLOCK_SECONDS", 1))  # Producer wait when full, then drop
+    BOT_ACTIVITY_RETENTION_DAYS: int = int(os.getenv("BOT_ACTIVITY_RETENTION_DAYS", 30))  # Raw rows; rollups are kept
+    BOT_ACTIVITY_HOURLY_ROLLUP_DAYS: int = int(os.getenv("BOT_ACTIVITY_HOURLY_ROLLUP_DAYS", 90))  # Daily rollups are kept
+    BOT_ACTIVITY_MAINTENANCE_SECONDS: int = int(os.getenv("BOT_ACTIVITY_MAINTENANCE_SECONDS", 3600))  # 0 disables
+    BOT_SUCCESS_RATE_WINDOW_DAYS: int = int(os.getenv("BOT_SUCCESS_RATE_WINDOW_DAYS", 30))
+    SCRAPER_PLATFORM_CONCURRENCY: int = int(os.getenv("SCRAPER_PLATFORM_CONCURRENCY", 4))  # Page fetches in flight per platform
+    SCRAPER_ACCOUNT_REQUESTS_PER_MINUTE: float = float(os.getenv("SCRAPER_ACCOUNT_REQUESTS_PER_MINUTE", 60))  # 0 = unlimited
+    SCRAPER_ACCOUNT_BURST: int = int(os.getenv("SCRAPER_ACCOUNT_BURST", 5))
+    SCRAPER_MAX_PAGES: int = int(os.getenv("SCRAPER_MAX_PAGES", 50))  # Per bot per run
+    SCRAPER_UPSERT_BATCH_SIZE: int = int(os.getenv("SCRAPER_UPSERT_BATCH_SIZE", 500))
+    SCRAPER_QUEUE_SIZE: int = int(os.getenv("SCRAPER_QUEUE_SIZE", 100))  # Pages waiting to be upserted
+    SCRAPER_INTERVAL_SECONDS: int = int(os.getenv("SCRAPER_INTERVAL_SECONDS", 0))  # 0 disables the periodic run
+    AUTO_APPLY_WORKERS: int = int(os.getenv("AUTO_APPLY_WORKERS", 2))  # Per process; 0 disables
+    AUTO_APPLY_BATCH_SIZE: int = int(os.getenv("AUTO_APPLY_BATCH_SIZE", 50))
+    AUTO_APPLY_POLL_SECONDS: float = float(os.getenv("AUTO_APPLY_POLL_SECONDS", 5))
+    AUTO_APPLY_LOCK_TIMEOUT_SECONDS: int = int(os.getenv("AUTO_APPLY_LOCK_TIMEOUT_SECONDS", 300))
+    AUTO_APPLY_MAX_ATTEMPTS: int = int(os.getenv("AUTO_APPLY_MAX_ATTEMPTS", 3))
+    AUTO_APPLY_ENQUEUE_WINDOW_SECONDS: int = int(os.getenv("AUTO_APPLY_ENQUEUE_WINDOW_SECONDS", 3600))  # Sweep look-back
 
 settings = Settings() 
\ No newline at end of file
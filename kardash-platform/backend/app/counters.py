@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+
+from .models import DashboardStats, Job, JobStatus, User
+
+logger = logging.getLogger(__name__)
+
+# Materialized dashboard counters.
+#
+# The DashboardStats row with id STATS_ROW_ID is kept current by the write
+# paths (job create/delete/status change, user registration/deletion, job
+# completion) using relative UPDATEs issued inside the caller's transaction,
+# so the counters commit or roll back together with the change they describe.
+# reconcile_dashboard_stats() recomputes everything from the base tables and
+# runs at startup and periodically to repair any drift. Reads never write:
+# get_dashboard_stats() runs on the read replicas.
+
+STATS_ROW_ID = 1
+COMPUTED_FIELDS = ("total_jobs", "active_jobs", "total_earnings", "monthly_earnings", "earnings_month", "total_users")
+
+
+def _current_month() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+def _month_start() -> datetime:
+    return datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def job_earnings(job: Job) -> float:
+    """Gross amount a completed job contributes to platform earnings"""
+    return float(job.budget or 0)
+
+
+def _apply(db: Session, **values):
+    result = db.execute(
+        update(DashboardStats).where(DashboardStats.id == STATS_ROW_ID).values(**values)
+    )
+    if result.rowcount == 0:
+        # First write on a fresh database: build the row from the base tables.
+        # The pending change is already flushed, so it is included in the counts.
+        db.flush()
+        reconcile_dashboard_stats(db, commit=False)
+
+
+def _open_delta(status: Optional[str]) -> int:
+    return 1 if status == JobStatus.OPEN else 0
+
+
+def job_created(db: Session, job: Job):
+    _apply(
+        db,
+        total_jobs=DashboardStats.total_jobs + 1,
+        active_jobs=DashboardStats.active_jobs + _open_delta(job.status),
+    )
+
+
+def jobs_created(db: Session, count: int, open_count: int):
+    """Several jobs inserted at once (a scrape batch)"""
+    if count:
+        _apply(
+            db,
+            total_jobs=DashboardStats.total_jobs + count,
+            active_jobs=DashboardStats.active_jobs + open_count,
+        )
+
+
+def job_deleted(db: Session, job: Job):
+    values = {
+        "total_jobs": DashboardStats.total_jobs - 1,
+        "active_jobs": DashboardStats.active_jobs - _open_delta(job.status),
+    }
+    if job.status == JobStatus.COMPLETED:
+        # Earnings are derived from completed jobs, so deleting one removes its budget
+        amount = job_earnings(job)
+        values["total_earnings"] = DashboardStats.total_earnings - amount
+        if job.completed_at and job.completed_at.strftime("%Y-%m") == _current_month():
+            values["monthly_earnings"] = case(
+                (DashboardStats.earnings_month == _current_month(), DashboardStats.monthly_earnings - amount),
+                else_=DashboardStats.monthly_earnings,
+            )
+    _apply(db, **values)
+
+
+def job_status_changed(db: Session, old_status: Optional[str], new_status: Optional[str]):
+    delta = _open_delta(new_status) - _open_delta(old_status)
+    if delta:
+        _apply(db, active_jobs=DashboardStats.active_jobs + delta)
+
+
+def job_completed(db: Session, job: Job):
+    amount = job_earnings(job)
+    month = _current_month()
+    _apply(
+        db,
+        total_earnings=DashboardStats.total_earnings + amount,
+        monthly_earnings=case(
+            (DashboardStats.earnings_month == month, DashboardStats.monthly_earnings + amount),
+            else_=amount,
+        ),
+        earnings_month=month,
+    )
+
+
+def user_created(db: Session):
+    _apply(db, total_users=DashboardStats.total_users + 1)
+
+
+def user_deleted(db: Session):
+    _apply(db, total_users=DashboardStats.total_users - 1)
+
+
+def get_dashboard_stats(db: Session) -> DashboardStats:
+    """Primary-key read of the counter row
+
+    Read-only, so it is safe on a replica session: until the primary has
+    created the row (at startup, or on the first counted write) the counters
+    are computed from the base tables and returned without being saved.
+    """
+    stats = db.get(DashboardStats, STATS_ROW_ID)
+    if stats is None:
+        stats = compute_dashboard_stats(db)
+    return stats
+
+
+def current_monthly_earnings(stats: DashboardStats) -> float:
+    # The counter belongs to earnings_month; until the first completion of a
+    # new month it still holds last month's figure.
+    if stats.earnings_month != _current_month():
+        return 0.0
+    return stats.monthly_earnings or 0.0
+
+
+def compute_dashboard_stats(db: Session) -> DashboardStats:
+    """Every counter computed from the base tables, as a DashboardStats that isn't added to the session"""
+    earnings = func.coalesce(Job.budget, 0)
+    month_start = _month_start()
+    jobs = db.query(
+        func.count(),
+        func.count().filter(Job.status == JobStatus.OPEN),
+        func.coalesce(func.sum(earnings).filter(Job.status == JobStatus.COMPLETED), 0.0),
+        func.coalesce(
+            func.sum(earnings).filter(Job.status == JobStatus.COMPLETED, Job.completed_at >= month_start),
+            0.0,
+        ),
+    ).one()
+    return DashboardStats(
+        id=STATS_ROW_ID,
+        total_jobs=jobs[0],
+        active_jobs=jobs[1],
+        total_earnings=jobs[2],
+        monthly_earnings=jobs[3],
+        earnings_month=_current_month(),
+        total_users=db.query(func.count(User.id)).scalar(),
+        commission_rate=DashboardStats.commission_rate.default.arg,
+    )
+
+
+def reconcile_dashboard_stats(db: Session, commit: bool = True) -> DashboardStats:
+    """Recompute every counter from the base tables and overwrite the row"""
+    computed = compute_dashboard_stats(db)
+    stats = db.get(DashboardStats, STATS_ROW_ID)
+    if stats is None:
+        stats = computed
+        db.add(stats)
+    else:
+        for field in COMPUTED_FIELDS:
+            setattr(stats, field, getattr(computed, field))
+
+    if commit:
+        db.commit()
+        db.refresh(stats)
+    else:
+        db.flush()
+    return stats
+
+
+async def run_periodic_reconciliation(session_factory, interval_seconds: int):
+    """Background task: reconcile the counter row every `interval_seconds`"""
+    def reconcile_once():
+        db = session_factory()
+        try:
+            reconcile_dashboard_stats(db)
+        finally:
+            db.close()
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(reconcile_once)
+        except Exception:
+            logger.exception("Dashboard stats reconciliation failed")
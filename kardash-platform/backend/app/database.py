@@ -1,25 +1,391 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
+from starlette.concurrency import run_in_threadpool
 from .config import settings
 
-# Use psycopg2-binary for synchronous operations, or asyncpg for async
-# For simplicity with initial setup, we'll use psycopg2-binary for now.
-# If you want full async, you'd use `create_async_engine` from `sqlalchemy.ext.asyncio`
-# and `async_sessionmaker` with `asyncpg`.
+# psycopg2-binary serves synchronous sessions. With DATABASE_ASYNC=true an
+# asyncpg (PostgreSQL) / aiosqlite (SQLite) engine is created as well and
+# `async def` routes get AsyncSessions from get_async_db (see run_db below).
+#
+# Read-only routes take get_read_db / get_async_read_db instead. With
+# DATABASE_REPLICA_URLS set these round-robin over the replicas, skip one for
+# REPLICA_RETRY_SECONDS after it fails to connect, and fall back to the
+# primary. A client whose request committed a write on the primary (keyed by
+# its bearer token) keeps reading from the primary for READ_YOUR_WRITES_SECONDS
+# so it never sees replica lag on its own changes.
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class _PoolWaitStats:
+    """Checkout times of one pool: queueing for a free connection plus opening new ones"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, seconds: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+
+class _TimedPool:
+    """Pool mixin recording how long each checkout waited"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = _PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started, timed_out=False)
+        return connection
+
+
+class TimedQueuePool(_TimedPool, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """create_engine() keyword arguments for the DB_POOL_* / DB_STATEMENT_TIMEOUT_MS settings"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}  # In-memory SQLite keeps SQLAlchemy's single-connection pool
+    options = {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if parsed.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def pool_status(target_engine) -> dict:
+    """Connection counts and checkout wait times of an engine's pool"""
+    pool = target_engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        waits = wait_stats.checkouts + wait_stats.timeouts
+        status.update(
+            checkouts=wait_stats.checkouts,
+            checkout_timeouts=wait_stats.timeouts,
+            avg_wait_ms=round(wait_stats.wait_seconds / waits * 1000, 3) if waits else 0.0,
+            max_wait_ms=round(wait_stats.max_wait_seconds * 1000, 3),
+        )
+    return status
+
+
+class PrimarySession(Session):
+    """Session on the primary; commits that wrote something start read-your-writes stickiness"""
+
+
+class ReplicaSet:
+    """Round-robin over replica engines, skipping any that failed recently"""
+
+    def __init__(self, engines: list, retry_seconds: float):
+        self.engines = engines
+        self.retry_seconds = retry_seconds
+        self._turn = itertools.count()
+        self._down_until = {}
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def candidates(self) -> list:
+        """Healthy replicas, starting from the next one in rotation"""
+        count = len(self.engines)
+        start = next(self._turn)
+        now = time.monotonic()
+        ordered = (self.engines[(start + offset) % count] for offset in range(count))
+        return [engine for engine in ordered if self._down_until.get(id(engine), 0) <= now]
+
+    def mark_down(self, engine):
+        self._down_until[id(engine)] = time.monotonic() + self.retry_seconds
+
+
+_recent_writes = {}  # bearer token -> monotonic time of its last write on the primary
+_recent_writes_lock = threading.Lock()
+
+
+def _bearer_token(request: Request):
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    return token if scheme.lower() == "bearer" and token else None
+
+
+def record_write(token: str):
+    now = time.monotonic()
+    with _recent_writes_lock:
+        _recent_writes[token] = now
+        if len(_recent_writes) > 10_000:
+            cutoff = now - settings.READ_YOUR_WRITES_SECONDS
+            for stale in [key for key, at in _recent_writes.items() if at < cutoff]:
+                del _recent_writes[stale]
+
+
+def wrote_recently(token) -> bool:
+    if token is None:
+        return False
+    at = _recent_writes.get(token)
+    return at is not None and time.monotonic() - at < settings.READ_YOUR_WRITES_SECONDS
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _flushed(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _committed(session):
+    token = session.info.get("token")
+    if session.info.pop("wrote", False) and token:
+        record_write(token)
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _rolled_back(session):
+    session.info.pop("wrote", None)
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=PrimarySession)
+replicas = ReplicaSet(
+    [create_engine(url, **engine_options(url)) for url in settings.DATABASE_REPLICA_URLS],
+    settings.REPLICA_RETRY_SECONDS,
+)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
-def get_db():
+def async_database_url(url: str) -> str:
+    """The async driver URL for a sync DATABASE_URL"""
+    for prefix, async_prefix in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+async_engine = (
+    create_async_engine(
+        async_database_url(SQLALCHEMY_DATABASE_URL),
+        **engine_options(SQLALCHEMY_DATABASE_URL, is_async=True)
+    )
+    if settings.DATABASE_ASYNC else None
+)
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False, sync_session_class=PrimarySession)
+    if async_engine is not None else None
+)
+async_replicas = ReplicaSet(
+    [
+        create_async_engine(async_database_url(url), **engine_options(url, is_async=True))
+        for url in (settings.DATABASE_REPLICA_URLS if settings.DATABASE_ASYNC else [])
+    ],
+    settings.REPLICA_RETRY_SECONDS,
+)
+
+def get_db(request: Request):
     db = SessionLocal()
+    db.info["token"] = _bearer_token(request)
     try:
         yield db
     finally:
         db.close()
 
+def get_read_db(request: Request):
+    """Session for read-only routes: a healthy replica, else the primary"""
+    token = _bearer_token(request)
+    if replicas and not wrote_recently(token):
+        for replica in replicas.candidates():
+            try:
+                connection = replica.connect()
+            except DBAPIError:
+                replicas.mark_down(replica)
+                continue
+            db = ReplicaSessionLocal(bind=connection)
+            try:
+                yield db
+            finally:
+                db.close()
+                connection.close()
+            return
+    yield from get_db(request)
+
+async def get_async_db(request: Request, db: Session = Depends(get_db)):
+    """Session for `async def` routes: an AsyncSession in DATABASE_ASYNC mode, else the request's Session.
+
+    Only touch it through run_db() so the same route works in both modes.
+    The sync Session is opened lazily, so in async mode it costs nothing unless
+    another dependency (e.g. auth on a cache miss) uses it.
+    """
+    if AsyncSessionLocal is None:
+        yield db
+        return
+    async with AsyncSessionLocal() as session:
+        session.sync_session.info["token"] = _bearer_token(request)
+        yield session
+
+async def _async_read_db(request: Request):
+    token = _bearer_token(request)
+    if async_replicas and not wrote_recently(token):
+        for replica in async_replicas.candidates():
+            try:
+                connection = await replica.connect()
+            except DBAPIError:
+                async_replicas.mark_down(replica)
+                continue
+            session = AsyncSession(bind=connection, autoflush=False, expire_on_commit=False)
+            try:
+                yield session
+            finally:
+                await session.close()
+                await connection.close()
+            return
+    async with AsyncSessionLocal() as session:
+        yield session
+
+# Read-only counterpart of get_async_db (in sync mode get_read_db already fits run_db)
+get_async_read_db = _async_read_db if AsyncSessionLocal is not None else get_read_db
+
+async def run_db(db, fn, *args, **kwargs):
+    """Run fn(session, *args) without blocking the event loop.
+
+    fn is ordinary synchronous ORM code. With an AsyncSession it runs on the
+    async driver via run_sync(); with a sync Session it runs in the threadpool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
 # Function to create all tables (for initial setup/migrations)
 def create_db_and_tables():
-    Base.metadata.create_all(engine) 
\ No newline at end of file
+    Base.metadata.create_all(engine)
+    # create_all skips tables that already exist; add indexes introduced since
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+
+@contextmanager
+def count_queries(max_queries=None, bind=None):
+    """Count the SQL statements executed inside the block.
+
+    Guards endpoints against N+1 regressions:
+
+        with count_queries(max_queries=2):
+            client.get("/auto-applier/applications")
+    """
+    counter = SimpleNamespace(count=0, statements=[])
+    target = bind if bind is not None else engine
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.count += 1
+        counter.statements.append(statement)
+
+    event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+    if max_queries is not None and counter.count > max_queries:
+        raise AssertionError(
+            f"Expected at most {max_queries} queries, got {counter.count}:\n" + "\n".join(counter.statements)
+        )
+
+
+def insert_ignore_duplicates(db: Session, model, rows: list, index_elements: list, chunk_size: int = 500) -> set:
+    """Multi-row INSERT that skips rows clashing with the unique index on `index_elements`.
+
+    Returns the `index_elements` tuples that were actually inserted, so callers
+    can tell new rows from ones another transaction got to first.
+    """
+    if not rows:
+        return set()
+    dialect = db.get_bind().dialect.name
+    key_columns = [getattr(model, name) for name in index_elements]
+    if dialect in ("postgresql", "sqlite"):
+        from sqlalchemy.dialects import postgresql, sqlite
+
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        table = model.__table__
+        statement = (
+            dialect_insert(table)
+            .on_conflict_do_nothing(index_elements=index_elements)
+            .returning(*(table.c[name] for name in index_elements))
+        )
+        inserted = set()
+        # One cached statement, sent as multi-row VALUES batches by the driver-level
+        # executemany; chunked to stay under the bind parameter limit (32766 on SQLite)
+        for start in range(0, len(rows), chunk_size):
+            inserted.update(tuple(row) for row in db.execute(statement, rows[start:start + chunk_size]))
+        return inserted
+
+    from sqlalchemy import insert
+    from sqlalchemy.exc import IntegrityError
+
+    inserted = set()
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(model).values(**row))
+        except IntegrityError:
+            continue
+        inserted.add(tuple(row[name] for name in index_elements))
+    return inserted
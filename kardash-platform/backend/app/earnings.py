@@ -0,0 +1,176 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Tuple
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import EarningsRollup, Job, JobStatus
+from .schemas import EarningsChart, EarningsOverview
+
+# Time-bucketed earnings rollups.
+#
+# Every completed job adds its budget and commission to one daily, one weekly
+# and one monthly EarningsRollup row (UTC buckets). Charts and the earnings
+# overview read a handful of rows from the (period, bucket_start) unique index
+# instead of scanning completed jobs. backfill() rebuilds all rows from jobs:
+#
+#     python -m app.earnings backfill
+
+PERIODS = ("daily", "weekly", "monthly")
+
+# Number of buckets returned by /dashboard/earnings/chart per period
+CHART_BUCKETS = {"daily": 7, "weekly": 4, "monthly": 6}
+CHART_LABEL_FORMATS = {"daily": "%a", "weekly": "%b %d", "monthly": "%b"}
+
+
+def bucket_start(period: str, moment: datetime) -> date:
+    day = moment.astimezone(timezone.utc).date() if moment.tzinfo else moment.date()
+    if period == "daily":
+        return day
+    if period == "weekly":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def previous_bucket(period: str, start: date) -> date:
+    if period == "daily":
+        return start - timedelta(days=1)
+    if period == "weekly":
+        return start - timedelta(weeks=1)
+    return (start - timedelta(days=1)).replace(day=1)
+
+
+def platform_fee(job: Job) -> float:
+    commission = job.commission_rate if job.commission_rate else 0.08  # Default 8%
+    return float(job.budget or 0) * commission
+
+
+def _upsert(db: Session, period: str, start: date, gross: float, fees: float, jobs: int):
+    dialect = db.get_bind().dialect.name
+    values = dict(period=period, bucket_start=start, gross_earnings=gross, platform_fees=fees, jobs_completed=jobs)
+
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        statement = dialect_insert(EarningsRollup).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["period", "bucket_start"],
+            set_={
+                "gross_earnings": EarningsRollup.gross_earnings + gross,
+                "platform_fees": EarningsRollup.platform_fees + fees,
+                "jobs_completed": EarningsRollup.jobs_completed + jobs,
+            },
+        )
+        db.execute(statement)
+        return
+
+    result = db.execute(
+        update(EarningsRollup)
+        .where(EarningsRollup.period == period, EarningsRollup.bucket_start == start)
+        .values(
+            gross_earnings=EarningsRollup.gross_earnings + gross,
+            platform_fees=EarningsRollup.platform_fees + fees,
+            jobs_completed=EarningsRollup.jobs_completed + jobs,
+        )
+    )
+    if result.rowcount == 0:
+        db.execute(insert(EarningsRollup).values(**values))
+
+
+def record_completion(db: Session, job: Job, sign: int = 1):
+    """Add a completed job to its buckets (sign=-1 removes it again)"""
+    if job.completed_at is None:
+        return
+    gross = sign * float(job.budget or 0)
+    fees = sign * platform_fee(job)
+    for period in PERIODS:
+        _upsert(db, period, bucket_start(period, job.completed_at), gross, fees, sign)
+
+
+def backfill(db: Session) -> int:
+    """Rebuild every rollup row from completed jobs; returns the number of jobs counted"""
+    totals: Dict[Tuple[str, date], list] = defaultdict(lambda: [0.0, 0.0, 0])
+    jobs = 0
+    completed = db.query(Job.budget, Job.commission_rate, Job.completed_at).filter(
+        Job.status == JobStatus.COMPLETED, Job.completed_at.isnot(None)
+    ).yield_per(10_000)
+    for job in completed:
+        jobs += 1
+        for period in PERIODS:
+            bucket = totals[(period, bucket_start(period, job.completed_at))]
+            bucket[0] += float(job.budget or 0)
+            bucket[1] += platform_fee(job)
+            bucket[2] += 1
+
+    db.execute(delete(EarningsRollup))
+    if totals:
+        db.execute(insert(EarningsRollup), [
+            {
+                "period": period,
+                "bucket_start": start,
+                "gross_earnings": gross,
+                "platform_fees": fees,
+                "jobs_completed": count,
+            }
+            for (period, start), (gross, fees, count) in totals.items()
+        ])
+    db.commit()
+    return jobs
+
+
+def _buckets(db: Session, period: str, count: int) -> list:
+    """Rollup rows for the last `count` buckets of `period`, oldest first, zero-filled"""
+    starts = [bucket_start(period, datetime.now(timezone.utc))]
+    for _ in range(count - 1):
+        starts.append(previous_bucket(period, starts[-1]))
+    starts.reverse()
+
+    rows = db.query(EarningsRollup).filter(
+        EarningsRollup.period == period,
+        EarningsRollup.bucket_start >= starts[0]
+    ).all()
+    by_start = {row.bucket_start: row for row in rows}
+    return [(start, by_start.get(start)) for start in starts]
+
+
+def chart(db: Session, period: str) -> EarningsChart:
+    if period not in PERIODS:
+        period = "daily"
+    buckets = _buckets(db, period, CHART_BUCKETS[period])
+    return EarningsChart(
+        labels=[start.strftime(CHART_LABEL_FORMATS[period]) for start, _ in buckets],
+        data=[row.gross_earnings if row else 0.0 for _, row in buckets]
+    )
+
+
+def overview(db: Session) -> EarningsOverview:
+    current = {period: _buckets(db, period, 1)[0][1] for period in PERIODS}
+    # Lifetime totals are the sum of the monthly rows: a dozen rows per year of history
+    monthly_rows = db.query(EarningsRollup).filter(EarningsRollup.period == "monthly").all()
+    total = sum(row.gross_earnings for row in monthly_rows)
+    fees = sum(row.platform_fees for row in monthly_rows)
+    return EarningsOverview(
+        total_earnings=total,
+        monthly_earnings=current["monthly"].gross_earnings if current["monthly"] else 0.0,
+        weekly_earnings=current["weekly"].gross_earnings if current["weekly"] else 0.0,
+        daily_earnings=current["daily"].gross_earnings if current["daily"] else 0.0,
+        commission_rate=fees / total if total else 0.0,
+        platform_fees=fees,
+        net_earnings=total - fees
+    )
+
+
+if __name__ == "__main__":
+    import sys
+
+    from .database import SessionLocal, create_db_and_tables
+
+    if sys.argv[1:] != ["backfill"]:
+        sys.exit("usage: python -m app.earnings backfill")
+    create_db_and_tables()
+    session = SessionLocal()
+    try:
+        print(f"Rebuilt earnings rollups from {backfill(session)} completed jobs")
+    finally:
+        session.close()
@@ -0,0 +1,143 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from .config import settings
+
+# Password hashing off the request path.
+#
+# bcrypt is deliberately slow (~0.3s per hash at cost 12) and holds the GIL,
+# so hashing inside a route starves every other request served by the same
+# threadpool. Hashes are computed in a dedicated process pool of
+# PASSWORD_HASH_WORKERS processes instead. At most PASSWORD_HASH_MAX_PENDING
+# hashes may be queued or running per API process; beyond that callers get an
+# immediate 503 rather than waiting behind a login storm.
+#
+# Every API process owns its own pool, so a host runs WEB_CONCURRENCY x
+# PASSWORD_HASH_WORKERS bcrypt processes in total; the default splits the CPUs
+# between the API processes (cpu_count // WEB_CONCURRENCY, at least one each).
+# The pool is started with the API (startup hook), not on the first login, and
+# its workers come from a forkserver (spawn where that is unavailable): forking
+# the multithreaded server directly could copy locks held by other threads
+# into the child.
+#
+# BCRYPT_ROUNDS sets the cost for new hashes. Hashes made with another cost
+# still verify, and verify_password() returns a replacement hash for them so
+# login can upgrade the stored one transparently.
+
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+
+class HashingSaturated(Exception):
+    pass
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+def default_workers() -> int:
+    """This process's share of the CPUs"""
+    return max(1, (os.cpu_count() or 1) // max(1, settings.WEB_CONCURRENCY))
+
+
+class HashingPool:
+    """Bounded front for a process pool of bcrypt workers"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            context = multiprocessing.get_context(START_METHOD)
+            if START_METHOD == "forkserver":
+                context.set_forkserver_preload([__name__])  # Workers fork with passlib already imported
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._executor
+
+    def start(self):
+        """Start every worker process now rather than on the first login"""
+        with self._lock:
+            executor = self._get_executor()
+            ready = [executor.submit(_ready) for _ in range(self.workers)]
+        for future in ready:
+            future.result()
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashingSaturated()
+            self.pending += 1
+            executor = self._get_executor()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            }
+
+
+pool = HashingPool(settings.PASSWORD_HASH_WORKERS or default_workers(), settings.PASSWORD_HASH_MAX_PENDING)
+
+
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def hash_password(password: str) -> str:
+    try:
+        return await pool.run(_hash, password)
+    except HashingSaturated:
+        raise _busy()
+
+
+async def verify_password(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new_hash); new_hash is set when the stored hash should be replaced"""
+    try:
+        return await pool.run(_verify_and_update, password, hashed_password)
+    except HashingSaturated:
+        raise _busy()
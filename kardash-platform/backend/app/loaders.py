@@ -0,0 +1,33 @@
+from typing import Dict, Iterable
+
+from sqlalchemy.orm import Query, Session, joinedload
+
+from .models import Job, JobApplication
+
+# Eager-loading helpers for the relationships list endpoints walk.
+#
+# Touching application.job or job.bot_account on rows from a plain query
+# lazy-loads each one separately (N+1). These helpers attach the related rows
+# to the original SELECT instead. Use database.count_queries() to check that a
+# code path stays at a fixed number of statements.
+
+
+def with_job(query: Query) -> Query:
+    """Load JobApplication.job in the same SELECT (inner join: applications without a job are skipped)"""
+    return query.options(joinedload(JobApplication.job, innerjoin=True))
+
+
+def with_job_relations(query: Query) -> Query:
+    """Load Job.bot_account and Job.assigned_to_user in the same SELECT"""
+    return query.options(
+        joinedload(Job.bot_account),
+        joinedload(Job.assigned_to_user),
+    )
+
+
+def jobs_by_id(db: Session, job_ids: Iterable[int]) -> Dict[int, Job]:
+    """Fetch many jobs with one IN query, keyed by id"""
+    ids = set(job_ids)
+    if not ids:
+        return {}
+    return {job.id: job for job in db.query(Job).filter(Job.id.in_(ids))}
@@ -1,7 +1,17 @@
-from fastapi import FastAPI, Depends
+import asyncio
+import os
+import time
+
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from sqlalchemy.orm import Session
-from .database import create_db_and_tables, get_db
+from .database import create_db_and_tables, get_db, engine, async_engine, replicas, SessionLocal, pool_status
+from .config import settings
+from . import counters, auto_apply_worker, hashing, unread_counters, notification_retention, activity_log, activity_rollups, scraping, matching
+from .search import create_search_index
+from .pagination import NEXT_CURSOR_HEADER
+from .conditional import ETAG_HEADER, LAST_MODIFIED_HEADER
 from .models import User
 from .routers import jobs, bots, auth, users, dashboard, auto_applier, bot_accounts, notifications
 
@@ -18,12 +28,69 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, LAST_MODIFIED_HEADER],
 )
 
 # Create database tables on startup (for development, use Alembic for production)
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     create_db_and_tables()
+    create_search_index(engine)
+    # Rebuild the materialized dashboard counters, then keep repairing drift in the background
+    db = SessionLocal()
+    try:
+        counters.reconcile_dashboard_stats(db)
+    finally:
+        db.close()
+    app.state.reconcile_task = asyncio.create_task(
+        counters.run_periodic_reconciliation(SessionLocal, settings.DASHBOARD_STATS_RECONCILE_SECONDS)
+    )
+    app.state.unread_repair_task = None
+    if settings.UNREAD_COUNT_REPAIR_SECONDS > 0:
+        app.state.unread_repair_task = asyncio.create_task(
+            unread_counters.run_periodic_repair(SessionLocal, settings.UNREAD_COUNT_REPAIR_SECONDS)
+        )
+    app.state.retention_task = None
+    if settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS > 0:
+        app.state.retention_task = asyncio.create_task(
+            notification_retention.run_periodic_retention(SessionLocal, settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS)
+        )
+    app.state.activity_maintenance_task = None
+    if settings.BOT_ACTIVITY_MAINTENANCE_SECONDS > 0:
+        app.state.activity_maintenance_task = asyncio.create_task(
+            activity_rollups.run_periodic_maintenance(SessionLocal, settings.BOT_ACTIVITY_MAINTENANCE_SECONDS)
+        )
+    app.state.matching_index_task = None
+    if settings.MATCHING_INDEX_SYNC_SECONDS > 0:
+        app.state.matching_index_task = asyncio.create_task(
+            matching.run_periodic_refresh(SessionLocal, settings.MATCHING_INDEX_SYNC_SECONDS)
+        )
+    app.state.scrape_task = None
+    if settings.SCRAPER_INTERVAL_SECONDS > 0:
+        app.state.scrape_task = asyncio.create_task(
+            scraping.run_periodic(SessionLocal, settings.SCRAPER_INTERVAL_SECONDS)
+        )
+    auto_apply_worker.start_pool(SessionLocal)
+    activity_log.writer.start(SessionLocal)
+    await asyncio.to_thread(hashing.pool.start)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    app.state.reconcile_task.cancel()
+    if app.state.unread_repair_task is not None:
+        app.state.unread_repair_task.cancel()
+    if app.state.retention_task is not None:
+        app.state.retention_task.cancel()
+    if app.state.activity_maintenance_task is not None:
+        app.state.activity_maintenance_task.cancel()
+    if app.state.matching_index_task is not None:
+        app.state.matching_index_task.cancel()
+    if app.state.scrape_task is not None:
+        app.state.scrape_task.cancel()
+    await auto_apply_worker.pool.stop()
+    # Flush activities still waiting in the buffer
+    await asyncio.to_thread(activity_log.writer.stop)
+    hashing.pool.shutdown()
 
 # Include routers
 app.include_router(auth.router)
@@ -43,6 +110,31 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/db")
+def database_health_check(response: Response):
+    """Database reachability and connection pool telemetry for this worker process"""
+    started = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        status, error = "healthy", None
+    except Exception as exc:
+        response.status_code = 503
+        status, error = "unhealthy", str(exc)
+    result = {
+        "status": status,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+        "pid": os.getpid(),
+        "pool": pool_status(engine),
+    }
+    if async_engine is not None:
+        result["async_pool"] = pool_status(async_engine.sync_engine)
+    if replicas:
+        result["replica_pools"] = [pool_status(replica) for replica in replicas.engines]
+    if error:
+        result["error"] = error
+    return result
+
 # Example protected route (for testing)
 @app.get("/protected-test")
 def protected_route(current_user: User = Depends(auth.get_current_user)):
@@ -0,0 +1,353 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import Job, JobStatus, User
+from .applier import get_applier_filter
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Job matching engine behind /auto-applier/suggestions.
+#
+# Open jobs live in an in-memory inverted index (term -> job slots + term
+# frequencies) with per-slot NumPy arrays for document length, budget,
+# platform and liveness. A user profile (skill tags + auto-applier keywords)
+# is scored against every posting list at once with BM25, then masked by
+# budget range and platforms, and the top k are taken with argpartition.
+#
+# The index is updated incrementally by the job write paths (index_job /
+# unindex_job, index_changed_jobs for bulk writes such as the scraper).
+# Requests only read it; a background task (run_periodic_refresh) picks up
+# jobs written by other processes every MATCHING_INDEX_SYNC_SECONDS by
+# re-reading every job whose coalesce(updated_at, created_at) falls after the
+# previous sync minus MATCHING_INDEX_SYNC_OVERLAP_SECONDS. The stamps come
+# from the database clock when the write ran, so a transaction that commits
+# up to the overlap late is still read; ids are not used because they are
+# handed out in insert order, not commit order. Every
+# MATCHING_INDEX_REBUILD_SECONDS a fresh index is loaded and swapped in whole,
+# which also drops jobs deleted elsewhere.
+
+CHANGED_AT = func.coalesce(Job.updated_at, Job.created_at)  # Matches ix_jobs_changed_at
+INDEX_COLUMNS = (Job.id, Job.status, Job.title, Job.description, Job.tags, Job.budget, Job.platform)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2  # Title and tag terms count double
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have i in is it of on or our the this to we with you your".split()
+)
+
+
+def job_terms(title: Optional[str], description: Optional[str], tags: Optional[str]) -> Dict[str, int]:
+    """Term frequencies of a job document"""
+    frequencies: Dict[str, int] = {}
+    for text, weight in ((title, TITLE_WEIGHT), (tags, TITLE_WEIGHT), (description, 1)):
+        for token in tokenize(text or ""):
+            if token not in STOPWORDS:
+                frequencies[token] = frequencies.get(token, 0) + weight
+    return frequencies
+
+
+def profile_terms(phrases: Iterable[str]) -> List[str]:
+    """Distinct query terms from skill tags / keywords ("React Native, Python")"""
+    terms = []
+    for phrase in phrases:
+        for token in tokenize(phrase or ""):
+            if token not in STOPWORDS and token not in terms:
+                terms.append(token)
+    return terms
+
+
+class _Postings:
+    __slots__ = ("slots", "tfs", "_arrays")
+
+    def __init__(self):
+        self.slots: List[int] = []
+        self.tfs: List[int] = []
+        self._arrays = None
+
+    def add(self, slot: int, tf: int):
+        self.slots.append(slot)
+        self.tfs.append(tf)
+        self._arrays = None
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.slots, dtype=np.int64), np.asarray(self.tfs, dtype=np.float64))
+        return self._arrays
+
+
+class JobIndex:
+    """Inverted index over open jobs with vectorized BM25 scoring"""
+
+    def __init__(self, capacity: int = 1024):
+        self._lock = threading.RLock()
+        self._clear(capacity)
+
+    def _clear(self, capacity: int):
+        self.postings: Dict[str, _Postings] = {}
+        self.slot_of: Dict[int, int] = {}
+        self.job_ids = np.zeros(capacity, dtype=np.int64)
+        self.lengths = np.zeros(capacity, dtype=np.float64)
+        self.budgets = np.zeros(capacity, dtype=np.float64)
+        self.platforms = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.platform_codes: Dict[str, int] = {}
+        self.size = 0  # Slots used, including dead ones
+        self.live_count = 0
+        self.total_length = 0.0
+        self.synced_at: Optional[datetime] = None  # Database time the last load or sync started
+        self.seen: Dict[int, datetime] = {}  # Change stamps read by recent syncs, to skip unchanged rows
+        self.built_at = time.monotonic()
+
+    def __len__(self):
+        return self.live_count
+
+    def _grow(self):
+        capacity = len(self.job_ids) * 2
+        for name in ("job_ids", "lengths", "budgets", "platforms", "alive"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[: len(array)] = array
+            setattr(self, name, grown)
+
+    def _platform_code(self, platform: Optional[str]) -> int:
+        key = (platform or "").lower()
+        if key not in self.platform_codes:
+            self.platform_codes[key] = len(self.platform_codes) + 1
+        return self.platform_codes[key]
+
+    def add(self, job_id: int, title=None, description=None, tags=None, budget=None, platform=None):
+        """Index (or re-index) a job"""
+        frequencies = job_terms(title, description, tags)
+        with self._lock:
+            self.remove(job_id)
+            if self.size == len(self.job_ids):
+                self._grow()
+            slot = self.size
+            self.size += 1
+            length = float(sum(frequencies.values()))
+            self.job_ids[slot] = job_id
+            self.lengths[slot] = length
+            self.budgets[slot] = float(budget) if budget is not None else np.nan
+            self.platforms[slot] = self._platform_code(platform)
+            self.alive[slot] = True
+            for term, tf in frequencies.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = _Postings()
+                postings.add(slot, tf)
+            self.slot_of[job_id] = slot
+            self.live_count += 1
+            self.total_length += length
+
+    def remove(self, job_id: int):
+        """Drop a job from results (its postings are skipped until the next rebuild)"""
+        with self._lock:
+            slot = self.slot_of.pop(job_id, None)
+            if slot is not None:
+                self.alive[slot] = False
+                self.live_count -= 1
+                self.total_length -= self.lengths[slot]
+
+    def top_k(
+        self,
+        terms: Sequence[str],
+        k: int = 10,
+        min_budget: Optional[float] = None,
+        max_budget: Optional[float] = None,
+        platforms: Optional[Iterable[str]] = None,
+    ) -> List[Tuple[int, float]]:
+        """Best `k` (job_id, match_score) pairs; scores are normalized to 0..1"""
+        with self._lock:
+            n = self.size
+            if n == 0 or self.live_count == 0:
+                return []
+            alive = self.alive[:n]
+            avg_length = self.total_length / self.live_count or 1.0
+
+            scores = np.zeros(n, dtype=np.float64)
+            max_score = 0.0
+            for term in terms:
+                postings = self.postings.get(term)
+                if postings is None:
+                    continue
+                slots, tfs = postings.arrays()
+                live = alive[slots]
+                df = int(live.sum())
+                if df == 0:
+                    continue
+                idf = np.log(1 + (self.live_count - df + 0.5) / (df + 0.5))
+                length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[slots] / avg_length)
+                scores[slots] += live * idf * tfs * (BM25_K1 + 1) / (tfs + length_norm)
+                max_score += idf * (BM25_K1 + 1)
+
+            if max_score == 0:
+                # Nothing in the profile to score against: newest jobs passing the filters
+                mask = alive.copy()
+                scores = np.arange(1, n + 1, dtype=np.float64)
+            else:
+                mask = alive & (scores > 0)
+            budgets = self.budgets[:n]
+            if min_budget is not None:
+                mask &= budgets >= min_budget
+            if max_budget is not None:
+                mask &= budgets <= max_budget
+            if platforms:
+                codes = [self.platform_codes[p.lower()] for p in platforms if p.lower() in self.platform_codes]
+                mask &= np.isin(self.platforms[:n], codes)
+
+            candidates = np.flatnonzero(mask)
+            if candidates.size == 0:
+                return []
+            if candidates.size > k:
+                best = np.argpartition(-scores[candidates], k - 1)[:k]
+                candidates = candidates[best]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [
+                (int(self.job_ids[slot]), round(float(scores[slot] / max_score), 4) if max_score else 0.0)
+                for slot in candidates
+            ]
+
+    def sync(self, db: Session):
+        """Re-read jobs changed since the last load or sync (possibly by other processes)"""
+        started = db.scalar(select(func.now()))
+        since = self.synced_at - timedelta(seconds=settings.MATCHING_INDEX_SYNC_OVERLAP_SECONDS)
+        rows = db.query(*INDEX_COLUMNS, CHANGED_AT.label("changed_at")).filter(CHANGED_AT >= since)
+        seen = {}
+        for row in rows.yield_per(5_000):
+            seen[row.id] = row.changed_at
+            if self.seen.get(row.id) != row.changed_at:
+                _apply(self, row.id, _values(row))
+        self.seen = seen
+        self.synced_at = started
+
+    def load(self, db: Session):
+        """Index every open job"""
+        self.synced_at = db.scalar(select(func.now()))
+        rows = db.query(*INDEX_COLUMNS).filter(Job.status == JobStatus.OPEN).yield_per(5_000)
+        for row in rows:
+            _apply(self, row.id, _values(row))
+
+
+_index: Optional[JobIndex] = None
+_build_lock = threading.Lock()
+_pending: Optional[list] = None  # (job_id, values or None) written while a rebuild loads
+_pending_lock = threading.Lock()
+
+
+def _values(job) -> Optional[tuple]:
+    """What the index keeps for a job (a Job or an INDEX_COLUMNS row); None once it is not open"""
+    if job.status != JobStatus.OPEN:
+        return None
+    return job.title, job.description, job.tags, job.budget, job.platform
+
+
+def _apply(index: JobIndex, job_id: int, values: Optional[tuple]):
+    if values is None:
+        index.remove(job_id)
+    else:
+        index.add(job_id, *values)
+
+
+def _rebuild(db: Session, only_if_missing: bool = False) -> JobIndex:
+    """Load a fresh index off to the side, then swap it in; lookups keep using the old one meanwhile"""
+    global _index, _pending
+    with _build_lock:
+        if only_if_missing and _index is not None:
+            return _index
+        with _pending_lock:
+            _pending = []
+        fresh = JobIndex()
+        try:
+            fresh.load(db)
+        except BaseException:
+            with _pending_lock:
+                _pending = None
+            raise
+        with _pending_lock:
+            # The load may have read rows from before these writes; replay them on top
+            for job_id, values in _pending:
+                _apply(fresh, job_id, values)
+            _pending = None
+            _index = fresh
+        return fresh
+
+
+def refresh_job_index(session_factory) -> JobIndex:
+    """Rebuild the index when stale, else top it up with new jobs; runs off the request path"""
+    index = _index
+    db = session_factory()
+    try:
+        if index is None or time.monotonic() - index.built_at > settings.MATCHING_INDEX_REBUILD_SECONDS:
+            return _rebuild(db)
+        index.sync(db)
+        return index
+    finally:
+        db.close()
+
+
+async def run_periodic_refresh(session_factory, interval_seconds: int):
+    """Background task: build the index now, then refresh it every `interval_seconds`"""
+    while True:
+        try:
+            await asyncio.to_thread(refresh_job_index, session_factory)
+        except Exception:
+            logger.exception("Job index refresh failed")
+        await asyncio.sleep(interval_seconds)
+
+
+def get_job_index(db: Session) -> JobIndex:
+    """The current process-wide index; only built here if the background refresh hasn't yet"""
+    index = _index
+    if index is None:
+        index = _rebuild(db, only_if_missing=True)
+    return index
+
+
+def _record(job_id: int, values: Optional[tuple]):
+    with _pending_lock:
+        index = _index
+        if _pending is not None:
+            _pending.append((job_id, values))
+    if index is not None:
+        _apply(index, job_id, values)
+
+
+def index_job(job: Job):
+    """Keep the index in step with a job write: open jobs are (re)indexed, others dropped"""
+    _record(job.id, _values(job))
+
+
+def index_changed_jobs(db: Session, *criteria):
+    """Re-read the jobs matching `criteria` after a committed bulk write and (re)index them"""
+    if _index is None and _pending is None:
+        return  # Nothing built or building yet; the first load reads them anyway
+    for row in db.query(*INDEX_COLUMNS).filter(*criteria):
+        _record(row.id, _values(row))
+
+
+def unindex_job(job_id: int):
+    _record(job_id, None)
+
+
+def suggest_jobs(db: Session, user: User, limit: int = 10) -> List[Tuple[int, float]]:
+    """Top open jobs for the user's skill tags and auto-applier config"""
+    applier_filter = get_applier_filter(db, user.id)
+    terms = profile_terms((user.skill_tags or "").split(",") + applier_filter.terms)
+    return get_job_index(db).top_k(
+        terms,
+        k=limit,
+        min_budget=applier_filter.min_budget,
+        max_budget=applier_filter.max_budget,
+        platforms=applier_filter.platforms,
+    )
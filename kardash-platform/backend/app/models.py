@@ -1,10 +1,9 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum, func
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, Text, ForeignKey, Enum, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
-from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 import enum
 
-Base = declarative_base()
+from .database import Base
 
 class UserRole(str, enum.Enum):
     FREELANCER = "freelancer"
@@ -39,12 +38,17 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    jobs = relationship("Job", back_populates="user")
+    jobs = relationship("Job", back_populates="user", foreign_keys="Job.user_id")
     applications = relationship("JobApplication", back_populates="user")
     bot_accounts = relationship("BotAccount", back_populates="owner")
     jobs_assigned = relationship("Job", back_populates="assigned_to_user", foreign_keys="Job.assigned_to_user_id")
     notifications = relationship("Notification", back_populates="user")
 
+    # Keyset pagination indexes (see app/pagination.py)
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
+
 class Job(Base):
     __tablename__ = "jobs"
 
@@ -77,11 +81,21 @@ class Job(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="jobs")
+    user = relationship("User", back_populates="jobs", foreign_keys=[user_id])
     applications = relationship("JobApplication", back_populates="job")
-    bot_account = relationship("BotAccount", back_populates="jobs_applied")
+    bot_account = relationship("BotAccount", back_populates="jobs")
     assigned_to_user = relationship("User", back_populates="jobs_assigned", foreign_keys=[assigned_to_user_id])
 
+    # Keyset pagination indexes (see app/pagination.py)
+    __table_args__ = (
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+        Index("ix_jobs_status_created_at_id", "status", "created_at", "id"),
+        # Budget sorts order on coalesce(budget, 0.0) (paginate(nulls_as=0.0)); the expression must match
+        Index("ix_jobs_status_coalesced_budget_id", status, func.coalesce(budget, 0.0), id),
+        # Last change, for the matching index sync window (app/matching.py)
+        Index("ix_jobs_changed_at", func.coalesce(updated_at, created_at)),
+    )
+
 class JobApplication(Base):
     __tablename__ = "job_applications"
 
@@ -97,6 +111,11 @@ class JobApplication(Base):
     job = relationship("Job", back_populates="applications")
     user = relationship("User", back_populates="applications")
 
+    __table_args__ = (
+        Index("ix_job_applications_user_created_at_id", "user_id", "created_at", "id"),
+        UniqueConstraint("job_id", "user_id", name="uq_job_applications_job_user"),
+    )
+
 class BotAccount(Base):
     __tablename__ = "bot_accounts"
 
@@ -115,7 +134,11 @@ class BotAccount(Base):
 
     # Relationships
     owner = relationship("User", back_populates="bot_accounts")
-    jobs_applied = relationship("Job", back_populates="bot_account")
+    jobs = relationship("Job", back_populates="bot_account")
+
+    __table_args__ = (
+        Index("ix_bot_accounts_created_at_id", "created_at", "id"),
+    )
 
 class Bot(Base):
     __tablename__ = "bots"
@@ -129,18 +152,73 @@ class Bot(Base):
     success_rate = Column(Float, default=0.0)
     jobs_scraped = Column(Integer, default=0)
     jobs_applied = Column(Integer, default=0)
+    total_bid_amount = Column(Float, default=0.0)  # Sum of bids placed (auto-applier bots)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class AutoApplierConfig(Base):
+    __tablename__ = "auto_applier_configs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), unique=True, index=True, nullable=False)
+    config = Column(Text, nullable=False)  # JSON AutoApplyConfig
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+class AutoApplyTask(Base):
+    __tablename__ = "auto_apply_tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), unique=True, nullable=False)
+    status = Column(String, default="pending", nullable=False)  # pending, processing, done, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    locked_by = Column(String)  # Claim token of the worker batch processing it
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True))
+
+    # Workers claim the oldest pending tasks (see app/auto_apply_worker.py)
+    __table_args__ = (
+        Index("ix_auto_apply_tasks_status_id", "status", "id"),
+    )
+
 class BotActivity(Base):
     __tablename__ = "bot_activities"
 
     id = Column(Integer, primary_key=True, index=True)
     bot_id = Column(Integer, ForeignKey("bots.id"))
+    bot_account_id = Column(Integer, ForeignKey("bot_accounts.id"))  # Account the bot acted through, if any
     activity_type = Column(String)  # scrape, apply, error
     details = Column(Text)  # JSON details
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Per-bot activity feed
+        Index("ix_bot_activities_bot_created_at_id", "bot_id", "created_at", "id"),
+        # Pruning the oldest rows
+        Index("ix_bot_activities_created_at_id", "created_at", "id"),
+    )
+
+class BotActivityRollup(Base):
+    __tablename__ = "bot_activity_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    bot_id = Column(Integer, ForeignKey("bots.id", ondelete="CASCADE"), nullable=False)
+    bot_account_id = Column(Integer, nullable=False, default=0)  # 0 when the activity had no account
+    period = Column(String, nullable=False)  # "hourly", "daily"
+    bucket_start = Column(DateTime(timezone=True), nullable=False)  # Start of the hour or day (UTC)
+    activity_type = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "bot_id", "period", "bucket_start", "activity_type", "bot_account_id",
+            name="uq_bot_activity_rollups_bucket",
+        ),
+        Index("ix_bot_activity_rollups_account_period_bucket", "bot_account_id", "period", "bucket_start"),
+    )
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -154,6 +232,37 @@ class Notification(Base):
     # Relationships
     user = relationship("User", back_populates="notifications")
 
+    __table_args__ = (
+        Index("ix_notifications_user_time_id", "user_id", "time", "id"),
+        # Unread-only listings and per-user unread counts
+        Index("ix_notifications_user_is_read_time_id", "user_id", "is_read", "time", "id"),
+        # Admin listing across users, and the retention sweep over the oldest rows
+        Index("ix_notifications_time_id", "time", "id"),
+    )
+
+class ArchivedNotification(Base):
+    """Read notifications moved out of `notifications` by app/notification_retention.py"""
+    __tablename__ = "notifications_archive"
+
+    id = Column(Integer, primary_key=True)  # Same id as in notifications
+    user_id = Column(Integer, nullable=False)
+    type = Column(String, nullable=False)
+    message = Column(Text, nullable=False)
+    time = Column(DateTime(timezone=True))
+    is_read = Column(Boolean, default=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_notifications_archive_user_time", "user_id", "time"),
+    )
+
+class UnreadNotificationCount(Base):
+    __tablename__ = "unread_notification_counts"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unread = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class DashboardStats(Base):
     __tablename__ = "dashboard_stats"
 
@@ -164,4 +273,20 @@ class DashboardStats(Base):
     total_earnings = Column(Float, default=0.0)
     monthly_earnings = Column(Float, default=0.0)
     commission_rate = Column(Float, default=0.15)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    earnings_month = Column(String)  # "YYYY-MM" that monthly_earnings refers to
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class EarningsRollup(Base):
+    __tablename__ = "earnings_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(String, nullable=False)  # "daily", "weekly", "monthly"
+    bucket_start = Column(Date, nullable=False)  # Day, Monday of the week, or first of the month (UTC)
+    gross_earnings = Column(Float, default=0.0)  # Sum of completed job budgets
+    platform_fees = Column(Float, default=0.0)  # Commission kept by KARDASH
+    jobs_completed = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("period", "bucket_start", name="uq_earnings_rollups_period_bucket"),
+    )
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import threading
+import time
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+from .config import settings
+from .models import Notification
+from .schemas import NotificationResponse
+
+# Push channel for notifications.
+#
+# Clients hold one GET /notifications/stream (server-sent events) connection
+# instead of polling /notifications/ and /notifications/unread-count. Routes
+# publish to the hub after committing; the hub hands each event to every open
+# stream of the recipient through a bounded per-connection queue. publish() is
+# thread-safe, so the sync routes running in the threadpool can call it.
+#
+# The hub only reaches connections in its own process. With several API
+# workers, install a broker (anything with publish(user_id, event)) that
+# relays events to every process (e.g. Redis pub/sub) and calls
+# hub.deliver(user_id, event) for each one received.
+#
+# A stream ends after NOTIFICATION_STREAM_MAX_SECONDS and EventSource
+# reconnects on its own. That re-checks the token, spreads long-lived
+# connections over workers again, and bounds how long a graceful shutdown
+# (which waits for open responses) can take.
+#
+# Notification events carry the notification id as their SSE id, so a
+# reconnecting EventSource sends it back as Last-Event-ID and the new stream
+# replays what was created in between (missed_notifications), or asks the
+# client to resync if that is more than a queue's worth.
+
+RESYNC = {"event": "resync", "data": {}}
+
+
+class NotificationHub:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.broker = None
+        # user_id -> {queue: loop}; weak, so a stream that never started can't leak its queue
+        self._subscribers: Dict[int, weakref.WeakKeyDictionary] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.overflows = 0
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """Queue of events for a new stream of `user_id`; call from the event loop"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(user_id, weakref.WeakKeyDictionary())[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is None:
+                return
+            subscribers.pop(queue, None)
+            if not subscribers:
+                del self._subscribers[user_id]
+
+    def has_listeners(self, user_id: Optional[int] = None) -> bool:
+        """Whether publishing (for `user_id`, or anyone) can reach a stream; always true with a broker"""
+        if self.broker is not None:
+            return True
+        with self._lock:
+            if user_id is None:
+                return bool(self._subscribers)
+            return bool(self._subscribers.get(user_id))
+
+    def publish(self, user_id: int, event: str, data: dict, event_id: Optional[int] = None):
+        with self._lock:
+            self.published += 1
+        message = {"event": event, "data": data, "id": event_id}
+        if self.broker is not None:
+            self.broker.publish(user_id, message)
+        else:
+            self.deliver(user_id, message)
+
+    def deliver(self, user_id: int, message):
+        """Hand `message` to this process's streams of `user_id`"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, {}).items())
+        for queue, loop in subscribers:
+            loop.call_soon_threadsafe(self._put, queue, message)
+
+    def _put(self, queue: asyncio.Queue, message):
+        try:
+            queue.put_nowait(message)
+            self.delivered += 1
+        except asyncio.QueueFull:
+            # A client this far behind has to refetch; drop its backlog and tell it so
+            self.overflows += 1
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(RESYNC)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "connections": sum(len(entries) for entries in self._subscribers.values()),
+                "users": len(self._subscribers),
+                "published": self.published,
+                "delivered": self.delivered,
+                "overflows": self.overflows,
+                "broker": type(self.broker).__name__ if self.broker is not None else None,
+            }
+
+
+hub = NotificationHub(settings.NOTIFICATION_STREAM_QUEUE_SIZE)
+
+
+def format_event(event: str, data, event_id: Optional[int] = None) -> str:
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream(
+    user_id: int,
+    queue: asyncio.Queue,
+    first_events: Iterable[dict] = (),
+    heartbeat: Optional[float] = None,
+    max_seconds: Optional[float] = None,
+):
+    """SSE body for one connection of `user_id`, reading the queue from hub.subscribe()
+
+    `first_events` are messages like the queue's ({"event", "data", "id"}) sent before it.
+    """
+    heartbeat = heartbeat or settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+    deadline = time.monotonic() + (max_seconds or settings.NOTIFICATION_STREAM_MAX_SECONDS)
+    sent = set()
+    try:
+        yield f"retry: {int(heartbeat * 1000)}\n\n"
+        for message in first_events:
+            if message.get("id") is not None:
+                sent.add(message["id"])
+            yield format_event(message["event"], message["data"], message.get("id"))
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            # The queue was subscribed before the replay was read, so it may repeat some of it
+            if message.get("id") in sent:
+                continue
+            yield format_event(message["event"], message["data"], message.get("id"))
+    finally:
+        hub.unsubscribe(user_id, queue)
+
+
+def notification_data(notification) -> dict:
+    return NotificationResponse.model_validate(notification).model_dump(mode="json")
+
+
+def publish_notifications(notifications: Iterable):
+    """Push committed Notification rows to their recipients"""
+    for notification in notifications:
+        hub.publish(notification.user_id, "notification", notification_data(notification), notification.id)
+
+
+def missed_notifications(db, user_id: int, last_event_id: int) -> List[dict]:
+    """Messages for `user_id`'s notifications after `last_event_id`, or a resync if there are too many"""
+    notifications = (
+        db.query(Notification)
+        .filter(Notification.user_id == user_id, Notification.id > last_event_id)
+        .order_by(Notification.id)
+        .limit(hub.queue_size + 1)
+        .all()
+    )
+    if len(notifications) > hub.queue_size:
+        return [RESYNC]
+    return [
+        {"event": "notification", "data": notification_data(notification), "id": notification.id}
+        for notification in notifications
+    ]
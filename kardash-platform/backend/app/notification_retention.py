@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import ArchivedNotification, Notification
+
+logger = logging.getLogger(__name__)
+
+# Notification retention.
+#
+# Read notifications older than NOTIFICATION_RETENTION_DAYS are moved from
+# `notifications` to `notifications_archive`. Each batch is one transaction:
+# pick the oldest NOTIFICATION_RETENTION_BATCH_SIZE ids from the (time, id)
+# index, copy them with INSERT ... SELECT, then delete them. Unread
+# notifications are never moved, so the unread counters are unaffected. The
+# hot table only holds what users can still act on, and the listing and
+# count queries stay bounded.
+#
+# Batches lock their rows with SKIP LOCKED (on PostgreSQL), so every API
+# process can run the sweep on its own timer. Runs happen every
+# NOTIFICATION_RETENTION_INTERVAL_SECONDS, from
+# POST /notifications/admin/retention/run, or from the command line:
+#
+#     python -m app.notification_retention run
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Move one batch of read notifications older than `cutoff`; returns rows moved"""
+    ids = [
+        notification_id for (notification_id,) in db.execute(
+            select(Notification.id)
+            .where(Notification.time < cutoff, Notification.is_read == True)
+            .order_by(Notification.time, Notification.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+    ]
+    if not ids:
+        db.rollback()
+        return 0
+    columns = ["id", "user_id", "type", "message", "time", "is_read"]
+    db.execute(
+        insert(ArchivedNotification).from_select(
+            columns,
+            select(*(getattr(Notification, column) for column in columns)).where(Notification.id.in_(ids)),
+        )
+    )
+    db.execute(delete(Notification).where(Notification.id.in_(ids)).execution_options(synchronize_session=False))
+    db.commit()
+    return len(ids)
+
+
+class RetentionMetrics:
+    """What the retention sweeps of this process have done"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = False
+        self.runs = 0
+        self.errors = 0
+        self.rows_moved = 0
+        self.last_run_at = None
+        self.last_rows_moved = None
+        self.last_seconds = None
+        self.last_cutoff = None
+        self.last_error = None
+
+    def start(self) -> bool:
+        """Claim the right to run; False if a sweep is already running in this process"""
+        with self._lock:
+            if self.running:
+                return False
+            self.running = True
+            return True
+
+    def record_batch(self, rows: int):
+        with self._lock:
+            self.rows_moved += rows
+
+    def finish(self, rows: int, seconds: float, cutoff: datetime, error: Optional[str]):
+        with self._lock:
+            self.running = False
+            self.runs += 1
+            self.errors += error is not None
+            self.last_run_at = _utcnow()
+            self.last_rows_moved = rows
+            self.last_seconds = round(seconds, 3)
+            self.last_cutoff = cutoff
+            self.last_error = error
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "runs": self.runs,
+                "errors": self.errors,
+                "rows_moved": self.rows_moved,
+                "last_run_at": self.last_run_at,
+                "last_rows_moved": self.last_rows_moved,
+                "last_seconds": self.last_seconds,
+                "last_cutoff": self.last_cutoff,
+                "last_error": self.last_error,
+                "retention_days": settings.NOTIFICATION_RETENTION_DAYS,
+                "interval_seconds": settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS,
+                "batch_size": settings.NOTIFICATION_RETENTION_BATCH_SIZE,
+            }
+
+
+metrics = RetentionMetrics()
+
+
+def run(session_factory, older_than_days: Optional[int] = None, batch_size: Optional[int] = None) -> int:
+    """Archive every read notification older than the retention period; returns rows moved"""
+    days = settings.NOTIFICATION_RETENTION_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.NOTIFICATION_RETENTION_BATCH_SIZE
+    cutoff = _utcnow() - timedelta(days=days)
+    if not metrics.start():
+        return 0
+    started = time.perf_counter()
+    moved = 0
+    db = session_factory()
+    try:
+        while True:
+            batch = archive_batch(db, cutoff, batch_size)
+            moved += batch
+            metrics.record_batch(batch)
+            if batch < batch_size:
+                break
+        error = None
+    except Exception as exc:
+        db.rollback()
+        error = repr(exc)
+        logger.exception("Notification retention sweep failed")
+    finally:
+        db.close()
+    metrics.finish(moved, time.perf_counter() - started, cutoff, error)
+    return moved
+
+
+def table_stats(db: Session) -> dict:
+    """Row counts and the oldest row of the hot and archive tables"""
+    hot_rows, oldest = db.query(func.count(Notification.id), func.min(Notification.time)).one()
+    archived_rows = db.query(func.count(ArchivedNotification.id)).scalar()
+    return {"hot_rows": hot_rows, "oldest_hot_notification": oldest, "archived_rows": archived_rows}
+
+
+async def run_periodic_retention(session_factory, interval_seconds: int):
+    """Background task: archive old notifications every `interval_seconds`"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        moved = await asyncio.to_thread(run, session_factory)
+        if moved:
+            logger.info("Archived %d read notifications", moved)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from .database import SessionLocal, create_db_and_tables
+
+    if sys.argv[1:] != ["run"]:
+        sys.exit("usage: python -m app.notification_retention run")
+    create_db_and_tables()
+    print(f"Archived {run(SessionLocal)} read notifications")
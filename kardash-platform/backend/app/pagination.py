@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Response
+from sqlalchemy import func, literal, tuple_
+from sqlalchemy.orm import Query
+
+# Keyset (cursor) pagination.
+#
+# List endpoints keep accepting skip/limit. When a page is full, the response
+# carries an opaque X-Next-Cursor header encoding the (sort value, id) of its
+# last row; passing it back as ?cursor=... seeks straight past that row using
+# the matching composite index instead of counting through OFFSET rows.
+#
+# Relevance-ranked search results have no keyset to seek on: they are
+# offset-only and never carry X-Next-Cursor.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value, row_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if value is not None and sort_column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _bind_value(query: Query, value):
+    # SQLite stores server_default timestamps as 'YYYY-MM-DD HH:MM:SS' text and
+    # compares them as strings, so bind in the same format rather than
+    # SQLAlchemy's default, which always appends microseconds.
+    if isinstance(value, datetime) and query.session.get_bind().dialect.name == "sqlite":
+        return value.replace(tzinfo=None).isoformat(sep=" ")
+    return value
+
+
+def paginate(
+    query: Query,
+    sort_column,
+    id_column,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    response: Optional[Response] = None,
+    descending: bool = True,
+    nulls_as=None,
+) -> list:
+    """Fetch one page ordered by (sort_column, id_column), seeking past `cursor`
+
+    `skip` is only honoured in offset mode; a cursor already marks the position.
+    A nullable sort_column needs `nulls_as`: NULL never compares in the keyset
+    condition, and dialects disagree on where NULLs sort, so rows are ordered
+    and compared on coalesce(sort_column, nulls_as) instead. nulls_as is
+    rendered inline so the expression matches an index on
+    coalesce(sort_column, nulls_as).
+    """
+    if nulls_as is None:
+        sort_key = sort_column
+    else:
+        sort_key = func.coalesce(sort_column, literal(nulls_as, literal_execute=True))
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort_column)
+        value = _bind_value(query, value)
+        keyset = tuple_(sort_key, id_column)
+        bound = tuple_(value, row_id)
+        # The plain range on the sort key lets planners (SQLite) seek the index
+        # even where they don't for a row-value comparison over an expression
+        if descending:
+            query = query.filter(sort_key <= value, keyset < bound)
+        else:
+            query = query.filter(sort_key >= value, keyset > bound)
+
+    if descending:
+        query = query.order_by(sort_key.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_key.asc(), id_column.asc())
+
+    if not cursor and skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit).all()
+
+    if response is not None and rows and len(rows) == limit:
+        last = rows[-1]
+        value = getattr(last, sort_column.key)
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            nulls_as if value is None else value, getattr(last, id_column.key)
+        )
+    return rows
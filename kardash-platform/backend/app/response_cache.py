@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from .conditional import VALIDATOR_HEADERS
+from .config import settings
+from .pagination import NEXT_CURSOR_HEADER
+
+# Response cache for hot read endpoints.
+#
+# A route looks up a key built from its path, query string and the caller's
+# role, and on a miss stores the JSON it would have returned, so a hit skips
+# the database and Pydantic serialization altogether. Each entry is filed
+# under tags ("jobs", "job:42", ...). Writes call invalidate(*tags), which bumps
+# the tags' version numbers; versions are part of every key, so older entries
+# simply stop matching and age out of the LRU.
+#
+# Two layers: a per-process LRU, and an optional shared backend (anything with
+# get/set/incr/get_many, e.g. a thin Redis wrapper) that also holds the tag
+# versions so an invalidation in one worker is seen by all of them. With
+# RESPONSE_CACHE_BACKEND=memory an in-process stand-in is used, which is handy
+# for tests; without a shared backend other workers rely on the TTL.
+
+CACHED_HEADERS = (NEXT_CURSOR_HEADER,) + VALIDATOR_HEADERS
+
+
+class InMemoryBackend:
+    """Stand-in for a shared cache server (same interface a Redis adapter would offer)"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def get_many(self, keys: Iterable[str]) -> list:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value, ttl_seconds: Optional[float] = None):
+        with self._lock:
+            expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+            self._data[key] = (expires_at, value)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            _, value = self._data.get(key, (None, 0))
+            self._data[key] = (None, value + 1)
+            return value + 1
+
+
+class _LocalLRU:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value, ttl_seconds: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCache:
+    def __init__(self, max_size: int, ttl_seconds: int, shared=None):
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self._local = _LocalLRU(max_size)
+        self._versions: Dict[str, int] = {}  # Tag versions when there is no shared backend
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _tag_versions(self, tags: Tuple[str, ...]) -> str:
+        if self.shared is not None:
+            versions = self.shared.get_many([f"tag:{tag}" for tag in tags])
+        else:
+            versions = [self._versions.get(tag) for tag in tags]
+        return ",".join(f"{tag}={version or 0}" for tag, version in zip(tags, versions))
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str, tags: Tuple[str, ...]):
+        versioned_key = f"{key}|{self._tag_versions(tags)}"
+        value = self._local.get(versioned_key)
+        if value is not None:
+            self._count("local_hits")
+            return versioned_key, value
+        if self.shared is not None:
+            value = self.shared.get(versioned_key)
+            if value is not None:
+                self._local.set(versioned_key, value, self.ttl_seconds)
+                self._count("shared_hits")
+                return versioned_key, value
+        self._count("misses")
+        return versioned_key, None
+
+    def set(self, versioned_key: str, value):
+        self._local.set(versioned_key, value, self.ttl_seconds)
+        if self.shared is not None:
+            self.shared.set(versioned_key, value, self.ttl_seconds)
+
+    def invalidate(self, *tags: str):
+        for tag in tags:
+            if self.shared is not None:
+                self.shared.incr(f"tag:{tag}")
+            else:
+                with self._lock:
+                    self._versions[tag] = self._versions.get(tag, 0) + 1
+        self._count("invalidations")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.local_hits + self.shared_hits
+            lookups = hits + self.misses
+            return {
+                "backend": type(self.shared).__name__ if self.shared is not None else None,
+                "local_entries": len(self._local),
+                "local_hits": self.local_hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+response_cache = ResponseCache(
+    settings.RESPONSE_CACHE_SIZE,
+    settings.RESPONSE_CACHE_TTL_SECONDS,
+    shared=InMemoryBackend() if settings.RESPONSE_CACHE_BACKEND == "memory" else None,
+)
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _adapter(response_model) -> TypeAdapter:
+    adapter = _adapters.get(response_model)
+    if adapter is None:
+        adapter = _adapters[response_model] = TypeAdapter(response_model)
+    return adapter
+
+
+def cache_key(request: Request, role=None) -> str:
+    """Route + sorted query parameters + caller role"""
+    query = "&".join(f"{name}={value}" for name, value in sorted(request.query_params.multi_items()))
+    role = getattr(role, "value", role) or "anonymous"
+    return f"{request.url.path}?{query}|{role}"
+
+
+def _to_response(value: Tuple[bytes, dict]) -> Response:
+    body, headers = value
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_response(request: Request, tags: Tuple[str, ...], role=None):
+    """(versioned key, Response or None) for a cached route"""
+    if settings.RESPONSE_CACHE_TTL_SECONDS <= 0:
+        return None, None
+    versioned_key, value = response_cache.get(cache_key(request, role), tags)
+    return versioned_key, _to_response(value) if value is not None else None
+
+
+def store_response(versioned_key: Optional[str], response_model, result, response: Optional[Response] = None) -> Response:
+    """Serialize `result` as `response_model` would, cache it under `versioned_key` and return it"""
+    adapter = _adapter(response_model)
+    body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+    headers = {}
+    if response is not None:
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+    if versioned_key is not None:
+        response_cache.set(versioned_key, (body, headers))
+    return _to_response((body, headers))
+
+
+def invalidate(*tags: str):
+    response_cache.invalidate(*tags)
+
+
+def job_tags(job_id: int) -> Tuple[str, ...]:
+    """Tags touched by a write to one job"""
+    return ("jobs", f"job:{job_id}")
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -13,7 +12,7 @@ class DashboardStats(BaseModel):
     total_earnings: float
 
 @router.get("/dashboard/stats")
-async def get_dashboard_stats(db: Session = Depends(get_db)):
+async def get_dashboard_stats(db=Depends(get_async_db)):
     """Get admin dashboard statistics"""
     # TODO: Implement dashboard stats logic
     return {
@@ -24,13 +23,13 @@ async def get_dashboard_stats(db: Session = Depends(get_db)):
     }
 
 @router.get("/bots")
-async def get_bots(db: Session = Depends(get_db)):
+async def get_bots(db=Depends(get_async_db)):
     """Get all bot accounts"""
     # TODO: Implement bot management logic
     return []
 
 @router.post("/bots")
-async def create_bot(db: Session = Depends(get_db)):
+async def create_bot(db=Depends(get_async_db)):
     """Create a new bot account"""
     # TODO: Implement bot creation logic
     return {"message": "Bot created successfully"}
@@ -40,14 +39,14 @@ async def get_users(
     search: Optional[str] = Query(None),
     filter_role: Optional[str] = Query(None),
     filter_status: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db=Depends(get_async_db)
 ):
     """Get all users with filters"""
     # TODO: Implement user management logic
     return []
 
 @router.get("/earnings/summary")
-async def get_earnings_summary(db: Session = Depends(get_db)):
+async def get_earnings_summary(db=Depends(get_async_db)):
     """Get platform earnings summary"""
     # TODO: Implement earnings summary logic
     return {
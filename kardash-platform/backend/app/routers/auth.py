@@ -3,30 +3,27 @@ from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from typing import Optional
 from pydantic import BaseModel
 
-from ..database import get_db
+from ..database import get_db, get_async_db, run_db
 from ..models import User, UserRole
 from ..config import settings
+from .. import counters, hashing
+from ..user_cache import cached_user, user_cache
+from ..response_cache import invalidate
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token", auto_error=False)
 
 from ..schemas import UserCreate, UserLogin, Token, UserResponse
 
-# Helper functions
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# Helper functions (bcrypt runs in the process pool of app/hashing.py)
+async def get_password_hash(password: str) -> str:
+    return await hashing.hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -41,15 +38,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 def get_user(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
-def authenticate_user(db: Session, email: str, password: str):
-    user = get_user(db, email)
+async def authenticate_user(db, email: str, password: str):
+    user = await run_db(db, get_user, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await hashing.verify_password(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        # Stored with a different BCRYPT_ROUNDS: upgrade while we have the plain password
+        user.hashed_password = new_hash
+        await run_db(db, Session.commit)
     return user
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    # A plain def runs in the threadpool, so the users query below never blocks the event loop.
+    # Tokens verified in the last AUTH_CACHE_TTL_SECONDS skip both the JWT check and the users query
+    user = cached_user(db, token)
+    if user is not None:
+        return user
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -65,8 +73,24 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     user = get_user(db, email=email)
     if user is None:
         raise credentials_exception
+    user_cache.put(token, user, payload.get("exp"))
     return user
 
+def get_stream_user(
+    access_token: Optional[str] = None,
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    db: Session = Depends(get_db)
+):
+    # Browsers' EventSource cannot set headers, so streams also take the token as ?access_token=
+    token = token or access_token
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return get_current_user(token, db)
+
 async def get_current_admin_user(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -77,10 +101,10 @@ async def get_current_admin_user(current_user: User = Depends(get_current_user))
 
 # Routes
 @router.post("/register", response_model=UserResponse)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db=Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    db_user = get_user(db, email=user.email)
+    db_user = await run_db(db, get_user, user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -88,22 +112,29 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     db_user = User(
         email=user.email,
         name=user.name,
         hashed_password=hashed_password,
         role=user.role
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    
+    def save(session: Session):
+        session.add(db_user)
+        session.flush()
+        counters.user_created(session)
+        session.commit()
+        session.refresh(db_user)
+    
+    await run_db(db, save)
+    invalidate("users")
     return db_user
 
 @router.post("/token", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db=Depends(get_async_db)):
     """Login and get access token"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -119,4 +150,15 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
-    return current_user 
\ No newline at end of file
+    return current_user 
+
+@router.get("/cache/stats")
+def get_auth_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """Hit/miss counters of the token -> user cache in this process (admin only)"""
+    return user_cache.stats()
+
+
+@router.get("/hashing/stats")
+def get_hashing_stats(current_user: User = Depends(get_current_admin_user)):
+    """Password hashing pool load and rejections in this process (admin only)"""
+    return hashing.pool.stats()
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 import json
 
-from ..database import get_db
-from ..models import Job, JobApplication, User, Bot, BotActivity
-from ..schemas import AutoApplyConfig, AutoApplyResponse, AutoApplyStats
+from sqlalchemy.exc import IntegrityError
+
+from ..database import get_db, insert_ignore_duplicates
+from ..models import Job, JobStatus, JobApplication, User, Bot, BotStatus
+from ..schemas import (
+    AutoApplyConfig, AutoApplyResponse, AutoApplyStats, AutoApplyBatchRequest, AutoApplyBatchResponse, AutoApplyBatchResult
+)
 from ..routers.auth import get_current_user, get_current_admin_user
+from ..pagination import paginate
+from ..loaders import with_job, jobs_by_id
+from ..matching import suggest_jobs
+from .. import auto_apply_worker
+from ..activity_log import log_activity
+from ..applier import (
+    AUTO_APPLIER_PLATFORM, auto_applier_bot_name, get_auto_applier_bot, application_totals,
+    init_application_counters, record_applications, get_applier_filter, save_applier_config
+)
 
 router = APIRouter(prefix="/auto-applier", tags=["Auto Applier"])
 
@@ -22,11 +35,10 @@ def configure_auto_applier(
     current_user: User = Depends(get_current_user)
 ):
     """Configure auto-applier settings for current user"""
-    # Store configuration in user preferences or bot config
-    # For now, return success message
+    applier_filter = save_applier_config(db, current_user.id, config.dict())
     return {
         "message": "Auto-applier configuration updated",
-        "config": config.dict()
+        "config": applier_filter.config
     }
 
 @router.get("/config")
@@ -35,15 +47,7 @@ def get_auto_applier_config(
     current_user: User = Depends(get_current_user)
 ):
     """Get current user's auto-applier configuration"""
-    # Mock configuration
-    return {
-        "keywords": ["React", "Python", "Web Development"],
-        "min_budget": 100.0,
-        "max_budget": 5000.0,
-        "platforms": ["Upwork", "Fiverr", "Freelancer"],
-        "auto_apply": True,
-        "custom_proposal_template": "I'm interested in this project and have relevant experience..."
-    }
+    return get_applier_filter(db, current_user.id).config
 
 @router.post("/start")
 def start_auto_applier(
@@ -52,40 +56,31 @@ def start_auto_applier(
 ):
     """Start auto-applier for current user"""
     # Create or update bot for user
-    bot_name = f"auto_applier_{current_user.id}"
+    bot_name = auto_applier_bot_name(current_user.id)
     existing_bot = db.query(Bot).filter(Bot.name == bot_name).first()
     
     if existing_bot:
         existing_bot.status = BotStatus.ACTIVE
         existing_bot.last_active = datetime.utcnow()
     else:
-        config = {
-            "user_id": current_user.id,
-            "keywords": ["React", "Python", "Web Development"],
-            "min_budget": 100.0,
-            "max_budget": 5000.0,
-            "platforms": ["Upwork", "Fiverr", "Freelancer"]
-        }
-        
+        # Filters live in auto_applier_configs (see /configure); the bot only records its owner
         new_bot = Bot(
             name=bot_name,
-            platform="auto_applier",
+            platform=AUTO_APPLIER_PLATFORM,
             status=BotStatus.ACTIVE,
-            config=json.dumps(config),
+            config=json.dumps({"user_id": current_user.id}),
             last_active=datetime.utcnow()
         )
+        init_application_counters(db, new_bot)
         db.add(new_bot)
     
     db.commit()
     
-    # Log activity
-    activity = BotActivity(
-        bot_id=existing_bot.id if existing_bot else new_bot.id,
-        activity_type="start",
-        details=json.dumps({"user_id": current_user.id, "action": "started_auto_applier"})
+    log_activity(
+        existing_bot.id if existing_bot else new_bot.id,
+        "start",
+        {"user_id": current_user.id, "action": "started_auto_applier"},
     )
-    db.add(activity)
-    db.commit()
     
     return {"message": "Auto-applier started successfully"}
 
@@ -95,21 +90,13 @@ def stop_auto_applier(
     current_user: User = Depends(get_current_user)
 ):
     """Stop auto-applier for current user"""
-    bot_name = f"auto_applier_{current_user.id}"
-    bot = db.query(Bot).filter(Bot.name == bot_name).first()
+    bot = get_auto_applier_bot(db, current_user.id)
     
     if bot:
         bot.status = BotStatus.INACTIVE
         db.commit()
         
-        # Log activity
-        activity = BotActivity(
-            bot_id=bot.id,
-            activity_type="stop",
-            details=json.dumps({"user_id": current_user.id, "action": "stopped_auto_applier"})
-        )
-        db.add(activity)
-        db.commit()
+        log_activity(bot.id, "stop", {"user_id": current_user.id, "action": "stopped_auto_applier"})
     
     return {"message": "Auto-applier stopped successfully"}
 
@@ -119,8 +106,7 @@ def get_auto_applier_status(
     current_user: User = Depends(get_current_user)
 ):
     """Get auto-applier status for current user"""
-    bot_name = f"auto_applier_{current_user.id}"
-    bot = db.query(Bot).filter(Bot.name == bot_name).first()
+    bot = get_auto_applier_bot(db, current_user.id)
     
     if bot:
         return {
@@ -143,31 +129,32 @@ def get_auto_applier_status(
 def get_auto_applications(
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    response: Response = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get auto-applied jobs for current user"""
-    # Get user's applications
-    applications = db.query(JobApplication).filter(
-        JobApplication.user_id == current_user.id
-    ).offset(skip).limit(limit).all()
-    
-    results = []
-    for app in applications:
-        job = db.query(Job).filter(Job.id == app.job_id).first()
-        if job:
-            results.append(AutoApplyResponse(
-                job_id=job.id,
-                job_title=job.title,
-                platform=job.platform,
-                budget=job.budget,
-                applied=True,
-                proposal=app.proposal,
-                bid_amount=app.bid_amount,
-                timestamp=app.created_at
-            ))
+    # Get user's applications together with their jobs in one query
+    query = with_job(db.query(JobApplication).filter(JobApplication.user_id == current_user.id))
+    applications = paginate(
+        query, JobApplication.created_at, JobApplication.id, limit,
+        skip=skip, cursor=cursor, response=response
+    )
     
-    return results
+    return [
+        AutoApplyResponse(
+            job_id=app.job.id,
+            job_title=app.job.title,
+            platform=app.job.platform,
+            budget=app.job.budget,
+            applied=True,
+            proposal=app.proposal,
+            bid_amount=app.bid_amount,
+            timestamp=app.created_at
+        )
+        for app in applications
+    ]
 
 @router.get("/stats", response_model=AutoApplyStats)
 def get_auto_applier_stats(
@@ -175,21 +162,18 @@ def get_auto_applier_stats(
     current_user: User = Depends(get_current_user)
 ):
     """Get auto-applier statistics for current user"""
-    bot_name = f"auto_applier_{current_user.id}"
-    bot = db.query(Bot).filter(Bot.name == bot_name).first()
+    bot = get_auto_applier_bot(db, current_user.id)
     
-    # Get user's applications
-    applications = db.query(JobApplication).filter(
-        JobApplication.user_id == current_user.id
-    ).all()
+    # Application totals are kept on the auto-applier bot; users without one get a single aggregate
+    if bot:
+        jobs_applied = bot.jobs_applied or 0
+        total_earnings_potential = bot.total_bid_amount or 0.0
+    else:
+        jobs_applied, total_earnings_potential = application_totals(db, current_user.id)
     
     total_jobs_found = bot.jobs_scraped if bot else 0
-    jobs_applied = len(applications)
     success_rate = (jobs_applied / total_jobs_found * 100) if total_jobs_found > 0 else 0
     
-    # Calculate potential earnings
-    total_earnings_potential = sum(app.bid_amount for app in applications if app.bid_amount)
-    
     return AutoApplyStats(
         total_jobs_found=total_jobs_found,
         jobs_applied=jobs_applied,
@@ -198,6 +182,60 @@ def get_auto_applier_stats(
         last_activity=bot.last_active if bot else None
     )
 
+@router.post("/apply/batch", response_model=AutoApplyBatchResponse)
+def batch_auto_apply(
+    request: AutoApplyBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Auto-apply to many jobs at once, reporting the outcome per job"""
+    job_ids = list(dict.fromkeys(request.job_ids))
+    jobs = jobs_by_id(db, job_ids)
+    already_applied = {
+        job_id for (job_id,) in db.query(JobApplication.job_id).filter(
+            JobApplication.user_id == current_user.id,
+            JobApplication.job_id.in_(job_ids)
+        )
+    }
+    applier_filter = get_applier_filter(db, current_user.id)
+    
+    results = {}
+    rows = []
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if job is None:
+            results[job_id] = AutoApplyBatchResult(job_id=job_id, status="not_found")
+        elif job.status != JobStatus.OPEN:
+            results[job_id] = AutoApplyBatchResult(job_id=job_id, status="not_open")
+        elif job_id in already_applied:
+            results[job_id] = AutoApplyBatchResult(job_id=job_id, status="already_applied")
+        else:
+            proposal, bid_amount = applier_filter.draft_application(job.title, job.budget)
+            rows.append({
+                "job_id": job_id,
+                "user_id": current_user.id,
+                "proposal": proposal,
+                "bid_amount": bid_amount,
+                "status": "pending"
+            })
+    
+    # One multi-row insert; the (job_id, user_id) constraint catches concurrent applies
+    inserted = insert_ignore_duplicates(db, JobApplication, rows, ["job_id", "user_id"])
+    bid_total = 0.0
+    for row in rows:
+        if (row["job_id"], current_user.id) in inserted:
+            bid_total += row["bid_amount"]
+            results[row["job_id"]] = AutoApplyBatchResult(
+                job_id=row["job_id"], status="applied", proposal=row["proposal"], bid_amount=row["bid_amount"]
+            )
+        else:
+            results[row["job_id"]] = AutoApplyBatchResult(job_id=row["job_id"], status="already_applied")
+    if inserted:
+        record_applications(db, current_user.id, len(inserted), bid_total)
+    db.commit()
+    
+    return AutoApplyBatchResponse(applied=len(inserted), results=[results[job_id] for job_id in job_ids])
+
 @router.post("/apply/{job_id}")
 def manual_auto_apply(
     job_id: int,
@@ -221,9 +259,8 @@ def manual_auto_apply(
     if existing_application:
         raise HTTPException(status_code=400, detail="Already applied for this job")
     
-    # Generate AI proposal (mock)
-    proposal = f"I'm interested in your project '{job.title}'. I have relevant experience and can deliver high-quality results within your budget and timeline."
-    bid_amount = job.budget * 0.9  # 10% discount
+    # Generate AI proposal (mock), preferring the user's own template
+    proposal, bid_amount = get_applier_filter(db, current_user.id).draft_application(job.title, job.budget)
     
     # Create application
     application = JobApplication(
@@ -233,7 +270,13 @@ def manual_auto_apply(
         bid_amount=bid_amount
     )
     db.add(application)
-    db.commit()
+    record_applications(db, current_user.id, 1, bid_amount)
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request (or the worker pool) applied first
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Already applied for this job")
     
     return {
         "message": "Auto-application submitted successfully",
@@ -248,23 +291,36 @@ def get_job_suggestions(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get job suggestions based on user's auto-applier configuration"""
-    # Mock job suggestions based on user preferences
-    suggestions = db.query(Job).filter(
-        Job.status == JobStatus.OPEN,
-        Job.budget >= 100,
-        Job.budget <= 5000
-    ).limit(limit).all()
+    """Get job suggestions based on user's skills and auto-applier configuration"""
+    matches = suggest_jobs(db, current_user, limit)
+    jobs = jobs_by_id(db, (job_id for job_id, _ in matches))
     
-    return [
-        {
+    suggestions = []
+    for job_id, match_score in matches:
+        job = jobs.get(job_id)
+        if job is None:
+            continue
+        description = job.description or ""
+        suggestions.append({
             "id": job.id,
             "title": job.title,
-            "description": job.description[:200] + "..." if len(job.description) > 200 else job.description,
+            "description": description[:200] + "..." if len(description) > 200 else description,
             "budget": job.budget,
             "platform": job.platform,
             "is_urgent": job.is_urgent,
-            "match_score": 0.85  # Mock match score
-        }
-        for job in suggestions
-    ] 
\ No newline at end of file
+            "match_score": match_score
+        })
+    return suggestions
+
+@router.get("/worker/metrics")
+def get_auto_apply_worker_metrics(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Auto-apply worker throughput for this process and queue depth (admin only)"""
+    return {
+        "workers": auto_apply_worker.pool.size,
+        "running": auto_apply_worker.pool.running,
+        **auto_apply_worker.metrics.snapshot(),
+        "queue": auto_apply_worker.queue_depth(db)
+    }
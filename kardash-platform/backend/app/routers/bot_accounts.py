@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -8,6 +8,8 @@ from ..database import get_db
 from ..models import BotAccount, User
 from ..schemas import BotAccountCreate, BotAccountUpdate, BotAccountResponse
 from ..routers.auth import get_current_admin_user, get_current_user
+from ..pagination import paginate
+from .. import stats
 
 router = APIRouter(prefix="/bot-accounts", tags=["Bot Accounts"])
 
@@ -18,6 +20,8 @@ def get_bot_accounts(
     limit: int = 100,
     platform: Optional[str] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    response: Response = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -29,8 +33,7 @@ def get_bot_accounts(
     if status:
         query = query.filter(BotAccount.status == status)
     
-    bot_accounts = query.offset(skip).limit(limit).all()
-    return bot_accounts
+    return paginate(query, BotAccount.created_at, BotAccount.id, limit, skip=skip, cursor=cursor, response=response)
 
 @router.post("/", response_model=BotAccountResponse)
 def create_bot_account(
@@ -138,24 +141,4 @@ def get_bot_accounts_overview(
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get bot accounts overview statistics (admin only)"""
-    total_bot_accounts = db.query(BotAccount).count()
-    active_bot_accounts = db.query(BotAccount).filter(BotAccount.status == "active").count()
-    paused_bot_accounts = db.query(BotAccount).filter(BotAccount.status == "paused").count()
-    
-    # Get total jobs applied by all bot accounts
-    total_jobs_applied = db.query(BotAccount).with_entities(
-        db.func.sum(BotAccount.jobs_applied)
-    ).scalar() or 0
-    
-    # Calculate average success rate
-    avg_success_rate = db.query(BotAccount).with_entities(
-        db.func.avg(BotAccount.success_rate)
-    ).scalar() or 0.0
-    
-    return {
-        "total_bot_accounts": total_bot_accounts,
-        "active_bot_accounts": active_bot_accounts,
-        "paused_bot_accounts": paused_bot_accounts,
-        "total_jobs_applied": total_jobs_applied,
-        "average_success_rate": avg_success_rate
-    } 
\ No newline at end of file
+    return stats.bot_account_stats(db)
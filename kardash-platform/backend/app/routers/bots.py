@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import json
 
-from ..database import get_db
+from ..database import SessionLocal, get_db, get_read_db
 from ..models import Bot, BotStatus, BotActivity, User
-from ..schemas import BotCreate, BotUpdate, BotResponse, BotActivityResponse
+from ..schemas import BotCreate, BotUpdate, BotResponse, BotActivityResponse, BotActivityRollupResponse, ScrapeRequest, ScrapeRunStatus
 from ..routers.auth import get_current_admin_user
+from ..pagination import paginate
+from .. import stats, activity_log, activity_rollups, scraping
+from ..activity_log import log_activity
 
 router = APIRouter(prefix="/bots", tags=["Bots"])
 
@@ -112,14 +115,7 @@ def start_bot(
     bot.last_active = datetime.utcnow()
     db.commit()
     
-    # Log activity
-    activity = BotActivity(
-        bot_id=bot_id,
-        activity_type="start",
-        details=json.dumps({"status": "started"})
-    )
-    db.add(activity)
-    db.commit()
+    log_activity(bot_id, "start", {"status": "started"})
     
     return {"message": f"Bot {bot.name} started successfully"}
 
@@ -137,14 +133,7 @@ def stop_bot(
     bot.status = BotStatus.INACTIVE
     db.commit()
     
-    # Log activity
-    activity = BotActivity(
-        bot_id=bot_id,
-        activity_type="stop",
-        details=json.dumps({"status": "stopped"})
-    )
-    db.add(activity)
-    db.commit()
+    log_activity(bot_id, "stop", {"status": "stopped"})
     
     return {"message": f"Bot {bot.name} stopped successfully"}
 
@@ -152,14 +141,28 @@ def stop_bot(
 def get_bot_activities(
     bot_id: int,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    response: Response = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Get bot activities (admin only)"""
-    activities = db.query(BotActivity).filter(
-        BotActivity.bot_id == bot_id
-    ).order_by(BotActivity.created_at.desc()).limit(limit).all()
-    return activities
+    """Get bot activities, newest first (admin only)"""
+    query = db.query(BotActivity).filter(BotActivity.bot_id == bot_id)
+    return paginate(query, BotActivity.created_at, BotActivity.id, limit, cursor=cursor, response=response)
+
+@router.get("/{bot_id}/activity-rollups", response_model=List[BotActivityRollupResponse])
+def get_bot_activity_rollups(
+    bot_id: int,
+    period: str = "hourly",
+    days: int = Query(7, ge=1, le=365),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get hourly or daily bot activity counts by type (admin only)"""
+    if period not in activity_rollups.PERIODS:
+        raise HTTPException(status_code=400, detail="period must be hourly or daily")
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    return activity_rollups.bot_rollups(db, bot_id, period, since)
 
 @router.get("/stats/overview")
 def get_bots_overview(
@@ -167,18 +170,49 @@ def get_bots_overview(
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get bots overview statistics (admin only)"""
-    total_bots = db.query(Bot).count()
-    active_bots = db.query(Bot).filter(Bot.status == BotStatus.ACTIVE).count()
-    total_jobs_scraped = db.query(Bot).with_entities(
-        db.func.sum(Bot.jobs_scraped)
-    ).scalar() or 0
-    total_jobs_applied = db.query(Bot).with_entities(
-        db.func.sum(Bot.jobs_applied)
-    ).scalar() or 0
+    bot_stats = stats.bot_stats(db)
     
     return {
-        "total_bots": total_bots,
-        "active_bots": active_bots,
-        "total_jobs_scraped": total_jobs_scraped,
-        "total_jobs_applied": total_jobs_applied
-    } 
\ No newline at end of file
+        "total_bots": bot_stats.total_bots,
+        "active_bots": bot_stats.active_bots,
+        "total_jobs_scraped": bot_stats.total_jobs_scraped,
+        "total_jobs_applied": bot_stats.total_jobs_applied
+    }
+
+@router.get("/activity-log/stats")
+def get_activity_log_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get buffered activity writer metrics (admin only)"""
+    return activity_log.writer.stats()
+
+@router.post("/scrape", response_model=ScrapeRunStatus, status_code=202)
+def start_scrape(
+    background_tasks: BackgroundTasks,
+    scrape: Optional[ScrapeRequest] = None,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Scrape jobs with every active bot, or the given ones, in the background (admin only)"""
+    scrape_run = scraping.create()
+    if scrape_run is None:
+        raise HTTPException(status_code=409, detail="A scrape run is already in progress")
+    background_tasks.add_task(scraping.run, SessionLocal, scrape_run, scrape.bot_ids if scrape else None)
+    return scrape_run
+
+@router.get("/scrape/runs", response_model=List[ScrapeRunStatus])
+def get_scrape_runs(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get recent scrape runs of this process (admin only)"""
+    return scraping.recent()
+
+@router.get("/scrape/runs/{run_id}", response_model=ScrapeRunStatus)
+def get_scrape_run(
+    run_id: str,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get a scrape run's progress and throughput (admin only)"""
+    scrape_run = scraping.get(run_id)
+    if scrape_run is None:
+        raise HTTPException(status_code=404, detail="Scrape run not found")
+    return scrape_run
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
-from ..database import get_db
-from ..models import User, Job, JobStatus, Bot, BotStatus, DashboardStats
-from ..schemas import DashboardOverview, JobStats, UserStats, BotStats, RecentActivity
+from ..database import get_db, get_read_db, get_async_read_db, run_db
+from ..models import User, UserRole, Job, JobStatus, Bot, BotStatus, DashboardStats
+from ..schemas import DashboardOverview, JobStats, UserStats, BotStats, CombinedStats, RecentActivity, EarningsOverview, EarningsChart
 from ..routers.auth import get_current_user, get_current_admin_user
+from .. import stats, counters, earnings
+from ..response_cache import cached_response, store_response, response_cache
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -16,111 +18,89 @@ router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 # Routes
 @router.get("/overview", response_model=DashboardOverview)
-def get_dashboard_overview(
-    db: Session = Depends(get_db),
+async def get_dashboard_overview(
+    request: Request,
+    db=Depends(get_async_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get dashboard overview (admin only)"""
-    # Get or create dashboard stats
-    stats = db.query(DashboardStats).first()
-    if not stats:
-        stats = DashboardStats()
-        db.add(stats)
-        db.commit()
-        db.refresh(stats)
-    
-    # Update stats with real data
-    total_jobs = db.query(Job).count()
-    active_jobs = db.query(Job).filter(Job.status == JobStatus.OPEN).count()
-    total_users = db.query(User).count()
+    cache_key, cached = cached_response(request, ("jobs", "users"), role=current_user.role)
+    if cached is not None:
+        return cached
     
-    # Calculate earnings (mock data for now)
-    total_earnings = 15000.0
-    monthly_earnings = 2500.0
+    # Single primary-key read of the materialized counters (see app/counters.py)
+    dashboard_stats = await run_db(db, counters.get_dashboard_stats)
     
-    return DashboardOverview(
-        total_jobs=total_jobs,
-        active_jobs=active_jobs,
-        total_users=total_users,
-        total_earnings=total_earnings,
-        monthly_earnings=monthly_earnings,
-        commission_rate=stats.commission_rate
-    )
+    return store_response(cache_key, DashboardOverview, DashboardOverview(
+        total_jobs=dashboard_stats.total_jobs,
+        active_jobs=dashboard_stats.active_jobs,
+        total_users=dashboard_stats.total_users,
+        total_earnings=dashboard_stats.total_earnings,
+        monthly_earnings=counters.current_monthly_earnings(dashboard_stats),
+        commission_rate=dashboard_stats.commission_rate
+    ))
 
 @router.get("/jobs/stats", response_model=JobStats)
-def get_job_stats(
-    db: Session = Depends(get_db),
+async def get_job_stats(
+    db=Depends(get_async_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get job statistics (admin only)"""
-    total_jobs = db.query(Job).count()
-    open_jobs = db.query(Job).filter(Job.status == JobStatus.OPEN).count()
-    in_progress_jobs = db.query(Job).filter(Job.status == JobStatus.IN_PROGRESS).count()
-    completed_jobs = db.query(Job).filter(Job.status == JobStatus.COMPLETED).count()
-    urgent_jobs = db.query(Job).filter(Job.is_urgent == True).count()
-    
-    return JobStats(
-        total_jobs=total_jobs,
-        open_jobs=open_jobs,
-        in_progress_jobs=in_progress_jobs,
-        completed_jobs=completed_jobs,
-        urgent_jobs=urgent_jobs
-    )
+    return await run_db(db, stats.job_stats)
 
 @router.get("/users/stats", response_model=UserStats)
-def get_user_stats(
-    db: Session = Depends(get_db),
+async def get_user_stats(
+    db=Depends(get_async_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get user statistics (admin only)"""
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    freelancers = db.query(User).filter(User.role == UserRole.FREELANCER).count()
-    admins = db.query(User).filter(User.role == UserRole.ADMIN).count()
-    
-    # Count new users this month
-    first_day_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    new_users_this_month = db.query(User).filter(
-        User.created_at >= first_day_of_month
-    ).count()
-    
-    return UserStats(
-        total_users=total_users,
-        active_users=active_users,
-        freelancers=freelancers,
-        admins=admins,
-        new_users_this_month=new_users_this_month
-    )
+    return await run_db(db, stats.user_stats)
 
 @router.get("/bots/stats", response_model=BotStats)
-def get_bot_stats(
-    db: Session = Depends(get_db),
+async def get_bot_stats(
+    db=Depends(get_async_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get bot statistics (admin only)"""
-    total_bots = db.query(Bot).count()
-    active_bots = db.query(Bot).filter(Bot.status == BotStatus.ACTIVE).count()
-    total_jobs_scraped = db.query(func.sum(Bot.jobs_scraped)).scalar() or 0
-    total_jobs_applied = db.query(func.sum(Bot.jobs_applied)).scalar() or 0
-    
-    # Calculate average success rate
-    avg_success_rate = db.query(func.avg(Bot.success_rate)).scalar() or 0.0
+    return await run_db(db, stats.bot_stats)
+
+@router.get("/stats/all", response_model=CombinedStats)
+async def get_all_stats(
+    db=Depends(get_async_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get job, user and bot statistics in one response (admin only)"""
+    return await run_db(db, stats.all_stats)
+
+@router.post("/stats/reconcile", response_model=DashboardOverview)
+def reconcile_dashboard_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Recompute the materialized dashboard counters from the base tables (admin only)"""
+    dashboard_stats = counters.reconcile_dashboard_stats(db)
     
-    return BotStats(
-        total_bots=total_bots,
-        active_bots=active_bots,
-        total_jobs_scraped=total_jobs_scraped,
-        total_jobs_applied=total_jobs_applied,
-        average_success_rate=avg_success_rate
+    return DashboardOverview(
+        total_jobs=dashboard_stats.total_jobs,
+        active_jobs=dashboard_stats.active_jobs,
+        total_users=dashboard_stats.total_users,
+        total_earnings=dashboard_stats.total_earnings,
+        monthly_earnings=counters.current_monthly_earnings(dashboard_stats),
+        commission_rate=dashboard_stats.commission_rate
     )
 
 @router.get("/recent-activity", response_model=List[RecentActivity])
 def get_recent_activity(
+    request: Request,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get recent activity (admin only)"""
+    cache_key, cached = cached_response(request, ("jobs",), role=current_user.role)
+    if cached is not None:
+        return cached
+    
     # This would typically combine activities from multiple sources
     # For now, return recent jobs
     recent_jobs = db.query(Job).order_by(Job.created_at.desc()).limit(limit).all()
@@ -135,52 +115,37 @@ def get_recent_activity(
             timestamp=job.created_at
         ))
     
-    return activities
+    return store_response(cache_key, List[RecentActivity], activities)
 
-@router.get("/earnings/overview")
+@router.get("/earnings/overview", response_model=EarningsOverview)
 def get_earnings_overview(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get earnings overview (admin only)"""
-    # Mock earnings data
-    return {
-        "total_earnings": 15000.0,
-        "monthly_earnings": 2500.0,
-        "weekly_earnings": 600.0,
-        "daily_earnings": 85.0,
-        "commission_rate": 0.15,
-        "platform_fees": 2250.0,
-        "net_earnings": 12750.0
-    }
+    return earnings.overview(db)
 
-@router.get("/earnings/chart")
+@router.get("/earnings/chart", response_model=EarningsChart)
 def get_earnings_chart(
     period: str = "monthly",
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get earnings chart data (admin only)"""
-    # Mock chart data
-    if period == "monthly":
-        return {
-            "labels": ["Jan", "Feb", "Mar", "Apr", "May", "Jun"],
-            "data": [1200, 1800, 2200, 1900, 2500, 2800]
-        }
-    elif period == "weekly":
-        return {
-            "labels": ["Week 1", "Week 2", "Week 3", "Week 4"],
-            "data": [500, 600, 700, 800]
-        }
-    else:  # daily
-        return {
-            "labels": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"],
-            "data": [100, 120, 90, 110, 130, 80, 95]
-        }
+    return earnings.chart(db, period)
+
+@router.post("/earnings/backfill")
+def backfill_earnings(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Rebuild the earnings rollups from completed jobs (admin only)"""
+    jobs_counted = earnings.backfill(db)
+    return {"message": f"Earnings rollups rebuilt from {jobs_counted} completed jobs"}
 
 @router.get("/freelancer/stats")
 def get_freelancer_stats(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get freelancer-specific statistics"""
@@ -202,4 +167,9 @@ def get_freelancer_stats(
         "total_earnings": total_earnings,
         "success_rate": success_rate,
         "average_job_value": total_earnings / len(completed_jobs) if completed_jobs else 0
-    } 
\ No newline at end of file
+    }
+
+@router.get("/cache/stats")
+def get_response_cache_stats(current_user: User = Depends(get_current_admin_user)):
+    """Response cache hit rate and invalidations in this process (admin only)"""
+    return response_cache.stats()
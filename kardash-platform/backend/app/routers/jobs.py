@@ -1,76 +1,134 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from ..database import get_db
+from ..database import get_db, get_async_read_db, run_db
 from ..models import Job, JobStatus, User, JobApplication, Notification
-from ..schemas import JobCreate, JobUpdate, JobResponse, JobApplicationCreate, JobApplicationResponse, JobCompletionCreate
+from ..schemas import JobCreate, JobUpdate, JobResponse, JobAdminResponse, JobApplicationCreate, JobApplicationResponse, JobCompletionCreate
 from ..routers.auth import get_current_user, get_current_admin_user
+from ..search import apply_search
+from ..pagination import paginate
+from ..loaders import with_job_relations
+from .. import counters, earnings, unread_counters
+from ..applier import record_applications
+from .. import matching, auto_apply_worker, conditional
+from ..response_cache import cached_response, store_response, invalidate, job_tags
+from ..notification_hub import publish_notifications
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
 # Using schemas from schemas.py
 
 # Routes
-@router.get("/", response_model=List[JobResponse])
+@router.get("/", response_model=List[JobAdminResponse])
 def get_jobs(
     skip: int = 0,
     limit: int = 100,
     status: Optional[JobStatus] = None,
     platform: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    request: Request = None,
+    response: Response = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Get all jobs (admin only)"""
+    """Get all jobs with their bot account and assignee (admin only); searches are offset-only (no X-Next-Cursor)"""
     query = db.query(Job)
     
     if status:
         query = query.filter(Job.status == status)
     if platform:
         query = query.filter(Job.platform == platform)
+    
+    validators = conditional.list_validators(query, Job)
+    unchanged = conditional.check(request, *validators)
+    if unchanged is not None:
+        return unchanged
+    conditional.set_validators(response, *validators)
+    
     if search:
-        query = query.filter(Job.title.contains(search) | Job.description.contains(search))
+        # Relevance-ranked results are offset-paginated and carry no cursor; a
+        # cursor taken from an unsearched list pages the matches by recency instead
+        query = apply_search(query, search, rank=cursor is None)
+        if cursor is None:
+            return with_job_relations(query).offset(skip).limit(limit).all()
     
-    jobs = query.offset(skip).limit(limit).all()
-    return jobs
+    query = with_job_relations(query)
+    return paginate(query, Job.created_at, Job.id, limit, skip=skip, cursor=cursor, response=response)
+
+def _available_jobs_query(session: Session, filter_type: Optional[str]):
+    query = session.query(Job).filter(Job.status == JobStatus.OPEN)
+    if filter_type == "urgent":
+        query = query.filter(Job.is_urgent == True)
+    return query
 
 @router.get("/available", response_model=List[JobResponse])
-def get_available_jobs(
+async def get_available_jobs(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = Query(None),
     sort_by: Optional[str] = Query("created_at"),
     filter_type: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None),
+    response: Response = None,
+    request: Request = None,
+    db=Depends(get_async_read_db)
 ):
-    """Get available jobs for freelancers"""
-    query = db.query(Job).filter(Job.status == JobStatus.OPEN)
+    """Get available jobs for freelancers; searches are offset-only unless sorted by budget"""
+    cache_key, cached = cached_response(request, ("jobs",))
+    if cached is not None:
+        return conditional.check_cached(request, cached)
     
-    if search:
-        query = query.filter(Job.title.contains(search) | Job.description.contains(search))
-    if filter_type == "urgent":
-        query = query.filter(Job.is_urgent == True)
+    validators = await run_db(db, lambda session: conditional.list_validators(
+        _available_jobs_query(session, filter_type), Job
+    ))
+    unchanged = conditional.check(request, *validators)
+    if unchanged is not None:
+        return unchanged
+    conditional.set_validators(response, *validators)
     
-    if sort_by == "budget-high":
-        query = query.order_by(Job.budget.desc())
-    elif sort_by == "budget-low":
-        query = query.order_by(Job.budget.asc())
-    else:
-        query = query.order_by(Job.created_at.desc())
+    def load(session: Session):
+        query = _available_jobs_query(session, filter_type)
+        
+        budget_sort = sort_by in ("budget-high", "budget-low")
+        
+        # Search results are ranked by relevance unless an explicit budget sort or a cursor is given
+        if search:
+            ranked = not budget_sort and cursor is None
+            query = apply_search(query, search, rank=ranked)
+            if ranked:
+                return query.order_by(Job.created_at.desc()).offset(skip).limit(limit).all()
+        
+        # Jobs without a budget sort as 0
+        if sort_by == "budget-high":
+            return paginate(query, Job.budget, Job.id, limit, skip=skip, cursor=cursor, response=response,
+                            nulls_as=0.0)
+        elif sort_by == "budget-low":
+            return paginate(query, Job.budget, Job.id, limit, skip=skip, cursor=cursor, response=response,
+                            descending=False, nulls_as=0.0)
+        return paginate(query, Job.created_at, Job.id, limit, skip=skip, cursor=cursor, response=response)
     
-    jobs = query.offset(skip).limit(limit).all()
-    return jobs
+    return store_response(cache_key, List[JobResponse], await run_db(db, load), response)
 
 @router.get("/my", response_model=List[JobResponse])
 def get_my_jobs(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get jobs assigned to current freelancer"""
-    jobs = db.query(Job).filter(Job.user_id == current_user.id).all()
+    query = db.query(Job).filter(Job.user_id == current_user.id)
+    validators = conditional.list_validators(query, Job)
+    unchanged = conditional.check(request, *validators)
+    if unchanged is not None:
+        return unchanged
+    conditional.set_validators(response, *validators)
+    jobs = query.all()
     return jobs
 
 @router.post("/", response_model=JobResponse)
@@ -89,17 +147,36 @@ def create_job(
         user_id=current_user.id
     )
     db.add(db_job)
+    db.flush()
+    counters.job_created(db, db_job)
+    auto_apply_worker.enqueue_jobs(db, [db_job.id])
     db.commit()
     db.refresh(db_job)
+    matching.index_job(db_job)
+    invalidate("jobs")
     return db_job
 
 @router.get("/{job_id}", response_model=JobResponse)
-def get_job(job_id: int, db: Session = Depends(get_db)):
+def get_job(job_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """Get a specific job"""
+    cache_key, cached = cached_response(request, (f"job:{job_id}",))
+    if cached is not None:
+        return conditional.check_cached(request, cached)
+    
+    if conditional.has_preconditions(request):
+        # Compare against the version columns alone before loading the whole row
+        version = db.query(Job.id, Job.updated_at, Job.created_at).filter(Job.id == job_id).first()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        unchanged = conditional.check(request, *conditional.row_validators(version))
+        if unchanged is not None:
+            return unchanged
+    
     job = db.query(Job).filter(Job.id == job_id).first()
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+    conditional.set_validators(response, *conditional.row_validators(job))
+    return store_response(cache_key, JobResponse, job, response)
 
 @router.put("/{job_id}", response_model=JobResponse)
 def update_job(
@@ -113,12 +190,18 @@ def update_job(
     if db_job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    old_status = db_job.status
     update_data = job_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_job, field, value)
     
+    counters.job_status_changed(db, old_status, db_job.status)
+    if db_job.status == JobStatus.OPEN and old_status != JobStatus.OPEN:
+        auto_apply_worker.requeue_job(db, db_job.id)
     db.commit()
     db.refresh(db_job)
+    matching.index_job(db_job)
+    invalidate(*job_tags(job_id))
     return db_job
 
 @router.delete("/{job_id}")
@@ -133,7 +216,13 @@ def delete_job(
         raise HTTPException(status_code=404, detail="Job not found")
     
     db.delete(db_job)
+    db.flush()
+    counters.job_deleted(db, db_job)
+    if db_job.status == JobStatus.COMPLETED:
+        earnings.record_completion(db, db_job, sign=-1)
     db.commit()
+    matching.unindex_job(job_id)
+    invalidate(*job_tags(job_id))
     return {"message": "Job deleted successfully"}
 
 @router.post("/{job_id}/apply", response_model=JobApplicationResponse)
@@ -167,7 +256,12 @@ def apply_for_job(
         bid_amount=application.bid_amount
     )
     db.add(db_application)
-    db.commit()
+    record_applications(db, current_user.id, 1, application.bid_amount)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="You have already applied for this job")
     db.refresh(db_application)
     return db_application
 
@@ -187,6 +281,7 @@ def deliver_job(
     
     job.status = "delivered"
     db.commit()
+    invalidate(*job_tags(job_id))
     return {"message": "Job delivered successfully"}
 
 @router.post("/{job_id}/complete", response_model=JobResponse)
@@ -230,8 +325,12 @@ def complete_job(
     for field, value in update_data.items():
         setattr(db_job, field, value)
     
+    counters.job_completed(db, db_job)
+    earnings.record_completion(db, db_job)
     db.commit()
     db.refresh(db_job)
+    matching.index_job(db_job)
+    invalidate(*job_tags(job_id))
     
     # Create notification for freelancer
     notification = Notification(
@@ -240,6 +339,8 @@ def complete_job(
         message=f"Your job '{db_job.title}' was completed. Earned: ${payment_amount:.2f}"
     )
     db.add(notification)
+    unread_counters.adjust(db, {notification.user_id: 1})
     db.commit()
+    publish_notifications([notification])
     
     return db_job 
\ No newline at end of file
@@ -1,44 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 
-from ..database import get_db
+from ..database import SessionLocal, get_db, get_async_db, get_async_read_db, run_db
 from ..models import Notification, User
-from ..schemas import NotificationCreate, NotificationResponse
-from ..routers.auth import get_current_user, get_current_admin_user
+from ..schemas import NotificationCreate, NotificationResponse, NotificationBroadcast, NotificationBroadcastStatus
+from ..routers.auth import get_current_user, get_current_admin_user, get_stream_user
+from ..pagination import paginate
+from .. import broadcasts, notification_hub, notification_retention, unread_counters
+from ..notification_hub import hub, publish_notifications
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 # Routes
 @router.get("/", response_model=List[NotificationResponse])
-def get_notifications(
+async def get_notifications(
     skip: int = 0,
     limit: int = 50,
     unread_only: bool = False,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    response: Response = None,
+    db=Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get notifications for current user"""
-    query = db.query(Notification).filter(Notification.user_id == current_user.id)
-    
-    if unread_only:
-        query = query.filter(Notification.is_read == False)
+    def load(session: Session):
+        query = session.query(Notification).filter(Notification.user_id == current_user.id)
+        
+        if unread_only:
+            query = query.filter(Notification.is_read == False)
+        
+        return paginate(query, Notification.time, Notification.id, limit, skip=skip, cursor=cursor, response=response)
     
-    notifications = query.order_by(Notification.time.desc()).offset(skip).limit(limit).all()
-    return notifications
+    return await run_db(db, load)
 
 @router.get("/unread-count")
-def get_unread_count(
-    db: Session = Depends(get_db),
+async def get_unread_count(
+    db=Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get count of unread notifications for current user"""
-    count = db.query(Notification).filter(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    ).count()
-    return {"unread_count": count}
+    unread_count = unread_counters.cached_unread_count(current_user.id)
+    if unread_count is None:
+        unread_count = await run_db(db, unread_counters.unread_count, current_user.id)
+    return {"unread_count": unread_count}
+
+@router.get("/unread-count/stats")
+def get_unread_count_stats(current_user: User = Depends(get_current_admin_user)):
+    """Unread counter cache and last repair for this worker process (admin only)"""
+    return unread_counters.stats()
+
+@router.post("/unread-count/repair")
+def repair_unread_counts(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Recompute every unread counter from notifications (admin only)"""
+    return {"rows_fixed": unread_counters.repair(db)}
+
+@router.get("/stream")
+async def stream_notifications(
+    db=Depends(get_async_read_db),
+    current_user: User = Depends(get_stream_user),
+    last_event_id: Optional[str] = Header(None)
+):
+    """Server-sent events: the unread count on connect, then every new notification"""
+    # Subscribe before counting so nothing created in between is missed
+    queue = hub.subscribe(current_user.id)
+    unread_count = unread_counters.cached_unread_count(current_user.id)
+    if unread_count is None:
+        unread_count = await run_db(db, unread_counters.unread_count, current_user.id)
+    first_events = [{"event": "unread_count", "data": {"unread_count": unread_count}}]
+    # A reconnecting EventSource sends the id of the last notification it got
+    if last_event_id and last_event_id.isdigit():
+        first_events += await run_db(db, notification_hub.missed_notifications, current_user.id, int(last_event_id))
+    return StreamingResponse(
+        notification_hub.stream(current_user.id, queue, first_events),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: stop nginx from holding events back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/stream/stats")
+def get_stream_stats(current_user: User = Depends(get_current_admin_user)):
+    """Open notification streams and delivery counters for this worker process (admin only)"""
+    return hub.stats()
 
 @router.post("/", response_model=NotificationResponse)
 def create_notification(
@@ -53,27 +102,44 @@ def create_notification(
         message=notification.message
     )
     db.add(db_notification)
+    unread_counters.adjust(db, {notification.user_id: 1})
     db.commit()
     db.refresh(db_notification)
+    publish_notifications([db_notification])
     return db_notification
 
 @router.post("/{notification_id}/mark-read")
-def mark_notification_read(
+async def mark_notification_read(
     notification_id: int,
-    db: Session = Depends(get_db),
+    db=Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """Mark a notification as read"""
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == current_user.id
-    ).first()
+    def mark(session: Session) -> bool:
+        # Guarded on is_read so concurrent requests decrement the counter once between them
+        marked = session.execute(
+            update(Notification)
+            .where(
+                Notification.id == notification_id,
+                Notification.user_id == current_user.id,
+                Notification.is_read == False
+            )
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if marked:
+            unread_counters.adjust(session, {current_user.id: -marked})
+            session.commit()
+            return True
+        return session.query(
+            session.query(Notification).filter(
+                Notification.id == notification_id,
+                Notification.user_id == current_user.id
+            ).exists()
+        ).scalar()
     
-    if notification is None:
+    if not await run_db(db, mark):
         raise HTTPException(status_code=404, detail="Notification not found")
-    
-    notification.is_read = True
-    db.commit()
     return {"message": "Notification marked as read"}
 
 @router.post("/mark-all-read")
@@ -82,10 +148,11 @@ def mark_all_notifications_read(
     current_user: User = Depends(get_current_user)
 ):
     """Mark all notifications as read for current user"""
-    db.query(Notification).filter(
+    marked = db.query(Notification).filter(
         Notification.user_id == current_user.id,
         Notification.is_read == False
     ).update({"is_read": True})
+    unread_counters.adjust(db, {current_user.id: -marked})
     db.commit()
     return {"message": "All notifications marked as read"}
 
@@ -96,15 +163,17 @@ def delete_notification(
     current_user: User = Depends(get_current_user)
 ):
     """Delete a notification"""
-    notification = db.query(Notification).filter(
-        Notification.id == notification_id,
-        Notification.user_id == current_user.id
-    ).first()
+    mine = (Notification.id == notification_id, Notification.user_id == current_user.id)
+    # Unread first, guarded on is_read, so concurrent deletes decrement the counter once between them
+    unread = db.execute(
+        delete(Notification).where(*mine, Notification.is_read == False).execution_options(synchronize_session=False)
+    ).rowcount
+    deleted = unread or db.execute(delete(Notification).where(*mine).execution_options(synchronize_session=False)).rowcount
     
-    if notification is None:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Notification not found")
     
-    db.delete(notification)
+    unread_counters.adjust(db, {current_user.id: -unread})
     db.commit()
     return {"message": "Notification deleted successfully"}
 
@@ -114,7 +183,13 @@ def delete_all_notifications(
     current_user: User = Depends(get_current_user)
 ):
     """Delete all notifications for current user"""
+    # Unread ones first, so the counter drops by exactly what was deleted
+    unread = db.query(Notification).filter(
+        Notification.user_id == current_user.id,
+        Notification.is_read == False
+    ).delete()
     db.query(Notification).filter(Notification.user_id == current_user.id).delete()
+    unread_counters.adjust(db, {current_user.id: -unread})
     db.commit()
     return {"message": "All notifications deleted successfully"}
 
@@ -146,15 +221,68 @@ def create_bulk_notifications(
     current_user: User = Depends(get_current_admin_user)
 ):
     """Create multiple notifications (admin only)"""
-    db_notifications = []
-    for notification_data in notifications:
-        db_notification = Notification(
-            user_id=notification_data.user_id,
-            type=notification_data.type,
-            message=notification_data.message
-        )
-        db_notifications.append(db_notification)
-    
-    db.add_all(db_notifications)
+    inserted = broadcasts.insert_notifications(
+        db, [{"user_id": n.user_id, "type": n.type, "message": n.message} for n in notifications]
+    )
     db.commit()
-    return {"message": f"Created {len(notifications)} notifications"} 
\ No newline at end of file
+    publish_notifications(inserted)
+    return {"message": f"Created {len(notifications)} notifications"}
+
+@router.post("/admin/broadcast", response_model=NotificationBroadcastStatus, status_code=202)
+def broadcast_notification(
+    broadcast_request: NotificationBroadcast,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Send one notification to all active users, a role, or a list of users, in the background (admin only)"""
+    if broadcast_request.target not in broadcasts.TARGETS:
+        raise HTTPException(status_code=400, detail=f"target must be one of {', '.join(broadcasts.TARGETS)}")
+    if broadcast_request.target == "role" and broadcast_request.role is None:
+        raise HTTPException(status_code=400, detail="role is required for target 'role'")
+    if broadcast_request.target == "user_ids" and not broadcast_request.user_ids:
+        raise HTTPException(status_code=400, detail="user_ids is required for target 'user_ids'")
+    
+    broadcast = broadcasts.create(broadcast_request.target)
+    background_tasks.add_task(
+        broadcasts.run,
+        SessionLocal,
+        broadcast,
+        broadcast_request.type,
+        broadcast_request.message,
+        role=broadcast_request.role,
+        user_ids=broadcast_request.user_ids,
+    )
+    return broadcast
+
+@router.get("/admin/broadcasts", response_model=List[NotificationBroadcastStatus])
+def get_broadcasts(current_user: User = Depends(get_current_admin_user)):
+    """Recent broadcasts started by this worker process (admin only)"""
+    return broadcasts.recent()
+
+@router.get("/admin/broadcasts/{broadcast_id}", response_model=NotificationBroadcastStatus)
+def get_broadcast(broadcast_id: str, current_user: User = Depends(get_current_admin_user)):
+    """Progress of one broadcast (admin only)"""
+    broadcast = broadcasts.get(broadcast_id)
+    if broadcast is None:
+        raise HTTPException(status_code=404, detail="Broadcast not found")
+    return broadcast
+
+@router.get("/admin/retention")
+def get_retention_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Retention settings, sweep metrics for this worker process and table sizes (admin only)"""
+    return {**notification_retention.metrics.snapshot(), **notification_retention.table_stats(db)}
+
+@router.post("/admin/retention/run", status_code=202)
+def run_retention(
+    background_tasks: BackgroundTasks,
+    older_than_days: Optional[int] = Query(None, ge=0),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Archive read notifications older than the retention period now, in the background (admin only)"""
+    if notification_retention.metrics.running:
+        raise HTTPException(status_code=409, detail="A retention sweep is already running")
+    background_tasks.add_task(notification_retention.run, SessionLocal, older_than_days)
+    return {"message": "Retention sweep started"}
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_async_db
 from pydantic import BaseModel
 from typing import List
 
@@ -17,7 +16,7 @@ class PayoutRequest(BaseModel):
     method_id: str
 
 @router.get("/methods")
-async def get_payout_methods(db: Session = Depends(get_db)):
+async def get_payout_methods(db=Depends(get_async_db)):
     """Get available payout methods"""
     # TODO: Implement payout methods logic
     return [
@@ -36,13 +35,13 @@ async def get_payout_methods(db: Session = Depends(get_db)):
     ]
 
 @router.post("/request")
-async def request_payout(payout: PayoutRequest, db: Session = Depends(get_db)):
+async def request_payout(payout: PayoutRequest, db=Depends(get_async_db)):
     """Request a payout"""
     # TODO: Implement payout request logic
     return {"message": "Payout request submitted successfully", "request_id": "temp_id"}
 
 @router.get("/history")
-async def get_payout_history(db: Session = Depends(get_db)):
+async def get_payout_history(db=Depends(get_async_db)):
     """Get payout transaction history"""
     # TODO: Implement payout history logic
     return [] 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
@@ -8,6 +8,10 @@ from ..database import get_db
 from ..models import User, UserRole
 from ..schemas import UserUpdate, UserResponse, UserStats
 from ..routers.auth import get_current_admin_user, get_current_user
+from ..pagination import paginate
+from .. import stats, counters, conditional
+from ..user_cache import invalidate_user
+from ..response_cache import invalidate
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -20,6 +24,9 @@ def get_users(
     limit: int = 100,
     role: Optional[UserRole] = None,
     is_active: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    request: Request = None,
+    response: Response = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
@@ -31,12 +38,22 @@ def get_users(
     if is_active is not None:
         query = query.filter(User.is_active == is_active)
     
-    users = query.offset(skip).limit(limit).all()
-    return users
+    validators = conditional.list_validators(query, User)
+    unchanged = conditional.check(request, *validators)
+    if unchanged is not None:
+        return unchanged
+    conditional.set_validators(response, *validators)
+    
+    return paginate(query, User.created_at, User.id, limit, skip=skip, cursor=cursor, response=response)
 
 @router.get("/me", response_model=UserResponse)
-def get_my_profile(current_user: User = Depends(get_current_user)):
+def get_my_profile(request: Request, response: Response, current_user: User = Depends(get_current_user)):
     """Get current user profile"""
+    validators = conditional.row_validators(current_user)
+    unchanged = conditional.check(request, *validators)
+    if unchanged is not None:
+        return unchanged
+    conditional.set_validators(response, *validators)
     return current_user
 
 @router.put("/me", response_model=UserResponse)
@@ -56,6 +73,7 @@ def update_my_profile(
         setattr(current_user, field, value)
     
     db.commit()
+    invalidate_user(current_user.id)
     db.refresh(current_user)
     return current_user
 
@@ -88,6 +106,7 @@ def update_user(
         setattr(db_user, field, value)
     
     db.commit()
+    invalidate_user(user_id)
     db.refresh(db_user)
     return db_user
 
@@ -106,7 +125,11 @@ def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
     
     db.delete(db_user)
+    db.flush()
+    counters.user_deleted(db)
     db.commit()
+    invalidate_user(user_id)
+    invalidate("users")
     return {"message": "User deleted successfully"}
 
 @router.post("/{user_id}/deactivate")
@@ -125,6 +148,7 @@ def deactivate_user(
     
     db_user.is_active = False
     db.commit()
+    invalidate_user(user_id)
     return {"message": "User deactivated successfully"}
 
 @router.post("/{user_id}/activate")
@@ -140,6 +164,7 @@ def activate_user(
     
     db_user.is_active = True
     db.commit()
+    invalidate_user(user_id)
     return {"message": "User activated successfully"}
 
 @router.get("/stats/overview", response_model=UserStats)
@@ -148,22 +173,4 @@ def get_users_overview(
     current_user: User = Depends(get_current_admin_user)
 ):
     """Get users overview statistics (admin only)"""
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    freelancers = db.query(User).filter(User.role == UserRole.FREELANCER).count()
-    admins = db.query(User).filter(User.role == UserRole.ADMIN).count()
-    
-    # Count new users this month
-    from datetime import datetime, timedelta
-    first_day_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    new_users_this_month = db.query(User).filter(
-        User.created_at >= first_day_of_month
-    ).count()
-    
-    return UserStats(
-        total_users=total_users,
-        active_users=active_users,
-        freelancers=freelancers,
-        admins=admins,
-        new_users_this_month=new_users_this_month
-    ) 
\ No newline at end of file
+    return stats.user_stats(db)
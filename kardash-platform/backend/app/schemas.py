@@ -66,6 +66,7 @@ class JobUpdate(BaseModel):
 
 class JobResponse(JobBase):
     id: int
+    budget: Optional[float] = None  # Stored as a float (or NULL), whatever JobCreate was given
     status: str
     original_platform_job_id: Optional[str] = None
     bot_account_id: Optional[int] = None
@@ -133,6 +134,10 @@ class BotAccountResponse(BotAccountBase):
     class Config:
         from_attributes = True
 
+class JobAdminResponse(JobResponse):
+    bot_account: Optional[BotAccountResponse] = None
+    assigned_to_user: Optional[UserResponse] = None
+
 # --- Bot Schemas ---
 class BotBase(BaseModel):
     name: str
@@ -165,9 +170,42 @@ class BotResponse(BotBase):
 class BotActivityResponse(BaseModel):
     id: int
     bot_id: int
+    bot_account_id: Optional[int] = None
+    activity_type: str
+    details: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class BotActivityRollupResponse(BaseModel):
+    bucket_start: datetime
     activity_type: str
-    details: str
+    count: int
+
+    class Config:
+        from_attributes = True
+
+# --- Scraping Schemas ---
+class ScrapeRequest(BaseModel):
+    bot_ids: Optional[List[int]] = None  # Default: every active bot
+
+class ScrapeRunStatus(BaseModel):
+    id: str
+    status: str  # queued, running, completed, failed
+    bots: int
+    pages: int
+    jobs_parsed: int
+    jobs_invalid: int
+    jobs_new: int
+    jobs_existing: int
+    errors: int
+    platforms: dict
+    seconds: Optional[float] = None
+    jobs_per_second: Optional[float] = None
     created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -180,6 +218,25 @@ class NotificationBase(BaseModel):
 class NotificationCreate(NotificationBase):
     user_id: int
 
+class NotificationBroadcast(NotificationBase):
+    target: str = "all"  # all, role, user_ids
+    role: Optional[UserRole] = None
+    user_ids: Optional[List[int]] = None
+
+class NotificationBroadcastStatus(BaseModel):
+    id: str
+    status: str  # queued, running, completed, failed
+    target: str
+    rows: int
+    seconds: Optional[float] = None
+    rows_per_second: Optional[float] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
 class NotificationResponse(NotificationBase):
     id: int
     user_id: int
@@ -231,6 +288,11 @@ class BotStats(BaseModel):
     total_jobs_applied: int
     average_success_rate: float
 
+class CombinedStats(BaseModel):
+    jobs: JobStats
+    users: UserStats
+    bots: BotStats
+
 class RecentActivity(BaseModel):
     id: int
     type: str
@@ -263,6 +325,19 @@ class AutoApplyResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class AutoApplyBatchRequest(BaseModel):
+    job_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+class AutoApplyBatchResult(BaseModel):
+    job_id: int
+    status: str  # applied, already_applied, not_found, not_open
+    proposal: Optional[str] = None
+    bid_amount: Optional[float] = None
+
+class AutoApplyBatchResponse(BaseModel):
+    applied: int
+    results: List[AutoApplyBatchResult]
+
 class AutoApplyStats(BaseModel):
     total_jobs_found: int
     jobs_applied: int
@@ -0,0 +1,535 @@
+import abc
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, func, or_, select, update
+
+from . import activity_log, auto_apply_worker, counters, matching
+from .activity_log import log_activity
+from .applier import AUTO_APPLIER_PLATFORM
+from .config import settings
+from .database import insert_ignore_duplicates
+from .models import Bot, BotAccount, BotStatus, Job, JobStatus
+from .response_cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+# Job scraping engine.
+#
+# Each bot scrapes one platform through a PlatformAdapter: fetch a raw result
+# page, parse it into postings, normalize each posting into Job column values.
+# A run scrapes every active bot (auto-applier bots excepted) concurrently on one
+# event loop:
+#
+# - page fetches for one platform are bounded by SCRAPER_PLATFORM_CONCURRENCY
+#   (a bot fetches that many pages at a time until one comes back empty);
+# - every fetch first takes a token from its BotAccount's rate limiter
+#   (SCRAPER_ACCOUNT_REQUESTS_PER_MINUTE, or "requests_per_minute" in the
+#   account config); a bot spreads its pages over the active accounts of its
+#   platform;
+# - parsed pages stream through a bounded queue to a single writer, which
+#   normalizes and upserts them in a worker thread, SCRAPER_UPSERT_BATCH_SIZE
+#   postings or whatever is queued at a time. New jobs are inserted as open
+#   (original_platform_job_id is the key); open jobs seen again get their
+#   details refreshed. The same transaction queues the new jobs for the
+#   auto-applier, adds to Bot.jobs_scraped and stamps Bot.last_active; once
+#   it commits, the upserted jobs are (re)indexed for matching.
+#
+# Every page is logged as a "scrape" or "error" bot activity, which feeds the
+# success rates. Runs start from POST /bots/scrape, every
+# SCRAPER_INTERVAL_SECONDS, or from the command line:
+#
+#     python -m app.scraping run [bot_id ...]
+#
+# Bots pick their adapter with "adapter" in their config ("fixture" with a
+# "path", or "http" with a "url"); otherwise the adapter registered for their
+# platform is used (register_adapter).
+
+UPDATE_FIELDS = ("title", "description", "budget", "type", "tags", "deadline", "client_rating",
+                 "estimated_hours", "is_urgent")
+LOOKUP_CHUNK = 500
+MAX_TRACKED = 50
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _config(raw: Optional[str]) -> dict:
+    try:
+        config = json.loads(raw) if raw else {}
+    except ValueError:
+        return {}
+    return config if isinstance(config, dict) else {}
+
+
+def _float(value) -> Optional[float]:
+    return float(value) if value is not None and value != "" else None
+
+
+class PlatformAdapter(abc.ABC):
+    """One job board: fetch raw result pages, parse them into postings, normalize postings into Job rows"""
+
+    def __init__(self, platform: str):
+        self.platform = platform
+
+    @abc.abstractmethod
+    async def fetch_page(self, account: Optional[BotAccount], page: int) -> Optional[str]:
+        """Raw body of result page `page` (from 0), or None past the last page"""
+
+    def parse(self, body: str) -> List[dict]:
+        return json.loads(body).get("jobs") or []
+
+    def normalize(self, posting: dict) -> Optional[dict]:
+        """Job column values for one posting, or None if it can't be used"""
+        external_id = posting.get("id")
+        title = (posting.get("title") or "").strip()
+        if external_id is None or not title:
+            return None
+        tags = posting.get("tags")
+        if isinstance(tags, (list, tuple)):
+            tags = ",".join(str(tag).strip() for tag in tags)
+        try:
+            budget = _float(posting.get("budget"))
+            client_rating = _float(posting.get("client_rating"))
+            deadline = datetime.fromisoformat(posting["deadline"]) if posting.get("deadline") else None
+        except (TypeError, ValueError):
+            return None
+        hours = posting.get("estimated_hours")
+        return {
+            "original_platform_job_id": f"{self.platform.lower()}:{external_id}",
+            "title": title,
+            "description": posting.get("description"),
+            "budget": budget,
+            "type": posting.get("type"),
+            "tags": tags,
+            "deadline": deadline,
+            "client_rating": client_rating,
+            "estimated_hours": str(hours) if hours is not None else None,
+            "is_urgent": bool(posting.get("urgent", False)),
+        }
+
+
+class FixtureAdapter(PlatformAdapter):
+    """Serves postings from memory or a JSON file, optionally with simulated latency (tests, benchmarks)"""
+
+    def __init__(self, platform: str, pages: List[List[dict]], latency_seconds: float = 0.0):
+        super().__init__(platform)
+        self.pages = pages
+        self.latency_seconds = latency_seconds
+
+    @classmethod
+    def from_file(cls, platform: str, path: str, latency_seconds: float = 0.0) -> "FixtureAdapter":
+        """`path` holds {"pages": [[posting, ...], ...]} or just the list of pages"""
+        with open(path) as fixture:
+            data = json.load(fixture)
+        return cls(platform, data["pages"] if isinstance(data, dict) else data, latency_seconds)
+
+    async def fetch_page(self, account: Optional[BotAccount], page: int) -> Optional[str]:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if page >= len(self.pages):
+            return None
+        return json.dumps({"jobs": self.pages[page]})
+
+
+class HttpJsonAdapter(PlatformAdapter):
+    """GETs `url`?page=N returning {"jobs": [...]}
+
+    Sends the account's "api_key" (or <PLATFORM>_API_KEY from the environment) as a bearer token.
+    """
+
+    def __init__(self, platform: str, url: str, timeout_seconds: float = 30.0):
+        super().__init__(platform)
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+
+    def _get(self, url: str, api_key: Optional[str]) -> str:
+        headers = {"Accept": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=self.timeout_seconds) as response:
+            return response.read().decode()
+
+    async def fetch_page(self, account: Optional[BotAccount], page: int) -> Optional[str]:
+        api_key = _config(account.config).get("api_key") if account is not None else None
+        api_key = api_key or os.getenv(f"{self.platform.upper()}_API_KEY")
+        separator = "&" if "?" in self.url else "?"
+        return await asyncio.to_thread(self._get, f"{self.url}{separator}page={page}", api_key)
+
+
+ADAPTERS: Dict[str, Callable[[Bot, dict], PlatformAdapter]] = {}
+
+
+def register_adapter(platform: str, factory: Callable[[Bot, dict], PlatformAdapter]):
+    """Use `factory(bot, config)` for bots on `platform` that don't name an adapter themselves"""
+    ADAPTERS[platform.lower()] = factory
+
+
+def adapter_for(bot: Bot) -> Optional[PlatformAdapter]:
+    config = _config(bot.config)
+    platform = bot.platform or ""
+    kind = config.get("adapter")
+    if kind == "fixture":
+        return FixtureAdapter.from_file(platform, config["path"], float(config.get("latency_seconds", 0)))
+    if kind == "http":
+        return HttpJsonAdapter(platform, config["url"])
+    factory = ADAPTERS.get(platform.lower())
+    return factory(bot, config) if factory else None
+
+
+class RateLimiter:
+    """Token bucket: `per_minute` requests, in bursts of up to `burst`"""
+
+    def __init__(self, per_minute: float, burst: int):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Take the token now, even if it hasn't accrued yet, then wait until it has:
+        # callers queue up in order without a lock
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+_limiters: Dict[object, RateLimiter] = {}  # Only touched from the event loop
+
+
+def _limiter(account: Optional[BotAccount], platform: str) -> RateLimiter:
+    config = _config(account.config) if account is not None else {}
+    per_minute = float(config.get("requests_per_minute", settings.SCRAPER_ACCOUNT_REQUESTS_PER_MINUTE))
+    key = account.id if account is not None else f"anonymous:{platform.lower()}"
+    limiter = _limiters.get(key)
+    if limiter is None or limiter.per_minute != per_minute:
+        limiter = _limiters[key] = RateLimiter(per_minute, settings.SCRAPER_ACCOUNT_BURST)
+    return limiter
+
+
+class ScrapeRun:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.bots = 0
+        self.pages = 0
+        self.jobs_parsed = 0
+        self.jobs_invalid = 0
+        self.jobs_new = 0
+        self.jobs_existing = 0
+        self.errors = 0
+        self.platforms = {}  # platform -> {"pages", "jobs", "errors"}
+        self.seconds = None
+        self.jobs_per_second = None
+        self.created_at = _utcnow()
+        self.finished_at = None
+        self.error = None
+
+    def _platform(self, platform: str) -> dict:
+        return self.platforms.setdefault(platform, {"pages": 0, "jobs": 0, "errors": 0})
+
+    def record_page(self, platform: str, jobs: int):
+        self.pages += 1
+        self.jobs_parsed += jobs
+        stats = self._platform(platform)
+        stats["pages"] += 1
+        stats["jobs"] += jobs
+
+    def record_error(self, platform: str):
+        self.errors += 1
+        self._platform(platform)["errors"] += 1
+
+
+_runs = OrderedDict()  # id -> ScrapeRun
+_lock = threading.Lock()
+
+
+def create() -> Optional[ScrapeRun]:
+    """Register a new run; None if one is already queued or running in this process"""
+    with _lock:
+        if any(run.status in ("queued", "running") for run in _runs.values()):
+            return None
+        scrape_run = ScrapeRun()
+        _runs[scrape_run.id] = scrape_run
+        while len(_runs) > MAX_TRACKED:
+            _runs.popitem(last=False)
+        return scrape_run
+
+
+def get(run_id: str) -> Optional[ScrapeRun]:
+    with _lock:
+        return _runs.get(run_id)
+
+
+def recent() -> List[ScrapeRun]:
+    with _lock:
+        return list(reversed(_runs.values()))
+
+
+def upsert_pages(session_factory, pages: list) -> tuple:
+    """Normalize and upsert parsed pages (bot_id, account_id, adapter, postings) in one transaction
+
+    Returns (invalid, new, existing) posting counts.
+    """
+    rows = {}
+    scraped = Counter()
+    accounts = set()
+    invalid = 0
+    for bot_id, account_id, adapter, postings in pages:
+        scraped[bot_id] += 0
+        if account_id is not None:
+            accounts.add(account_id)
+        for posting in postings:
+            row = adapter.normalize(posting)
+            if row is None:
+                invalid += 1
+                continue
+            row.update(platform=adapter.platform, bot_account_id=account_id)
+            rows[row["original_platform_job_id"]] = row
+            scraped[bot_id] += 1
+
+    db = session_factory()
+    try:
+        keys = list(rows)
+        existing = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            existing.update(
+                db.query(Job.original_platform_job_id, Job.id)
+                .filter(Job.original_platform_job_id.in_(keys[start:start + LOOKUP_CHUNK]))
+                .all()
+            )
+        new = [dict(row, status=JobStatus.OPEN.value) for key, row in rows.items() if key not in existing]
+        # Another run may insert the same posting first; it then counts as existing
+        inserted = insert_ignore_duplicates(db, Job, new, ["original_platform_job_id"])
+        counters.jobs_created(db, len(inserted), len(inserted))
+        inserted_keys = [key for (key,) in inserted]
+        for start in range(0, len(inserted_keys), LOOKUP_CHUNK):
+            auto_apply_worker.enqueue_jobs(db, select(Job.id).where(
+                Job.original_platform_job_id.in_(inserted_keys[start:start + LOOKUP_CHUNK])
+            ))
+
+        refreshed = [
+            {"job_id": existing[key], **{f"new_{field}": rows[key][field] for field in UPDATE_FIELDS}}
+            for key in existing
+        ]
+        if refreshed:
+            jobs = Job.__table__
+            db.execute(
+                update(jobs)
+                .where(
+                    jobs.c.id == bindparam("job_id"),
+                    jobs.c.status == JobStatus.OPEN.value,
+                    or_(*(jobs.c[field].is_distinct_from(bindparam(f"new_{field}")) for field in UPDATE_FIELDS)),
+                )
+                .values({field: bindparam(f"new_{field}") for field in UPDATE_FIELDS}),
+                refreshed,
+            )
+
+        now = _utcnow()
+        by_count = defaultdict(list)
+        for bot_id, count in scraped.items():
+            by_count[count].append(bot_id)
+        for count, bot_ids in by_count.items():
+            db.execute(
+                update(Bot)
+                .where(Bot.id.in_(bot_ids))
+                .values(jobs_scraped=func.coalesce(Bot.jobs_scraped, 0) + count, last_active=now)
+                .execution_options(synchronize_session=False)
+            )
+        if accounts:
+            db.execute(
+                update(BotAccount)
+                .where(BotAccount.id.in_(accounts))
+                .values(last_activity=now)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            matching.index_changed_jobs(db, Job.original_platform_job_id.in_(keys[start:start + LOOKUP_CHUNK]))
+    finally:
+        db.close()
+
+    if inserted or existing:
+        invalidate("jobs", *(f"job:{job_id}" for job_id in existing.values()))
+    return invalid, len(inserted), len(rows) - len(inserted)
+
+
+def _load(session_factory, bot_ids: Optional[List[int]]) -> tuple:
+    db = session_factory()
+    try:
+        # Auto-applier bots share the bots table but have nothing to scrape
+        query = db.query(Bot).filter(or_(Bot.platform.is_(None), Bot.platform != AUTO_APPLIER_PLATFORM))
+        query = query.filter(Bot.id.in_(bot_ids)) if bot_ids else query.filter(Bot.status == BotStatus.ACTIVE)
+        accounts = defaultdict(list)
+        for account in db.query(BotAccount).filter(BotAccount.status == "active").order_by(BotAccount.id):
+            accounts[(account.platform or "").lower()].append(account)
+        return query.order_by(Bot.id).all(), accounts
+    finally:
+        db.close()
+
+
+async def _fetch(scrape_run: ScrapeRun, bot: Bot, adapter: PlatformAdapter, account: Optional[BotAccount],
+                 page: int, semaphore: asyncio.Semaphore, queue: asyncio.Queue) -> int:
+    """Fetch and parse one page onto the queue; returns its posting count (0 ends the bot's run)"""
+    account_id = account.id if account is not None else None
+    await _limiter(account, adapter.platform).acquire()
+    async with semaphore:
+        try:
+            body = await adapter.fetch_page(account, page)
+            postings = adapter.parse(body) if body is not None else []
+        except Exception as exc:
+            scrape_run.record_error(adapter.platform)
+            logger.warning("Bot %s failed to fetch page %d: %r", bot.id, page, exc)
+            log_activity(bot.id, "error", {"page": page, "error": repr(exc)[:500]}, account_id, block=False)
+            return 0
+    if not postings:
+        return 0
+    scrape_run.record_page(adapter.platform, len(postings))
+    log_activity(bot.id, "scrape", {"page": page, "jobs": len(postings)}, account_id, block=False)
+    await queue.put((bot.id, account_id, adapter, postings))
+    return len(postings)
+
+
+async def _scrape_bot(scrape_run: ScrapeRun, bot: Bot, adapter_factory, accounts: dict, semaphores: dict,
+                      concurrency: int, queue: asyncio.Queue):
+    try:
+        adapter = adapter_factory(bot)
+    except Exception as exc:
+        adapter = None
+        logger.warning("Bot %s has an unusable adapter config: %r", bot.id, exc)
+    if adapter is None:
+        scrape_run.record_error(bot.platform or "")
+        log_activity(bot.id, "error", {"error": f"no adapter for platform {bot.platform!r}"}, block=False)
+        return
+    config = _config(bot.config)
+    pinned = config.get("bot_account_ids")
+    pool = [
+        account for account in accounts.get(adapter.platform.lower(), [])
+        if not pinned or account.id in pinned
+    ] or [None]
+    max_pages = int(config.get("max_pages", settings.SCRAPER_MAX_PAGES))
+    semaphore = semaphores[adapter.platform.lower()]
+
+    page = 0
+    while page < max_pages and scrape_run.status == "running":
+        window = range(page, min(page + concurrency, max_pages))
+        found = await asyncio.gather(*(
+            _fetch(scrape_run, bot, adapter, pool[number % len(pool)], number, semaphore, queue)
+            for number in window
+        ))
+        if not all(found):
+            break
+        page = window.stop
+
+
+async def _write(session_factory, scrape_run: ScrapeRun, queue: asyncio.Queue):
+    """Single consumer: upsert queued pages in batches until the None sentinel arrives"""
+    batch = []
+    postings = 0
+    while True:
+        item = await queue.get()
+        if item is not None:
+            batch.append(item)
+            postings += len(item[3])
+        if batch and (item is None or queue.empty() or postings >= settings.SCRAPER_UPSERT_BATCH_SIZE):
+            # Once a write has failed, keep draining so producers never block on a full queue
+            if scrape_run.status == "running":
+                try:
+                    invalid, new, existing = await asyncio.to_thread(upsert_pages, session_factory, batch)
+                    scrape_run.jobs_invalid += invalid
+                    scrape_run.jobs_new += new
+                    scrape_run.jobs_existing += existing
+                except Exception as exc:
+                    scrape_run.status = "failed"
+                    scrape_run.error = repr(exc)
+                    logger.exception("Scrape run %s failed to store jobs", scrape_run.id)
+            batch = []
+            postings = 0
+        if item is None:
+            return
+
+
+async def run(session_factory, scrape_run: ScrapeRun, bot_ids: Optional[List[int]] = None,
+              adapter_factory=None, concurrency: Optional[int] = None) -> ScrapeRun:
+    """Scrape `bot_ids` (default: every active bot) once"""
+    adapter_factory = adapter_factory or adapter_for
+    concurrency = concurrency or settings.SCRAPER_PLATFORM_CONCURRENCY
+    scrape_run.status = "running"
+    started = time.perf_counter()
+    try:
+        bots, accounts = await asyncio.to_thread(_load, session_factory, bot_ids)
+        scrape_run.bots = len(bots)
+        semaphores = defaultdict(lambda: asyncio.Semaphore(concurrency))
+        queue = asyncio.Queue(settings.SCRAPER_QUEUE_SIZE)
+        writer = asyncio.create_task(_write(session_factory, scrape_run, queue))
+        try:
+            await asyncio.gather(*(
+                _scrape_bot(scrape_run, bot, adapter_factory, accounts, semaphores, concurrency, queue)
+                for bot in bots
+            ))
+        finally:
+            await queue.put(None)
+            await writer
+        if scrape_run.status == "running":
+            scrape_run.status = "completed"
+    except Exception as exc:
+        scrape_run.status = "failed"
+        scrape_run.error = repr(exc)
+        logger.exception("Scrape run %s failed", scrape_run.id)
+    finally:
+        scrape_run.seconds = round(time.perf_counter() - started, 3)
+        scrape_run.jobs_per_second = (
+            round(scrape_run.jobs_parsed / scrape_run.seconds, 1) if scrape_run.seconds else None
+        )
+        scrape_run.finished_at = _utcnow()
+    return scrape_run
+
+
+async def run_periodic(session_factory, interval_seconds: int):
+    """Background task: scrape every active bot every `interval_seconds`"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        scrape_run = create()
+        if scrape_run is None:
+            continue
+        await run(session_factory, scrape_run)
+        logger.info(
+            "Scraped %d jobs (%d new) in %.1fs, %s jobs/s",
+            scrape_run.jobs_parsed, scrape_run.jobs_new, scrape_run.seconds, scrape_run.jobs_per_second,
+        )
+
+
+if __name__ == "__main__":
+    import sys
+
+    from .database import SessionLocal, create_db_and_tables
+
+    if sys.argv[1:2] != ["run"] or not all(arg.isdigit() for arg in sys.argv[2:]):
+        sys.exit("usage: python -m app.scraping run [bot_id ...]")
+    logging.basicConfig(level=logging.INFO)
+    create_db_and_tables()
+    activity_log.writer.start(SessionLocal)
+    result = asyncio.run(run(SessionLocal, create(), [int(arg) for arg in sys.argv[2:]] or None))
+    activity_log.writer.stop()
+    print(
+        f"{result.status}: {result.jobs_parsed} jobs from {result.pages} pages of {result.bots} bots "
+        f"in {result.seconds}s ({result.jobs_per_second} jobs/s); {result.jobs_new} new, "
+        f"{result.jobs_existing} existing, {result.jobs_invalid} invalid, {result.errors} errors"
+    )
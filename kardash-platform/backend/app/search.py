@@ -0,0 +1,119 @@
+import re
+from typing import Optional
+
+from sqlalchemy import column, literal_column, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query
+
+from .models import Job
+
+# Full-text search over jobs (title, description, tags).
+#
+# PostgreSQL: an expression GIN index over to_tsvector(...). Postgres maintains
+# it on every INSERT/UPDATE, so no application-side sync is needed.
+# SQLite: an external-content FTS5 table (jobs_fts) kept in sync by triggers.
+# Any other dialect falls back to the old LIKE '%term%' scan.
+
+SEARCH_CONFIG = "english"
+
+_PG_DOCUMENT = (
+    f"to_tsvector('{SEARCH_CONFIG}', "
+    "coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(tags, ''))"
+)
+
+_PG_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_jobs_search ON jobs USING GIN ({_PG_DOCUMENT})",
+]
+
+_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE jobs_fts USING fts5("
+    "title, description, tags, content='jobs', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS jobs_fts_ai AFTER INSERT ON jobs BEGIN "
+    "INSERT INTO jobs_fts(rowid, title, description, tags) "
+    "VALUES (new.id, new.title, new.description, new.tags); END",
+    "CREATE TRIGGER IF NOT EXISTS jobs_fts_ad AFTER DELETE ON jobs BEGIN "
+    "INSERT INTO jobs_fts(jobs_fts, rowid, title, description, tags) "
+    "VALUES ('delete', old.id, old.title, old.description, old.tags); END",
+    "CREATE TRIGGER IF NOT EXISTS jobs_fts_au AFTER UPDATE OF title, description, tags ON jobs BEGIN "
+    "INSERT INTO jobs_fts(jobs_fts, rowid, title, description, tags) "
+    "VALUES ('delete', old.id, old.title, old.description, old.tags); "
+    "INSERT INTO jobs_fts(rowid, title, description, tags) "
+    "VALUES (new.id, new.title, new.description, new.tags); END",
+    # Index rows that existed before the FTS table was created
+    "INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')",
+]
+
+jobs_fts = table("jobs_fts", column("rowid"), column("rank"))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def create_search_index(engine: Engine):
+    """Create the dialect-specific full-text index for jobs"""
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "postgresql":
+            for statement in _PG_DDL:
+                conn.execute(text(statement))
+        elif dialect == "sqlite":
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'")
+            ).first()
+            if not exists:
+                for statement in _SQLITE_DDL:
+                    conn.execute(text(statement))
+
+
+def rebuild_search_index(engine: Engine):
+    """Re-index every job (SQLite only; the Postgres index is self-maintaining)"""
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')"))
+
+
+def tokenize(search: str) -> list:
+    return _TOKEN_RE.findall(search.lower())
+
+
+def _sqlite_match_expression(tokens: list) -> str:
+    # Every token is quoted (so FTS5 operators in user input are inert) and
+    # prefix-matched, so "reac dev" matches "React developer".
+    return " AND ".join(f'"{token}"*' for token in tokens)
+
+
+def _pg_tsquery_expression(tokens: list) -> str:
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def apply_search(query: Query, search: Optional[str], rank: bool = True) -> Query:
+    """Filter a Job query by full-text search, optionally ordering by relevance"""
+    tokens = tokenize(search or "")
+    if not tokens:
+        return query
+
+    dialect = query.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        query = query.join(jobs_fts, jobs_fts.c.rowid == Job.id).filter(
+            literal_column("jobs_fts").op("MATCH")(_sqlite_match_expression(tokens))
+        )
+        if rank:
+            # FTS5's hidden rank column is bm25(); lower is better
+            query = query.order_by(jobs_fts.c.rank)
+        return query
+
+    if dialect == "postgresql":
+        tsquery = _pg_tsquery_expression(tokens)
+        query = query.filter(
+            text(f"{_PG_DOCUMENT} @@ to_tsquery('{SEARCH_CONFIG}', :search_query)").bindparams(
+                search_query=tsquery
+            )
+        )
+        if rank:
+            query = query.order_by(
+                text(f"ts_rank({_PG_DOCUMENT}, to_tsquery('{SEARCH_CONFIG}', :rank_query)) DESC").bindparams(
+                    rank_query=tsquery
+                )
+            )
+        return query
+
+    return query.filter(Job.title.contains(search) | Job.description.contains(search))
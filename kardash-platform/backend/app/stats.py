@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .models import User, UserRole, Job, JobStatus, Bot, BotStatus, BotAccount
+from .schemas import JobStats, UserStats, BotStats, CombinedStats
+
+# Dashboard statistics engine.
+#
+# Each function computes all of a table's counters in a single pass using
+# COUNT(*) FILTER (WHERE ...) aggregates (PostgreSQL, SQLite >= 3.30), instead
+# of one COUNT(*) round trip per counter.
+
+
+def _count_where(condition):
+    return func.count().filter(condition)
+
+
+def job_stats(db: Session) -> JobStats:
+    row = db.query(
+        func.count(),
+        _count_where(Job.status == JobStatus.OPEN),
+        _count_where(Job.status == JobStatus.IN_PROGRESS),
+        _count_where(Job.status == JobStatus.COMPLETED),
+        _count_where(Job.is_urgent == True),
+    ).one()
+    return JobStats(
+        total_jobs=row[0],
+        open_jobs=row[1],
+        in_progress_jobs=row[2],
+        completed_jobs=row[3],
+        urgent_jobs=row[4]
+    )
+
+
+def user_stats(db: Session) -> UserStats:
+    first_day_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    row = db.query(
+        func.count(),
+        _count_where(User.is_active == True),
+        _count_where(User.role == UserRole.FREELANCER),
+        _count_where(User.role == UserRole.ADMIN),
+        _count_where(User.created_at >= first_day_of_month),
+    ).one()
+    return UserStats(
+        total_users=row[0],
+        active_users=row[1],
+        freelancers=row[2],
+        admins=row[3],
+        new_users_this_month=row[4]
+    )
+
+
+def bot_stats(db: Session) -> BotStats:
+    row = db.query(
+        func.count(),
+        _count_where(Bot.status == BotStatus.ACTIVE),
+        func.coalesce(func.sum(Bot.jobs_scraped), 0),
+        func.coalesce(func.sum(Bot.jobs_applied), 0),
+        func.coalesce(func.avg(Bot.success_rate), 0.0),
+    ).one()
+    return BotStats(
+        total_bots=row[0],
+        active_bots=row[1],
+        total_jobs_scraped=row[2],
+        total_jobs_applied=row[3],
+        average_success_rate=row[4]
+    )
+
+
+def bot_account_stats(db: Session) -> dict:
+    row = db.query(
+        func.count(),
+        _count_where(BotAccount.status == "active"),
+        _count_where(BotAccount.status == "paused"),
+        func.coalesce(func.sum(BotAccount.jobs_applied), 0),
+        func.coalesce(func.avg(BotAccount.success_rate), 0.0),
+    ).one()
+    return {
+        "total_bot_accounts": row[0],
+        "active_bot_accounts": row[1],
+        "paused_bot_accounts": row[2],
+        "total_jobs_applied": row[3],
+        "average_success_rate": row[4]
+    }
+
+
+def all_stats(db: Session) -> CombinedStats:
+    return CombinedStats(
+        jobs=job_stats(db),
+        users=user_stats(db),
+        bots=bot_stats(db)
+    )
@@ -0,0 +1,289 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import Notification, UnreadNotificationCount
+
+logger = logging.getLogger(__name__)
+
+# Per-user unread notification counters.
+#
+# UnreadNotificationCount holds one row per user. Every path that creates,
+# reads or deletes notifications calls adjust() inside its own transaction,
+# so the counter commits or rolls back with the change it describes. A
+# user's first change builds their row from the notifications table (the
+# same approach as app/counters.py).
+#
+# Reads are a primary-key lookup, and usually not even that: counts are cached
+# per process for UNREAD_COUNT_CACHE_TTL_SECONDS. A commit that changed a
+# user's counter drops their cached count in this process; other processes
+# catch up within the TTL. repair() recomputes every row from notifications.
+# It runs every UNREAD_COUNT_REPAIR_SECONDS, or on demand:
+#
+#     python -m app.unread_counters repair
+
+_CHANGED_KEY = "unread_counts_changed"
+_CLEAR_KEY = "unread_counts_clear"
+
+
+class _UnreadCache:
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # user_id -> (expires_at, count)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id: int, count: int):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl_seconds, count)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def forget(self, user_ids: Iterable[int]):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+cache = _UnreadCache(settings.UNREAD_COUNT_CACHE_SIZE, settings.UNREAD_COUNT_CACHE_TTL_SECONDS)
+last_repair = {"at": None, "rows_fixed": None, "seconds": None}
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed(session):
+    changed = session.info.pop(_CHANGED_KEY, None)
+    if changed:
+        cache.forget(changed)
+    if session.info.pop(_CLEAR_KEY, None):
+        cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_CHANGED_KEY, None)
+    session.info.pop(_CLEAR_KEY, None)
+
+
+def _dialect_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(UnreadNotificationCount)
+    if dialect == "sqlite":
+        return sqlite.insert(UnreadNotificationCount)
+    return None
+
+
+def _count_unread(db: Session, user_ids: list) -> Dict[int, int]:
+    counts = dict(
+        db.query(Notification.user_id, func.count())
+        .filter(Notification.user_id.in_(user_ids), Notification.is_read == False)
+        .group_by(Notification.user_id)
+        .all()
+    )
+    return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+
+
+def _build(db: Session, counts: Dict[int, int], deltas: Dict[int, int]):
+    """Insert counter rows counted from notifications (which include this transaction's changes)"""
+    statement = _dialect_insert(db)
+    if statement is not None:
+        # A concurrent transaction may have built the row first, from a count
+        # that can't see this transaction's change: add the delta to it instead
+        by_delta = defaultdict(list)
+        for user_id, count in counts.items():
+            by_delta[deltas[user_id]].append({"user_id": user_id, "unread": count})
+        for delta, rows in by_delta.items():
+            db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["user_id"], set_={"unread": UnreadNotificationCount.unread + delta}
+                ),
+                rows,
+            )
+        return
+    for user_id, count in counts.items():
+        result = db.execute(
+            update(UnreadNotificationCount)
+            .where(UnreadNotificationCount.user_id == user_id)
+            .values(unread=UnreadNotificationCount.unread + deltas[user_id])
+        )
+        if result.rowcount == 0:
+            db.execute(insert(UnreadNotificationCount).values(user_id=user_id, unread=count))
+
+
+def adjust(db: Session, deltas: Dict[int, int]):
+    """Add `deltas` (user_id -> change in unread) to the counters, inside the caller's transaction"""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    # The notification change itself must be visible if a row has to be built from scratch
+    db.flush()
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        by_delta[delta].append(user_id)
+    updated = 0
+    for delta, user_ids in by_delta.items():
+        result = db.execute(
+            update(UnreadNotificationCount)
+            .where(UnreadNotificationCount.user_id.in_(user_ids))
+            .values(unread=UnreadNotificationCount.unread + delta)
+            .execution_options(synchronize_session=False)
+        )
+        updated += result.rowcount
+    if updated < len(deltas):
+        existing = {
+            user_id for (user_id,) in
+            db.query(UnreadNotificationCount.user_id).filter(UnreadNotificationCount.user_id.in_(list(deltas)))
+        }
+        missing = [user_id for user_id in deltas if user_id not in existing]
+        _build(db, _count_unread(db, missing), deltas)
+    db.info.setdefault(_CHANGED_KEY, set()).update(deltas)
+
+
+def _insert_missing(db: Session, user_ids=None) -> int:
+    """Build rows for users with unread notifications but no counter (limited to the `user_ids` SELECT)"""
+    conditions = [
+        Notification.is_read == False,
+        Notification.user_id.not_in(select(UnreadNotificationCount.user_id)),
+    ]
+    if user_ids is not None:
+        conditions.append(Notification.user_id.in_(user_ids))
+    missing = select(Notification.user_id, func.count()).where(*conditions).group_by(Notification.user_id)
+    statement = _dialect_insert(db)
+    if statement is None:
+        statement = insert(UnreadNotificationCount).from_select(["user_id", "unread"], missing)
+    else:
+        statement = statement.from_select(["user_id", "unread"], missing).on_conflict_do_nothing(
+            index_elements=["user_id"]
+        )
+    return max(db.execute(statement).rowcount, 0)
+
+
+def increment_selected(db: Session, user_ids):
+    """+1 for every user in the `user_ids` SELECT (a broadcast), without listing them in Python"""
+    db.flush()
+    db.execute(
+        update(UnreadNotificationCount)
+        .where(UnreadNotificationCount.user_id.in_(user_ids))
+        .values(unread=UnreadNotificationCount.unread + 1)
+        .execution_options(synchronize_session=False)
+    )
+    _insert_missing(db, user_ids)
+    db.info[_CLEAR_KEY] = True
+
+
+def cached_unread_count(user_id: int) -> Optional[int]:
+    return cache.get(user_id)
+
+
+def unread_count(db: Session, user_id: int) -> int:
+    """The user's unread count from their counter row; caches the result"""
+    count = db.query(UnreadNotificationCount.unread).filter(UnreadNotificationCount.user_id == user_id).scalar()
+    if count is None:
+        # No change since counters were introduced: count directly, but leave
+        # building the row to the next write (this may be a read replica)
+        count = _count_unread(db, [user_id])[user_id]
+    cache.put(user_id, count)
+    return count
+
+
+def repair(db: Session) -> int:
+    """Recompute every counter from notifications; returns the number of rows that were wrong"""
+    started = time.perf_counter()
+    actual = (
+        select(func.count())
+        .where(Notification.user_id == UnreadNotificationCount.user_id, Notification.is_read == False)
+        .scalar_subquery()
+    )
+    fixed = db.execute(
+        update(UnreadNotificationCount)
+        .where(UnreadNotificationCount.unread != actual)
+        .values(unread=actual)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    fixed += _insert_missing(db)
+    db.commit()
+    cache.clear()
+    last_repair.update(
+        at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        rows_fixed=fixed,
+        seconds=round(time.perf_counter() - started, 3),
+    )
+    return fixed
+
+
+def stats() -> dict:
+    return {"cache": cache.stats(), "last_repair": dict(last_repair)}
+
+
+async def run_periodic_repair(session_factory, interval_seconds: int):
+    """Background task: repair the counters every `interval_seconds`"""
+    def repair_once():
+        db = session_factory()
+        try:
+            fixed = repair(db)
+            if fixed:
+                logger.warning("Repaired %d drifted unread notification counters", fixed)
+        finally:
+            db.close()
+
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(repair_once)
+        except Exception:
+            logger.exception("Unread notification counter repair failed")
+
+
+if __name__ == "__main__":
+    import sys
+
+    from .database import SessionLocal, create_db_and_tables
+
+    if sys.argv[1:] != ["repair"]:
+        sys.exit("usage: python -m app.unread_counters repair")
+    create_db_and_tables()
+    session = SessionLocal()
+    try:
+        print(f"Repaired {repair(session)} unread notification counters")
+    finally:
+        session.close()
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from .config import settings
+from .models import User
+
+# Verified-token cache for auth.get_current_user.
+#
+# Maps a bearer token whose signature has been checked to a detached snapshot
+# of its user's columns. On a hit the snapshot is merged into the request's
+# session with load=False: the route gets an ordinary persistent User (so
+# update_my_profile can still modify and commit it) without a SELECT on users.
+# Entries live for AUTH_CACHE_TTL_SECONDS (never past the token's own expiry)
+# and the user routes that change a user drop all of that user's tokens via
+# invalidate_user(). Other processes pick up such changes within the TTL.
+
+
+def snapshot(user: User) -> User:
+    """Detached copy of the user's column values, safe to share between sessions"""
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in User.__mapper__.column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+class _UserCache:
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # token -> (expires_at, user_id, snapshot)
+        self._tokens_by_user = {}  # user_id -> set of cached tokens
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float] = None):
+        """Cache `user` for `token`; token_expires_at is the JWT exp as a unix timestamp"""
+        ttl = self.ttl_seconds
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._drop(token)
+            self._entries[token] = (time.monotonic() + ttl, user.id, snapshot(user))
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_user.get(entry[1])
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry[1]]
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._drop(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+user_cache = _UserCache(settings.AUTH_CACHE_SIZE, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def cached_user(db: Session, token: str) -> Optional[User]:
+    """The token's user attached to `db` without a query, or None on a miss"""
+    cached = user_cache.get(token)
+    if cached is None:
+        return None
+    return db.merge(cached, load=False)
+
+
+def invalidate_user(user_id: int):
+    user_cache.invalidate_user(user_id)
@@ -0,0 +1,96 @@
+"""Notification fan-out benchmark: ORM add_all vs. Core executemany vs. INSERT ... SELECT.
+
+Usage (from kardash-platform/backend):
+    python -m benchmarks.bench_broadcast [num_users] [database_url]
+
+Sends one notification to every user three ways and reports rows/sec:
+the old /notifications/admin/bulk path (one ORM object per row, add_all),
+the new bulk path (chunked executemany) and a broadcast (chunked
+INSERT ... SELECT FROM users). Unread counters are maintained in all three.
+Defaults to 50,000 users in a throwaway SQLite file.
+"""
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+NUM_USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+DATABASE_URL = sys.argv[2] if len(sys.argv) > 2 else f"sqlite:///{tempfile.mkdtemp()}/bench_broadcast.db"
+os.environ["DATABASE_URL"] = DATABASE_URL
+
+from sqlalchemy import delete, insert  # noqa: E402
+
+from app import broadcasts, unread_counters  # noqa: E402
+from app.database import SessionLocal, create_db_and_tables, engine  # noqa: E402
+from app.models import Notification, UnreadNotificationCount, User, UserRole  # noqa: E402
+
+BATCH_SIZE = 10_000
+
+
+def populate():
+    with engine.begin() as conn:
+        for start in range(0, NUM_USERS, BATCH_SIZE):
+            conn.execute(insert(User), [
+                {"email": f"bench{i}@example.com", "name": f"User {i}", "hashed_password": "x",
+                 "role": UserRole.FREELANCER, "is_active": True}
+                for i in range(start, min(start + BATCH_SIZE, NUM_USERS))
+            ])
+
+
+def reset():
+    with engine.begin() as conn:
+        conn.execute(delete(Notification))
+        conn.execute(delete(UnreadNotificationCount))
+
+
+def orm_add_all(user_ids):
+    db = SessionLocal()
+    try:
+        db.add_all([Notification(user_id=user_id, type="bench", message="hello") for user_id in user_ids])
+        unread_counters.adjust(db, Counter(user_ids))
+        db.commit()
+    finally:
+        db.close()
+
+
+def core_executemany(user_ids):
+    db = SessionLocal()
+    try:
+        broadcasts.insert_notifications(db, [{"user_id": user_id, "type": "bench", "message": "hello"} for user_id in user_ids])
+        db.commit()
+    finally:
+        db.close()
+
+
+def insert_select(user_ids):
+    broadcast = broadcasts.create("all")
+    broadcasts.run(SessionLocal, broadcast, "bench", "hello")
+    assert broadcast.status == "completed", broadcast.error
+
+
+def main():
+    create_db_and_tables()
+    populate()
+    db = SessionLocal()
+    user_ids = [user_id for (user_id,) in db.query(User.id)]
+    db.close()
+    print(f"{len(user_ids)} users, {DATABASE_URL}")
+
+    baseline = None
+    for label, send in (
+        ("ORM add_all (old bulk path)", orm_add_all),
+        ("Core executemany (new bulk path)", core_executemany),
+        ("INSERT ... SELECT (broadcast)", insert_select),
+    ):
+        reset()
+        started = time.perf_counter()
+        send(user_ids)
+        seconds = time.perf_counter() - started
+        rate = len(user_ids) / seconds
+        baseline = baseline or rate
+        print(f"{label:34} {seconds:7.2f}s {rate:12,.0f} rows/s  x{rate / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Event-loop responsiveness under concurrent authenticated reads.
+
+Usage (from kardash-platform/backend):
+    python -m benchmarks.bench_event_loop [requests] [concurrency]
+    DATABASE_ASYNC=true python -m benchmarks.bench_event_loop [requests] [concurrency]
+
+Drives GET /notifications/ and /notifications/unread-count in-process through
+httpx's ASGI transport with `concurrency` requests in flight. The auth cache
+is disabled so every request also resolves its user. A heartbeat task
+measures event-loop lag: if any handler blocks the loop on database I/O the
+max lag grows with the slowest query instead of staying near zero. Uses a
+throwaway SQLite file unless DATABASE_URL is set.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_event_loop.db")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("AUTO_APPLY_WORKERS", "0")
+os.environ["AUTH_CACHE_TTL_SECONDS"] = "0"
+
+import httpx  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.database import SessionLocal, create_db_and_tables  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Notification, User  # noqa: E402
+from app.routers.auth import create_access_token  # noqa: E402
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+USERS = 50
+NOTIFICATIONS_PER_USER = 200
+
+
+def seed() -> list:
+    create_db_and_tables()
+    db = SessionLocal()
+    try:
+        users = [User(email=f"bench{i}@example.com", name=f"Bench {i}", hashed_password="x") for i in range(USERS)]
+        db.add_all(users)
+        db.flush()
+        db.bulk_save_objects([
+            Notification(user_id=user.id, type="bench", message=f"notification {n}", is_read=n % 3 == 0)
+            for user in users
+            for n in range(NOTIFICATIONS_PER_USER)
+        ])
+        db.commit()
+        return [create_access_token({"sub": user.email}) for user in users]
+    finally:
+        db.close()
+
+
+async def heartbeat(lags: list, stop: asyncio.Event, interval: float = 0.005):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def main():
+    tokens = seed()
+    lags, latencies = [], []
+    stop = asyncio.Event()
+    paths = ["/notifications/?limit=20", "/notifications/unread-count"]
+    remaining = iter(range(REQUESTS))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            for n in remaining:
+                headers = {"Authorization": f"Bearer {tokens[n % USERS]}"}
+                started = time.perf_counter()
+                response = await client.get(paths[n % 2], headers=headers)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        beat = asyncio.create_task(heartbeat(lags, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await beat
+
+    ordered = sorted(latencies)
+    mode = "async" if settings.DATABASE_ASYNC else "sync"
+    print(f"{mode} mode, {REQUESTS} requests, concurrency {CONCURRENCY}: {REQUESTS / elapsed:.0f} req/s")
+    print(f"latency p50={statistics.median(ordered):.1f}ms  p95={ordered[int(len(ordered) * 0.95) - 1]:.1f}ms")
+    print(f"event-loop lag p50={statistics.median(lags):.2f}ms  max={max(lags):.2f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
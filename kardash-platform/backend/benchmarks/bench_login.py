@@ -0,0 +1,66 @@
+"""Login throughput benchmark: bcrypt verification through the hashing pool.
+
+Usage (from kardash-platform/backend):
+    python -m benchmarks.bench_login [logins] [concurrency]
+
+Verifies `logins` passwords with `concurrency` requests in flight, the way
+/auth/token does, and reports logins/sec overall and per hashing worker.
+BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS and PASSWORD_HASH_MAX_PENDING are read
+from the environment as usual; saturated requests are counted as rejected.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi import HTTPException  # noqa: E402
+
+from app import hashing  # noqa: E402
+from app.config import settings  # noqa: E402
+
+LOGINS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+PASSWORD = "correct horse battery staple"
+
+
+async def main():
+    stored = hashing.pwd_context.hash(PASSWORD)
+    # Warm the worker processes so start-up cost is not measured
+    await asyncio.gather(*(hashing.verify_password(PASSWORD, stored) for _ in range(hashing.pool.workers)))
+
+    latencies = []
+    rejected = 0
+    remaining = iter(range(LOGINS))
+
+    async def client():
+        nonlocal rejected
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                valid, _ = await hashing.verify_password(PASSWORD, stored)
+                assert valid
+            except HTTPException:
+                rejected += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+    hashing.pool.shutdown()
+
+    rate = len(latencies) / elapsed
+    ordered = sorted(latencies)
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS}  workers={hashing.pool.workers}  concurrency={CONCURRENCY}")
+    print(f"{len(latencies)} logins in {elapsed:.1f}s: {rate:.1f} logins/sec, "
+          f"{rate / hashing.pool.workers:.1f} per worker core")
+    if ordered:
+        print(f"latency p50={statistics.median(ordered):.0f}ms  p95={ordered[max(0, int(len(ordered) * 0.95) - 1)]:.0f}ms")
+    print(f"rejected with 503: {rejected}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,77 @@
+"""Job matching benchmark: top-k suggestions over synthetic open jobs.
+
+Usage (from kardash-platform/backend):
+    python -m benchmarks.bench_matching [num_jobs]
+
+Defaults to 500,000 jobs. No database is needed; jobs go straight into the
+in-memory index.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.matching import JobIndex, profile_terms  # noqa: E402
+
+NUM_JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+SKILLS = (
+    "react python django fastapi scraper design logo wordpress shopify seo marketing "
+    "android ios flutter data analysis excel machine learning api integration backend "
+    "frontend developer writer translation video editing blockchain solidity devops aws"
+).split()
+FILLER = [f"lorem{i}" for i in range(20_000)]
+PLATFORMS = ["Upwork", "Fiverr", "Freelancer"]
+PROFILES = 200
+TOP_K = 10
+
+
+def synthetic_job(rng: random.Random, job_id: int) -> dict:
+    return {
+        "job_id": job_id,
+        "title": " ".join(rng.choices(SKILLS, k=2) + rng.choices(FILLER, k=3)),
+        "description": " ".join(rng.choices(SKILLS, k=3) + rng.choices(FILLER, k=40)),
+        "tags": ",".join(rng.choices(SKILLS, k=3)),
+        "budget": rng.uniform(20, 10_000),
+        "platform": rng.choice(PLATFORMS),
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
+
+
+def main():
+    rng = random.Random(7)
+    index = JobIndex()
+
+    started = time.perf_counter()
+    for job_id in range(1, NUM_JOBS + 1):
+        index.add(**synthetic_job(rng, job_id))
+    build_seconds = time.perf_counter() - started
+    print(f"Indexed {NUM_JOBS:,} jobs in {build_seconds:.1f}s ({NUM_JOBS / build_seconds:,.0f} jobs/sec)")
+
+    latencies = []
+    for _ in range(PROFILES):
+        terms = profile_terms(rng.sample(SKILLS, k=rng.randint(2, 6)))
+        low = rng.uniform(50, 500)
+        started = time.perf_counter()
+        index.top_k(terms, k=TOP_K, min_budget=low, max_budget=low * 10, platforms=rng.sample(PLATFORMS, k=2))
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"top-{TOP_K}: p50={statistics.median(latencies):.2f}ms  p95={percentile(latencies, 0.95):.2f}ms  "
+          f"({PROFILES} profiles)")
+
+    # Incremental updates: new arrivals and jobs leaving the open pool
+    started = time.perf_counter()
+    for job_id in range(NUM_JOBS + 1, NUM_JOBS + 1001):
+        index.add(**synthetic_job(rng, job_id))
+        index.remove(rng.randint(1, NUM_JOBS))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"incremental add+remove: {elapsed_ms / 1000:.3f}ms per pair (1000 pairs)")
+
+
+if __name__ == "__main__":
+    main()
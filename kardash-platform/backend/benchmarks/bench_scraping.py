@@ -0,0 +1,91 @@
+"""Scraping pipeline benchmark: jobs/sec at different per-platform concurrency limits.
+
+Usage (from kardash-platform/backend):
+    python -m benchmarks.bench_scraping [bots_per_platform] [latency_ms] [database_url]
+
+Scrapes PAGES pages of JOBS_PER_PAGE postings for every bot on three
+platforms through the fixture adapter, which sleeps `latency_ms` per page to
+stand in for the network. Each concurrency level starts from an empty jobs
+table; account rate limits are off. Defaults to 4 bots per platform, 100 ms
+per page, in a throwaway SQLite file.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+BOTS_PER_PLATFORM = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+LATENCY_SECONDS = (int(sys.argv[2]) if len(sys.argv) > 2 else 100) / 1000
+DATABASE_URL = sys.argv[3] if len(sys.argv) > 3 else f"sqlite:///{tempfile.mkdtemp()}/bench_scraping.db"
+os.environ["DATABASE_URL"] = DATABASE_URL
+os.environ["SCRAPER_ACCOUNT_REQUESTS_PER_MINUTE"] = "0"
+
+from sqlalchemy import delete  # noqa: E402
+
+from app import activity_log, scraping  # noqa: E402
+from app.database import SessionLocal, create_db_and_tables, engine  # noqa: E402
+from app.models import Bot, BotActivity, BotActivityRollup, BotStatus, Job  # noqa: E402
+
+PLATFORMS = ("upwork", "freelancer", "fiverr")
+PAGES = 20
+JOBS_PER_PAGE = 50
+CONCURRENCY = (1, 4, 16)
+
+
+def populate() -> dict:
+    db = SessionLocal()
+    adapters = {}
+    try:
+        for platform in PLATFORMS:
+            for number in range(BOTS_PER_PLATFORM):
+                bot = Bot(name=f"bench-{platform}-{number}", platform=platform, status=BotStatus.ACTIVE)
+                db.add(bot)
+                db.flush()
+                pages = [
+                    [
+                        {"id": f"{bot.id}-{page}-{i}", "title": f"{platform} job {page}/{i}", "budget": 100 + i,
+                         "description": "Build an API integration", "tags": ["python", "api"]}
+                        for i in range(JOBS_PER_PAGE)
+                    ]
+                    for page in range(PAGES)
+                ]
+                adapters[bot.id] = scraping.FixtureAdapter(platform, pages, LATENCY_SECONDS)
+        db.commit()
+    finally:
+        db.close()
+    return adapters
+
+
+def reset():
+    with engine.begin() as conn:
+        conn.execute(delete(Job))
+        conn.execute(delete(BotActivity))
+        conn.execute(delete(BotActivityRollup))
+
+
+def main():
+    create_db_and_tables()
+    activity_log.writer.start(SessionLocal)
+    adapters = populate()
+    total = len(adapters) * PAGES * JOBS_PER_PAGE
+    print(f"{len(adapters)} bots, {total} jobs, {LATENCY_SECONDS * 1000:.0f} ms/page, {DATABASE_URL}")
+
+    baseline = None
+    for concurrency in CONCURRENCY:
+        reset()
+        scrape_run = scraping.create()
+        started = time.perf_counter()
+        asyncio.run(scraping.run(
+            SessionLocal, scrape_run, adapter_factory=lambda bot: adapters[bot.id], concurrency=concurrency
+        ))
+        seconds = time.perf_counter() - started
+        assert scrape_run.status == "completed" and scrape_run.jobs_new == total, scrape_run.error
+        rate = total / seconds
+        baseline = baseline or rate
+        print(f"{concurrency:3} fetches/platform {seconds:7.2f}s {rate:10,.0f} jobs/s  x{rate / baseline:.1f}")
+    activity_log.writer.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Job search latency benchmark: FTS index vs. the old LIKE '%term%' scan.
+
+Usage (from kardash-platform/backend):
+    python -m benchmarks.bench_search [num_jobs] [database_url]
+
+Defaults to 1,000,000 jobs in a throwaway SQLite file.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+NUM_JOBS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+DATABASE_URL = sys.argv[2] if len(sys.argv) > 2 else f"sqlite:///{tempfile.mkdtemp()}/bench_search.db"
+os.environ["DATABASE_URL"] = DATABASE_URL
+
+from sqlalchemy import insert  # noqa: E402
+
+from app.database import SessionLocal, create_db_and_tables, engine  # noqa: E402
+from app.models import Job, JobStatus  # noqa: E402
+from app.search import apply_search, create_search_index  # noqa: E402
+
+WORDS = (
+    "react python django fastapi scraper design logo wordpress shopify seo marketing "
+    "android ios flutter data analysis excel machine learning api integration backend "
+    "frontend developer writer translation video editing blockchain solidity devops aws"
+).split()
+# Filler vocabulary so that skill terms are selective, as in real listings
+FILLER = [f"lorem{i}" for i in range(20_000)]
+QUERIES = ["react", "pyth", "logo design", "machine learn", "shopify seo", "devops aws", "flut"]
+BATCH_SIZE = 10_000
+RUNS_PER_QUERY = 20
+
+
+def populate():
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for start in range(0, NUM_JOBS, BATCH_SIZE):
+            rows = [
+                {
+                    "title": " ".join(rng.choices(WORDS, k=2) + rng.choices(FILLER, k=4)),
+                    "description": " ".join(rng.choices(WORDS, k=2) + rng.choices(FILLER, k=60)),
+                    "tags": ",".join(rng.choices(WORDS, k=3)),
+                    "budget": rng.uniform(50, 5000),
+                    "status": JobStatus.OPEN.value,
+                    "original_platform_job_id": f"bench-{i}",
+                }
+                for i in range(start, min(start + BATCH_SIZE, NUM_JOBS))
+            ]
+            conn.execute(insert(Job), rows)
+
+
+def measure(label, build_query):
+    db = SessionLocal()
+    latencies = []
+    try:
+        for search in QUERIES:
+            for _ in range(RUNS_PER_QUERY):
+                started = time.perf_counter()
+                build_query(db, search).limit(100).all()
+                latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        db.close()
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{label:>6}: p50={statistics.median(latencies):8.2f}ms  p95={p95:8.2f}ms  ({len(latencies)} queries)")
+
+
+def main():
+    create_db_and_tables()
+    started = time.perf_counter()
+    populate()
+    create_search_index(engine)
+    print(f"Inserted and indexed {NUM_JOBS:,} jobs in {time.perf_counter() - started:.1f}s ({engine.dialect.name})")
+
+    measure("fts", lambda db, search: apply_search(db.query(Job).filter(Job.status == JobStatus.OPEN), search))
+    measure("like", lambda db, search: db.query(Job).filter(
+        Job.status == JobStatus.OPEN,
+        Job.title.contains(search) | Job.description.contains(search),
+    ).order_by(Job.created_at.desc()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Test fixtures: every test gets an empty SQLite database.
+
+Run from kardash-platform/backend:
+    python -m pytest
+"""
+import os
+import tempfile
+
+# Settings are read at import time, so configure them before anything imports app
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+os.environ["DATABASE_ASYNC"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ["RESPONSE_CACHE_TTL_SECONDS"] = "0"
+os.environ["UNREAD_COUNT_CACHE_TTL_SECONDS"] = "0"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import delete  # noqa: E402
+
+from app.database import Base, SessionLocal, create_db_and_tables, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Job, JobStatus, User, UserRole  # noqa: E402
+from app.routers.auth import get_current_admin_user, get_current_user  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    create_db_and_tables()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(delete(table))
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def client():
+    """A client without the startup hooks: no background tasks or worker pools"""
+    return TestClient(app)
+
+
+def login(user: User):
+    """Authenticate every following request as `user`"""
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_admin_user] = lambda: user
+
+
+def make_user(db, role=UserRole.FREELANCER, **values) -> User:
+    count = db.query(User).count()
+    user = User(
+        email=values.pop("email", f"user{count}@example.com"),
+        name=values.pop("name", f"User {count}"),
+        hashed_password="x",
+        role=role,
+        is_active=True,
+        **values,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def make_job(db, **values) -> Job:
+    job = Job(title=values.pop("title", "Build an API"), status=values.pop("status", JobStatus.OPEN), **values)
+    db.add(job)
+    db.commit()
+    return job
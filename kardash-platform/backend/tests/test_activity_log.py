@@ -0,0 +1,84 @@
+from app import activity_log
+from app.activity_log import ActivityWriter
+from app.database import SessionLocal
+from app.models import Bot, BotActivity
+
+
+class FailingSession:
+    def execute(self, *args, **kwargs):
+        raise RuntimeError("database is down")
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def failing_then(session_factory, failures: int):
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return FailingSession() if len(calls) <= failures else session_factory()
+
+    return factory
+
+
+def make_bot(db) -> Bot:
+    bot = Bot(name="upwork-1", platform="upwork")
+    db.add(bot)
+    db.commit()
+    return bot
+
+
+def test_stop_retries_a_failed_flush(db, monkeypatch):
+    monkeypatch.setattr(activity_log, "STOP_RETRY_SECONDS", 0)
+    bot = make_bot(db)
+    writer = ActivityWriter(batch_size=100, flush_seconds=60, max_queue=100, block_seconds=0)
+    writer.start(failing_then(SessionLocal, activity_log.STOP_WRITE_ATTEMPTS - 1))
+    for _ in range(5):
+        assert writer.log(bot.id, "scrape")
+    writer.stop()
+
+    stats = writer.stats()
+    assert (stats["written"], stats["dropped"], stats["errors"]) == (5, 0, activity_log.STOP_WRITE_ATTEMPTS - 1)
+    assert db.query(BotActivity).count() == 5
+
+
+def test_stop_counts_what_it_could_not_write_as_dropped(db, monkeypatch):
+    monkeypatch.setattr(activity_log, "STOP_RETRY_SECONDS", 0)
+    bot = make_bot(db)
+    writer = ActivityWriter(batch_size=2, flush_seconds=60, max_queue=100, block_seconds=0)
+    writer.start(FailingSession)
+    for _ in range(5):
+        writer.log(bot.id, "scrape")
+    writer.stop()
+
+    stats = writer.stats()
+    assert (stats["queue_depth"], stats["written"], stats["dropped"]) == (0, 0, 5)
+    assert stats["errors"] == activity_log.STOP_WRITE_ATTEMPTS
+    assert not writer.running
+
+
+def test_log_without_a_running_writer_inserts_directly(db):
+    bot = make_bot(db)
+    writer = ActivityWriter(batch_size=100, flush_seconds=60, max_queue=100, block_seconds=0)
+
+    assert writer.log(bot.id, "scrape", {"page": 0})
+    assert not writer.running
+    assert db.query(BotActivity).filter(BotActivity.bot_id == bot.id).count() == 1
+    assert writer.stats()["written"] == 1
+
+    writer.session_factory = FailingSession
+    assert not writer.log(bot.id, "scrape")
+    assert writer.stats()["dropped"] == 1
+
+
+def test_log_without_a_running_writer_never_blocks_when_asked_not_to(db):
+    bot = make_bot(db)
+    writer = ActivityWriter(batch_size=100, flush_seconds=60, max_queue=100, block_seconds=0)
+    writer.session_factory = FailingSession  # Would raise if it were used
+
+    assert not writer.log(bot.id, "scrape", block=False)
+    assert (writer.stats()["dropped"], writer.stats()["written"], writer.stats()["errors"]) == (1, 0, 0)
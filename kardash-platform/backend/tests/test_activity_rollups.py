@@ -0,0 +1,58 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from app import activity_rollups
+from app.models import Bot, BotActivity, BotActivityRollup
+
+TYPES = ("scrape", "scrape", "apply", "error")
+
+
+def rollups(db) -> Counter:
+    return Counter({
+        (row.bot_account_id, row.period, activity_rollups.bucket_start(row.period, row.bucket_start),
+         row.activity_type): row.count
+        for row in db.query(BotActivityRollup)
+    })
+
+
+def raw_totals(db) -> Counter:
+    totals = Counter()
+    for row in db.query(BotActivity):
+        for period in activity_rollups.PERIODS:
+            start = activity_rollups.bucket_start(period, row.created_at)
+            totals[(row.bot_account_id or 0, period, start, row.activity_type)] += 1
+    return totals
+
+
+def test_rollups_match_raw_rows_and_survive_pruning(db):
+    bot = Bot(name="upwork-1", platform="upwork")
+    db.add(bot)
+    db.commit()
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"bot_id": bot.id, "bot_account_id": (None, 1)[i % 2], "activity_type": TYPES[i % len(TYPES)],
+         "details": None, "created_at": now - timedelta(days=days, minutes=7 * i)}
+        for days in (45, 2, 0)
+        for i in range(20)
+    ]
+    # Two batches sharing buckets, written the way the activity writer does
+    for batch in (rows[::2], rows[1::2]):
+        db.execute(insert(BotActivity), batch)
+        activity_rollups.record(db, batch)
+        db.commit()
+
+    expected = raw_totals(db)
+    assert rollups(db) == expected
+    assert sum(count for key, count in expected.items() if key[1] == "daily") == len(rows)
+    db.refresh(bot)
+    assert bot.success_rate == 75.0  # Within the window: 3 of every 4 outcomes succeeded
+
+    assert activity_rollups.prune(db) == 20
+    assert db.query(BotActivity).count() == 40
+    assert rollups(db) == expected
+
+    # A backfill only rebuilds days the remaining raw rows still cover
+    assert activity_rollups.backfill(db) == 40
+    assert rollups(db) == expected
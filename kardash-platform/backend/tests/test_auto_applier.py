@@ -0,0 +1,63 @@
+from app.applier import AUTO_APPLIER_PLATFORM, auto_applier_bot_name
+from app.database import SessionLocal, count_queries
+from app.models import Bot, BotStatus, JobApplication, JobStatus
+from app.routers import auto_applier
+
+from .conftest import login, make_job, make_user
+
+
+def add_applications(db, user, count: int):
+    for number in range(count):
+        job = make_job(db, title=f"Job {number}", platform="upwork", budget=100.0 + number)
+        db.add(JobApplication(job_id=job.id, user_id=user.id, proposal="Hi", bid_amount=90.0))
+    db.commit()
+
+
+def test_applications_list_runs_the_same_queries_for_any_page_size(db, client):
+    user = make_user(db)
+    login(user)
+    for total in (1, 30):
+        add_applications(db, user, total - db.query(JobApplication).count())
+        db.expire_all()  # Reload the user like a fresh request would
+        # The user, then applications joined with their jobs
+        with count_queries(max_queries=2):
+            response = client.get("/auto-applier/applications")
+        assert response.status_code == 200
+        assert len(response.json()) == total
+
+
+def test_batch_apply_skips_duplicates_and_counts_only_inserted_rows(db, client, monkeypatch):
+    user = make_user(db)
+    login(user)
+    bot = Bot(name=auto_applier_bot_name(user.id), platform=AUTO_APPLIER_PLATFORM, status=BotStatus.ACTIVE,
+              jobs_applied=1, total_bid_amount=50.0)
+    db.add(bot)
+    applied, raced, fresh = (make_job(db, title=f"Job {n}", budget=100.0 * n) for n in (1, 2, 3))
+    closed = make_job(db, status=JobStatus.COMPLETED)
+    db.add(JobApplication(job_id=applied.id, user_id=user.id, bid_amount=50.0))
+    db.commit()
+
+    get_applier_filter = auto_applier.get_applier_filter
+
+    def apply_concurrently(session, user_id):
+        # Another request commits an application for `raced` after the duplicate check ran
+        other = SessionLocal()
+        other.add(JobApplication(job_id=raced.id, user_id=user_id, bid_amount=1.0))
+        other.commit()
+        other.close()
+        return get_applier_filter(session, user_id)
+
+    monkeypatch.setattr(auto_applier, "get_applier_filter", apply_concurrently)
+    job_ids = [applied.id, raced.id, fresh.id, fresh.id, closed.id, 999]
+    response = client.post("/auto-applier/apply/batch", json={"job_ids": job_ids})
+
+    assert response.status_code == 200
+    body = response.json()
+    statuses = {result["job_id"]: result["status"] for result in body["results"]}
+    assert statuses == {applied.id: "already_applied", raced.id: "already_applied", fresh.id: "applied",
+                        closed.id: "not_open", 999: "not_found"}
+    assert body["applied"] == 1
+    bid = next(result["bid_amount"] for result in body["results"] if result["status"] == "applied")
+    db.expire_all()
+    assert db.query(JobApplication).filter(JobApplication.user_id == user.id).count() == 3
+    assert (db.get(Bot, bot.id).jobs_applied, db.get(Bot, bot.id).total_bid_amount) == (2, 50.0 + bid)
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from app import auto_apply_worker, scraping
+from app.applier import AUTO_APPLIER_PLATFORM, auto_applier_bot_name
+from app.database import SessionLocal
+from app.models import AutoApplyTask, Bot, BotStatus, Job, JobStatus
+
+from .conftest import make_job, make_user
+
+
+def queued_job_ids(db) -> set:
+    return {job_id for (job_id,) in db.query(AutoApplyTask.job_id)}
+
+
+def test_enqueue_picks_up_jobs_committed_below_the_highest_queued_id(db):
+    make_job(db, id=1)
+    make_job(db, id=3)
+    make_job(db, id=4, status=JobStatus.COMPLETED)
+    assert auto_apply_worker.enqueue_new_jobs(db) == 2
+    assert queued_job_ids(db) == {1, 3}
+
+    # Job 2 got its id first but committed after job 3 was queued
+    make_job(db, id=2)
+    assert auto_apply_worker.enqueue_new_jobs(db) == 1
+    assert queued_job_ids(db) == {1, 2, 3}
+    assert auto_apply_worker.enqueue_new_jobs(db) == 0
+
+
+def test_enqueue_respects_the_limit(db):
+    for job_id in range(1, 6):
+        make_job(db, id=job_id)
+    assert auto_apply_worker.enqueue_new_jobs(db, limit=2) == 2
+    assert auto_apply_worker.enqueue_new_jobs(db, limit=2) == 2
+    assert auto_apply_worker.enqueue_new_jobs(db, limit=2) == 1
+    assert queued_job_ids(db) == {1, 2, 3, 4, 5}
+
+
+def test_sweep_only_looks_back_over_the_enqueue_window(db):
+    make_job(db, id=1, created_at=datetime.now(timezone.utc) - timedelta(days=2))
+    make_job(db, id=2)
+    assert auto_apply_worker.enqueue_new_jobs(db) == 1
+    assert queued_job_ids(db) == {2}
+
+
+def test_enqueue_jobs_queues_open_jobs_with_the_callers_transaction(db):
+    open_job = make_job(db)
+    closed = make_job(db, status=JobStatus.CANCELLED)
+    auto_apply_worker.enqueue_jobs(db, [open_job.id, closed.id])
+    db.rollback()
+    assert queued_job_ids(db) == set()
+
+    auto_apply_worker.enqueue_jobs(db, [open_job.id, closed.id])
+    auto_apply_worker.enqueue_jobs(db, [open_job.id])
+    db.commit()
+    assert queued_job_ids(db) == {open_job.id}
+
+
+def test_scraped_jobs_are_queued_as_they_are_inserted(db):
+    adapter = scraping.FixtureAdapter("upwork", [])
+    postings = [{"id": i, "title": f"Job {i}"} for i in range(3)]
+    scraping.upsert_pages(SessionLocal, [(None, None, adapter, postings)])
+    scraping.upsert_pages(SessionLocal, [(None, None, adapter, postings)])
+    assert queued_job_ids(db) == {job_id for (job_id,) in db.query(Job.id)}
+    assert db.query(AutoApplyTask).count() == 3
+
+
+def test_appliers_are_found_by_platform_and_owner(db):
+    owner = make_user(db)
+    legacy = make_user(db)
+    db.add_all([
+        Bot(name="my applier", platform=AUTO_APPLIER_PLATFORM, status=BotStatus.ACTIVE,
+            config=json.dumps({"user_id": owner.id})),
+        Bot(name=auto_applier_bot_name(legacy.id), platform=AUTO_APPLIER_PLATFORM, status=BotStatus.ACTIVE),
+        Bot(name="auto_applier_x", platform=AUTO_APPLIER_PLATFORM, status=BotStatus.ACTIVE),
+        Bot(name="auto_applier_scraper", platform="upwork", status=BotStatus.ACTIVE),
+    ])
+    db.commit()
+    assert set(auto_apply_worker._active_appliers(db)) == {owner.id, legacy.id}
@@ -0,0 +1,32 @@
+from app import counters
+from app.database import count_queries
+from app.models import DashboardStats, JobStatus
+
+from .conftest import make_job, make_user
+
+
+def test_dashboard_stats_without_a_row_are_computed_without_writing(db):
+    make_user(db)
+    make_job(db, budget=100.0)
+    make_job(db, budget=250.0, status=JobStatus.COMPLETED)
+
+    # Replica sessions can only read
+    with count_queries() as counter:
+        stats = counters.get_dashboard_stats(db)
+    assert all(statement.lstrip().startswith("SELECT") for statement in counter.statements)
+    assert (stats.total_jobs, stats.active_jobs, stats.total_users) == (2, 1, 1)
+    assert (stats.total_earnings, stats.commission_rate) == (250.0, 0.15)
+    assert stats not in db and not db.new
+    assert db.query(DashboardStats).count() == 0
+
+
+def test_reconcile_creates_then_overwrites_the_row(db):
+    make_job(db)
+    counters.reconcile_dashboard_stats(db)
+    stats = db.get(DashboardStats, counters.STATS_ROW_ID)
+    stats.total_jobs = 40
+    db.commit()
+
+    counters.reconcile_dashboard_stats(db)
+    assert db.query(DashboardStats).count() == 1
+    assert counters.get_dashboard_stats(db).total_jobs == 1
@@ -0,0 +1,20 @@
+from app.database import insert_ignore_duplicates
+from app.models import JobApplication
+
+from .conftest import make_job, make_user
+
+
+def test_insert_ignore_duplicates_returns_only_new_keys(db):
+    user = make_user(db)
+    jobs = [make_job(db) for _ in range(3)]
+    db.add(JobApplication(job_id=jobs[0].id, user_id=user.id, bid_amount=10.0))
+    db.commit()
+
+    rows = [{"job_id": job.id, "user_id": user.id, "bid_amount": 20.0} for job in jobs]
+    inserted = insert_ignore_duplicates(db, JobApplication, rows, ["job_id", "user_id"], chunk_size=2)
+    db.commit()
+
+    assert inserted == {(jobs[1].id, user.id), (jobs[2].id, user.id)}
+    assert sorted(bid for (bid,) in db.query(JobApplication.bid_amount)) == [10.0, 20.0, 20.0]
+    assert insert_ignore_duplicates(db, JobApplication, rows, ["job_id", "user_id"]) == set()
+    assert insert_ignore_duplicates(db, JobApplication, [], ["job_id", "user_id"]) == set()
@@ -0,0 +1,28 @@
+import asyncio
+
+from app import hashing
+from app.config import settings
+from app.hashing import HashingPool
+
+
+def test_start_launches_every_worker_outside_the_server_process():
+    pool = HashingPool(workers=2, max_pending=4)
+    pool.start()
+    try:
+        executor = pool._executor
+        assert executor._mp_context.get_start_method() == hashing.START_METHOD != "fork"
+        assert len(executor._processes) == 2
+
+        hashed = asyncio.run(pool.run(hashing._hash, "secret"))
+        assert asyncio.run(pool.run(hashing._verify_and_update, "secret", hashed))[0]
+        assert pool._executor is executor and len(executor._processes) == 2
+    finally:
+        pool.shutdown()
+
+
+def test_default_workers_split_the_cpus_between_api_processes(monkeypatch):
+    monkeypatch.setattr(hashing.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    assert hashing.default_workers() == 2
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 16)
+    assert hashing.default_workers() == 1
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from app.database import count_queries
+from app.models import BotAccount, UserRole
+
+from .conftest import login, make_job, make_user
+
+
+def add_jobs(db, owner, total: int):
+    # updated_at is only set on update; JobResponse and friends require it
+    now = datetime.utcnow()
+    for number in range(db.query(BotAccount).count(), total):
+        account = BotAccount(name=f"upwork-account-{number}", platform="upwork", updated_at=now)
+        assignee = make_user(db, updated_at=now)
+        db.add(account)
+        db.commit()
+        make_job(db, title=f"Job {number}", description="Scraped", budget=100.0 + number, user_id=owner.id,
+                 bot_account_id=account.id, assigned_to_user_id=assignee.id, updated_at=now)
+
+
+def test_admin_jobs_list_loads_bot_accounts_and_assignees_with_the_jobs(db, client):
+    admin = make_user(db, role=UserRole.ADMIN)
+    login(admin)
+    for total in (1, 30):
+        add_jobs(db, admin, total)
+        db.expire_all()
+        # The list validators, then jobs joined with their bot accounts and assignees
+        with count_queries(max_queries=2):
+            response = client.get("/jobs/", params={"limit": 100})
+        assert response.status_code == 200
+        jobs = response.json()
+        assert len(jobs) == total
+        assert all(job["bot_account"]["id"] == job["bot_account_id"] for job in jobs)
+        assert all(job["assigned_to_user"]["id"] == job["assigned_to_user_id"] for job in jobs)
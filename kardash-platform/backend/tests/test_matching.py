@@ -0,0 +1,63 @@
+from app import matching
+from app.config import settings
+from app.database import SessionLocal, count_queries
+from app.models import Job, JobStatus
+
+from .conftest import make_job
+
+
+def indexed_ids(index) -> list:
+    return sorted(job_id for job_id, _ in index.top_k(["python"], k=100))
+
+
+def test_lookups_read_the_current_index_without_querying(db, monkeypatch):
+    monkeypatch.setattr(matching, "_index", None)
+    first = make_job(db, title="Python scraper")
+    index = matching.refresh_job_index(SessionLocal)
+    second = make_job(db, title="Python API")
+
+    with count_queries(max_queries=0):
+        assert matching.get_job_index(db) is index
+    assert indexed_ids(index) == [first.id]
+
+    # The background refresh tops the same index up with jobs written elsewhere
+    assert matching.refresh_job_index(SessionLocal) is index
+    assert indexed_ids(index) == [first.id, second.id]
+
+
+def test_rebuild_swaps_in_a_fresh_index_with_writes_made_while_it_loaded(db, monkeypatch):
+    monkeypatch.setattr(matching, "_index", None)
+    closed = make_job(db, title="Python scraper")
+    kept = make_job(db, title="Python API")
+    old = matching.refresh_job_index(SessionLocal)
+    load = matching.JobIndex.load
+
+    def load_during_a_write(index, session):
+        load(index, session)
+        # Closed by a request after the load read it as open
+        closed.status = JobStatus.CANCELLED
+        matching.index_job(closed)
+
+    monkeypatch.setattr(matching.JobIndex, "load", load_during_a_write)
+    monkeypatch.setattr(settings, "MATCHING_INDEX_REBUILD_SECONDS", -1)
+    fresh = matching.refresh_job_index(SessionLocal)
+
+    assert fresh is not old and matching.get_job_index(db) is fresh
+    assert indexed_ids(old) == [kept.id]
+    assert indexed_ids(fresh) == [kept.id]
+
+
+def test_sync_picks_up_late_commits_and_changes_made_elsewhere(db, monkeypatch):
+    monkeypatch.setattr(matching, "_index", None)
+    later = make_job(db, id=100, title="Python scraper")
+    closed = make_job(db, title="Python API")
+    index = matching.refresh_job_index(SessionLocal)
+    assert indexed_ids(index) == [later.id, closed.id]
+
+    # A lower id committing after a higher one was indexed, and a status change from another process
+    earlier = make_job(db, id=50, title="Python bot")
+    db.query(Job).filter(Job.id == closed.id).update({"status": JobStatus.CANCELLED})
+    db.commit()
+
+    assert matching.refresh_job_index(SessionLocal) is index
+    assert indexed_ids(index) == [earlier.id, later.id]
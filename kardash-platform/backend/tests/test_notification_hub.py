@@ -0,0 +1,54 @@
+import asyncio
+
+from app import notification_hub
+from app.models import Notification
+
+from .conftest import make_user
+
+
+def notify(db, user, count: int) -> list:
+    notifications = [Notification(user_id=user.id, type="payment", message=f"Paid {i}") for i in range(count)]
+    db.add_all(notifications)
+    db.commit()
+    return notifications
+
+
+def read_stream(user_id: int, queued: list, first_events: list) -> str:
+    async def collect():
+        queue = notification_hub.hub.subscribe(user_id)
+        for message in queued:
+            queue.put_nowait(message)
+        chunks = notification_hub.stream(user_id, queue, first_events, heartbeat=0.01, max_seconds=0.05)
+        return "".join([chunk async for chunk in chunks])
+
+    return asyncio.run(collect())
+
+
+def test_reconnect_replays_notifications_after_the_last_event_id(db):
+    user = make_user(db)
+    other = make_user(db)
+    seen, *missed = notify(db, user, 3)
+    notify(db, other, 1)
+
+    replay = notification_hub.missed_notifications(db, user.id, seen.id)
+    assert [message["id"] for message in replay] == [notification.id for notification in missed]
+
+    # The live queue repeats a replayed notification and then brings a new one
+    live = {"event": "notification", "data": {"id": missed[1].id + 100}, "id": missed[1].id + 100}
+    body = read_stream(user.id, [replay[-1], live], replay)
+    ids = [int(line[4:]) for line in body.splitlines() if line.startswith("id: ")]
+    assert ids == [missed[0].id, missed[1].id, live["id"]]
+    assert body.startswith("retry: ")
+
+
+def test_replaying_more_than_a_queue_asks_for_a_resync(db, monkeypatch):
+    user = make_user(db)
+    monkeypatch.setattr(notification_hub.hub, "queue_size", 2)
+    first, *_ = notify(db, user, 4)
+    assert notification_hub.missed_notifications(db, user.id, first.id) == [notification_hub.RESYNC]
+    assert len(notification_hub.missed_notifications(db, user.id, first.id + 1)) == 2
+
+
+def test_published_notifications_carry_their_id():
+    assert notification_hub.format_event("notification", {"id": 7}, 7).startswith("id: 7\nevent: notification\n")
+    assert notification_hub.format_event("resync", {}) == "event: resync\ndata: {}\n\n"
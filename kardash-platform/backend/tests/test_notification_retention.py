@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+from app import notification_retention
+from app.database import SessionLocal
+from app.models import ArchivedNotification, Notification
+
+from .conftest import make_user
+
+
+def add_notifications(db, user, count: int, days_old: int, is_read: bool) -> list:
+    moment = datetime.now(timezone.utc) - timedelta(days=days_old)
+    notifications = [
+        Notification(user_id=user.id, type="payment", message=f"Paid {i}", is_read=is_read,
+                     time=moment + timedelta(seconds=i))
+        for i in range(count)
+    ]
+    db.add_all(notifications)
+    db.commit()
+    return [notification.id for notification in notifications]
+
+
+def ids(db, model) -> list:
+    return sorted(row_id for (row_id,) in db.query(model.id))
+
+
+def test_archive_moves_each_old_read_notification_exactly_once(db):
+    user = make_user(db)
+    old_read = add_notifications(db, user, 7, days_old=60, is_read=True)
+    kept = add_notifications(db, user, 2, days_old=60, is_read=False) + add_notifications(db, user, 2, 1, True)
+
+    assert notification_retention.run(SessionLocal, older_than_days=30, batch_size=3) == 7
+    assert notification_retention.run(SessionLocal, older_than_days=30, batch_size=3) == 0
+
+    db.expire_all()
+    assert ids(db, ArchivedNotification) == old_read
+    assert ids(db, Notification) == sorted(kept)
+    archived = db.get(ArchivedNotification, old_read[0])
+    assert (archived.user_id, archived.message, archived.is_read) == (user.id, "Paid 0", True)
+
+
+def test_a_failed_batch_leaves_its_rows_in_place(db):
+    user = make_user(db)
+    old_read = add_notifications(db, user, 4, days_old=60, is_read=True)
+    # The second batch clashes with a row already in the archive
+    db.add(ArchivedNotification(id=old_read[2], user_id=user.id, type="payment", message="Paid 2"))
+    db.commit()
+
+    assert notification_retention.run(SessionLocal, older_than_days=30, batch_size=2) == 2
+    assert notification_retention.metrics.snapshot()["last_error"] is not None
+
+    db.expire_all()
+    assert ids(db, Notification) == old_read[2:]
+    assert ids(db, ArchivedNotification) == old_read[:3]
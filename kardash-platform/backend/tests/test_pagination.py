@@ -0,0 +1,53 @@
+from fastapi import Response
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import Job, JobStatus
+from app.pagination import NEXT_CURSOR_HEADER, paginate
+
+from .conftest import make_job
+
+
+def walk(db, descending: bool, limit: int) -> list:
+    """Job ids of every page of the budget sort, following X-Next-Cursor"""
+    seen, cursor = [], None
+    while True:
+        response = Response()
+        rows = paginate(db.query(Job), Job.budget, Job.id, limit, cursor=cursor, response=response,
+                        descending=descending, nulls_as=0.0)
+        seen.extend(job.id for job in rows)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return seen
+
+
+def test_budget_cursor_walks_every_job_once_with_null_budgets(db):
+    for budget in (None, 50.0, None, 0.0, 200.0, None, 50.0, 10.0, None, 75.0):
+        make_job(db, budget=budget)
+    jobs = db.query(Job).all()
+    high = sorted(jobs, key=lambda job: (job.budget or 0.0, job.id), reverse=True)
+
+    for limit in (1, 2, 3, 4):
+        assert walk(db, descending=True, limit=limit) == [job.id for job in high]
+        assert walk(db, descending=False, limit=limit) == [job.id for job in reversed(high)]
+
+
+def test_budget_cursor_pages_seek_the_index_without_sorting(db):
+    for budget in (None, 50.0, 200.0):
+        make_job(db, budget=budget)
+    first = Response()
+    paginate(db.query(Job).filter(Job.status == JobStatus.OPEN), Job.budget, Job.id, 1, response=first, nulls_as=0.0)
+
+    executed = []
+    listener = lambda conn, cursor, statement, parameters, context, many: executed.append((statement, parameters))
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        paginate(db.query(Job).filter(Job.status == JobStatus.OPEN), Job.budget, Job.id, 1,
+                 cursor=first.headers[NEXT_CURSOR_HEADER], nulls_as=0.0)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    statement, parameters = executed[-1]
+    plan = " ".join(row[3] for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+    assert "ix_jobs_status_coalesced_budget_id (status=? AND <expr><?)" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from app import activity_log, matching, scraping
+from app.applier import AUTO_APPLIER_PLATFORM, auto_applier_bot_name
+from app.database import SessionLocal
+from app.models import Bot, BotActivity, BotStatus, Job, JobStatus
+
+
+def postings(prefix: str, count: int, budget: float = 100.0) -> list:
+    return [{"id": f"{prefix}-{i}", "title": f"Job {prefix} {i}", "budget": budget + i, "tags": ["python"]}
+            for i in range(count)]
+
+
+def scrape(adapters: dict) -> scraping.ScrapeRun:
+    activity_log.writer.start(SessionLocal)
+    scrape_run = asyncio.run(scraping.run(
+        SessionLocal, scraping.create(), adapter_factory=lambda bot: adapters.get(bot.id)
+    ))
+    activity_log.writer.stop()
+    return scrape_run
+
+
+def test_run_scrapes_active_bots_and_skips_auto_appliers(db):
+    upwork = Bot(name="upwork-1", platform="upwork", status=BotStatus.ACTIVE)
+    fiverr = Bot(name="fiverr-1", platform="fiverr", status=BotStatus.ACTIVE)
+    idle = Bot(name="fiverr-2", platform="fiverr", status=BotStatus.INACTIVE)
+    applier = Bot(name=auto_applier_bot_name(1), platform=AUTO_APPLIER_PLATFORM, status=BotStatus.ACTIVE)
+    db.add_all([upwork, fiverr, idle, applier])
+    db.commit()
+    adapters = {
+        upwork.id: scraping.FixtureAdapter("upwork", [postings("a", 3), postings("b", 2)]),
+        fiverr.id: scraping.FixtureAdapter("fiverr", [postings("a", 4) + [{"id": "bad"}]]),
+        idle.id: scraping.FixtureAdapter("fiverr", [postings("idle", 1)]),
+    }
+
+    scrape_run = scrape(adapters)
+
+    assert scrape_run.status == "completed", scrape_run.error
+    assert (scrape_run.bots, scrape_run.pages, scrape_run.errors) == (2, 3, 0)
+    assert (scrape_run.jobs_parsed, scrape_run.jobs_invalid, scrape_run.jobs_new) == (10, 1, 9)
+    assert set(scrape_run.platforms) == {"upwork", "fiverr"}
+    db.expire_all()
+    jobs = db.query(Job).order_by(Job.original_platform_job_id).all()
+    assert [job.original_platform_job_id for job in jobs][:2] == ["fiverr:a-0", "fiverr:a-1"]
+    assert len(jobs) == 9 and all(job.status == JobStatus.OPEN for job in jobs)
+    assert (db.get(Bot, upwork.id).jobs_scraped, db.get(Bot, fiverr.id).jobs_scraped) == (5, 4)
+    assert db.get(Bot, upwork.id).last_active is not None
+    assert not db.get(Bot, applier.id).jobs_scraped and db.get(Bot, applier.id).last_active is None
+    assert db.query(BotActivity).filter(BotActivity.bot_id == applier.id).count() == 0
+    assert db.query(BotActivity).filter(BotActivity.activity_type == "scrape").count() == 3
+
+
+def test_run_again_refreshes_instead_of_duplicating(db):
+    bot = Bot(name="upwork-1", platform="upwork", status=BotStatus.ACTIVE)
+    db.add(bot)
+    db.commit()
+
+    first = scrape({bot.id: scraping.FixtureAdapter("upwork", [postings("a", 3)])})
+    second = scrape({bot.id: scraping.FixtureAdapter("upwork", [postings("a", 3, budget=500.0)])})
+
+    assert (first.jobs_new, first.jobs_existing) == (3, 0)
+    assert (second.jobs_new, second.jobs_existing) == (0, 3)
+    db.expire_all()
+    assert sorted(job.budget for job in db.query(Job)) == [500.0, 501.0, 502.0]
+    assert db.get(Bot, bot.id).jobs_scraped == 6
+
+
+def test_upserted_jobs_are_indexed_for_matching(db, monkeypatch):
+    monkeypatch.setattr(matching, "_index", None)
+    bot = Bot(name="upwork-1", platform="upwork", status=BotStatus.ACTIVE)
+    db.add(bot)
+    db.commit()
+    index = matching.get_job_index(db)
+
+    scrape({bot.id: scraping.FixtureAdapter("upwork", [postings("a", 3)])})
+    ids = sorted(job.id for job in db.query(Job))
+    assert sorted(job_id for job_id, _ in index.top_k(["python"], k=10)) == ids
+
+    retagged = [dict(posting, tags=["rust"]) for posting in postings("a", 3)]
+    scrape({bot.id: scraping.FixtureAdapter("upwork", [retagged])})
+    rust = index.top_k(["rust"], k=10)
+    assert sorted(job_id for job_id, _ in rust) == ids and all(score > 0 for _, score in rust)
+    assert len(index) == 3
+
+
+def test_adapters_must_implement_fetch_page():
+    class Incomplete(scraping.PlatformAdapter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("upwork")
+    assert scraping.FixtureAdapter("upwork", []).platform == "upwork"
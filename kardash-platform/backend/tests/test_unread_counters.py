@@ -0,0 +1,107 @@
+from app import unread_counters
+from app.models import Notification, UnreadNotificationCount, UserRole
+
+from .conftest import login, make_user
+
+
+def notify(db, user, count: int, is_read: bool = False) -> list:
+    notifications = [Notification(user_id=user.id, type="payment", message="Paid", is_read=is_read)
+                     for _ in range(count)]
+    db.add_all(notifications)
+    return notifications
+
+
+def counter(db, user) -> int:
+    db.expire_all()
+    return db.get(UnreadNotificationCount, user.id).unread
+
+
+def test_adjust_builds_the_row_then_applies_deltas(db):
+    user = make_user(db)
+    notify(db, user, 2)
+    notify(db, user, 1, is_read=True)
+    db.commit()
+    assert unread_counters.unread_count(db, user.id) == 2
+    assert db.get(UnreadNotificationCount, user.id) is None  # Reads never build the row
+
+    # First change: the row is counted from notifications, including this one
+    notify(db, user, 1)
+    unread_counters.adjust(db, {user.id: 1})
+    db.commit()
+    assert counter(db, user) == 3
+
+    unread_counters.adjust(db, {user.id: -2})
+    db.commit()
+    assert counter(db, user) == 1
+
+    unread_counters.adjust(db, {user.id: 5})
+    db.rollback()
+    assert counter(db, user) == 1
+
+
+def test_repair_fixes_drift_and_builds_missing_rows(db):
+    drifted, missing, correct = make_user(db), make_user(db), make_user(db)
+    for user, count in ((drifted, 2), (missing, 3), (correct, 1)):
+        notify(db, user, count)
+    db.add_all([UnreadNotificationCount(user_id=drifted.id, unread=7),
+                UnreadNotificationCount(user_id=correct.id, unread=1)])
+    db.commit()
+
+    assert unread_counters.repair(db) == 2
+    assert [counter(db, user) for user in (drifted, missing, correct)] == [2, 3, 1]
+    assert unread_counters.repair(db) == 0
+
+
+def test_routes_keep_the_counter_in_step(db, client):
+    admin = make_user(db, role=UserRole.ADMIN)
+    user = make_user(db)
+    login(admin)
+    created = [client.post("/notifications/", json={"user_id": user.id, "type": "payment", "message": "Paid"})
+               for _ in range(3)]
+    assert all(response.status_code == 200 for response in created)
+
+    login(user)
+    assert client.get("/notifications/unread-count").json() == {"unread_count": 3}
+    assert client.post(f"/notifications/{created[0].json()['id']}/mark-read").status_code == 200
+    assert client.get("/notifications/unread-count").json() == {"unread_count": 2}
+    assert client.post("/notifications/mark-all-read").status_code == 200
+    assert client.get("/notifications/unread-count").json() == {"unread_count": 0}
+    assert counter(db, user) == 0
+
+
+def test_first_adjust_adds_its_delta_to_a_row_built_concurrently(db, monkeypatch):
+    user = make_user(db)
+    notify(db, user, 2)
+    db.commit()
+    count_unread = unread_counters._count_unread
+
+    def row_appears_meanwhile(session, user_ids):
+        counts = count_unread(session, user_ids)
+        # Built by another transaction from its own view: the 2 committed
+        # notifications plus 3 of its own that this transaction can't see
+        session.add(UnreadNotificationCount(user_id=user.id, unread=5))
+        session.flush()
+        return counts
+
+    monkeypatch.setattr(unread_counters, "_count_unread", row_appears_meanwhile)
+    notify(db, user, 1)
+    unread_counters.adjust(db, {user.id: 1})
+    db.commit()
+    assert counter(db, user) == 6
+
+
+def test_marking_or_deleting_twice_decrements_once(db, client):
+    user = make_user(db)
+    first, second, read = notify(db, user, 2) + notify(db, user, 1, is_read=True)
+    db.commit()
+    unread_counters.repair(db)
+    login(user)
+
+    assert client.post(f"/notifications/{first.id}/mark-read").status_code == 200
+    assert client.post(f"/notifications/{first.id}/mark-read").status_code == 200
+    assert counter(db, user) == 1
+    assert client.delete(f"/notifications/{second.id}").status_code == 200
+    assert client.delete(f"/notifications/{second.id}").status_code == 404
+    assert client.delete(f"/notifications/{read.id}").status_code == 200
+    assert client.post("/notifications/999/mark-read").status_code == 404
+    assert counter(db, user) == 0